@@ -1,9 +1,10 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+import click
 import os
 
-def create_app():
+def create_app(test_config=None):
     """Factory function para crear la aplicación Flask"""
     # Obtener el directorio base del proyecto
     base_dir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
@@ -16,19 +17,127 @@ def create_app():
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///life_organizer.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DB_AUTO_UPGRADE'] = False
+    app.config['TASK_COUNTERS_ENABLED'] = True
+    app.config['CHART_CACHE_MAX_BYTES'] = 64 * 1024 * 1024
+    app.config['CHART_CACHE_DIR'] = os.environ.get('CHART_CACHE_DIR')
+    app.config['CHART_CACHE_MAX_DISK_BYTES'] = 512 * 1024 * 1024
+    app.config['REPORT_WORKERS'] = int(os.environ.get('REPORT_WORKERS', 2))
+    app.config['REPORT_MAX_PENDING'] = 16
+    app.config['REPORT_RECYCLE_AFTER'] = 50
+    app.config['REPORT_RESULT_TTL'] = 600
+    # /metrics desactivado por defecto; activo responde solo a localhost o, con METRICS_TOKEN,
+    # a 'Authorization: Bearer <token>' (detrás de un proxy local conviene definir el token)
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '0') == '1'
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 200))
+    # Perfil de SQLite: 'default' o 'production' (WAL, PRAGMAs y pool dimensionado), a activar
+    # con DB_STORAGE_PROFILE=production en el servidor; cambia la base a WAL (archivos -wal y -shm)
+    app.config['DB_STORAGE_PROFILE'] = os.environ.get('DB_STORAGE_PROFILE', 'default')
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    app.config['DB_POOL_TIMEOUT'] = 30
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = 5000
+    app.config['SQLITE_MMAP_SIZE'] = 256 * 1024 * 1024
+    app.config['SQLITE_CACHE_SIZE'] = -16000  # KiB por conexión
+    app.config['DB_MAINTENANCE_INTERVAL'] = 3600  # segundos; 0 lo desactiva
+    # Pool de solo lectura para análisis (HealthDataAnalyzer, cohortes, exportación)
+    app.config['ANALYTICS_READ_ONLY_POOL'] = True
+    app.config['ANALYTICS_POOL_SIZE'] = int(os.environ.get('ANALYTICS_POOL_SIZE', 4))
+    app.config['ANALYTICS_MAX_OVERFLOW'] = 4
+    # Streams de eventos en vivo (/api/stream) por proceso
+    app.config['STREAM_MAX_CONNECTIONS'] = int(os.environ.get('STREAM_MAX_CONNECTIONS', 50))
+    app.config['STREAM_MAX_PER_USER'] = 5
+    app.config['STREAM_HEARTBEAT_SECONDS'] = 15
+    app.config['STREAM_MAX_SECONDS'] = 300
+    app.config['STREAM_HISTORY_SIZE'] = 100
+    # Cola persistente de trabajos: hilos en el proceso web (0: solo 'flask worker')
+    app.config['JOBS_WORKERS'] = int(os.environ.get('JOBS_WORKERS', 1))
+    app.config['JOBS_POLL_INTERVAL'] = 1.0
+    app.config['JOBS_VISIBILITY_TIMEOUT'] = 300
+    app.config['JOBS_MAX_ATTEMPTS'] = 5
+    app.config['JOBS_BACKOFF_SECONDS'] = 2
+    app.config['JOBS_BACKOFF_MAX_SECONDS'] = 600
+    app.config['JOBS_KEEP_DONE_SECONDS'] = 86400
+    # Motor de alertas de salud: evaluación por lotes en la cola de trabajos
+    app.config['ALERTS_ASYNC'] = os.environ.get('ALERTS_ASYNC', '1') != '0'
+    app.config['ALERTS_BATCH_DELAY_MS'] = 200
+    app.config['ALERTS_MAX_BATCH'] = 500
+    # Respuestas JSON con orjson cuando está instalado (misma salida que json.dumps)
+    app.config['JSON_FAST_ENCODER'] = os.environ.get('JSON_FAST_ENCODER', '1') != '0'
+    app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', '0') == '1'
+    app.config['PROFILING_TOKEN'] = os.environ.get('PROFILING_TOKEN')
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR')
+    app.config['PROFILE_MAX_FILES'] = 100
+    app.config['PROFILE_SAMPLE_INTERVAL_MS'] = 5
+    
+    # Configuración explícita (pruebas, benchmarks, herramientas de CLI)
+    if test_config:
+        app.config.update(test_config)
+    
+    # Generación de reportes en procesos separados, cada uno con su caché de gráficos
+    # (el proceso web no renderiza gráficos; el nivel en disco lo comparten los trabajadores)
+    from app.report_jobs import report_runner
+    report_runner.configure(app.config['REPORT_WORKERS'],
+                            app.config['REPORT_MAX_PENDING'],
+                            app.config['REPORT_RECYCLE_AFTER'],
+                            app.config['REPORT_RESULT_TTL'],
+                            cache_options=(app.config['CHART_CACHE_MAX_BYTES'],
+                                           app.config['CHART_CACHE_DIR'],
+                                           app.config['CHART_CACHE_MAX_DISK_BYTES']))
+    
+    # Eventos en vivo para el dashboard
+    from app.events import event_broker, register_session_events
+    event_broker.configure(app.config['STREAM_MAX_CONNECTIONS'],
+                           app.config['STREAM_MAX_PER_USER'],
+                           app.config['STREAM_HISTORY_SIZE'])
     
     # Inicializar extensiones
     from app.models import db
+    from app.storage import engine_options, storage_maintenance
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**engine_options(app.config),
+                                               **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
     db.init_app(app)
+    register_session_events(db.session)
+    storage_maintenance.init_app(app)
+    
+    # Trabajos diferidos y evaluación de reglas de alertas después de cada commit
+    from app.jobs import job_queue
+    job_queue.init_app(app)
+    from app.alerts import alert_engine
+    alert_engine.init_app(app)
     CORS(app)
     
+    # Codificación JSON rápida
+    if app.config['JSON_FAST_ENCODER']:
+        from app.serialization import FastJSONProvider
+        app.json = FastJSONProvider(app)
+    
     # Registrar blueprints
     from app.routes import main_bp, api_bp
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp, url_prefix='/api')
     
-    # Crear tablas de base de datos
+    # Métricas por endpoint (/metrics)
+    from app.metrics import request_metrics
+    request_metrics.init_app(app)
+    
+    # Perfilado opcional de peticiones (cabecera X-Profile con PROFILING_TOKEN)
+    from app.profiling import request_profiler
+    request_profiler.init_app(app)
+    
+    # Registrar comandos de CLI
+    from app.cli import register_commands
+    register_commands(app)
+    
+    # El esquema solo se modifica con 'flask db-upgrade'; al iniciar se verifica que esté al día.
+    # DB_AUTO_UPGRADE lo crea y migra al iniciar (bases temporales de pruebas y benchmarks).
+    from app.migrations import upgrade_database, check_schema_version
     with app.app_context():
-        db.create_all()
+        if app.config['DB_AUTO_UPGRADE']:
+            upgrade_database(db.engine, db.metadata)
+        elif click.get_current_context(silent=True) is None:
+            # Desde la CLI de flask no se verifica: db-upgrade tiene que poder ejecutarse
+            check_schema_version(db.engine)
     
     return app
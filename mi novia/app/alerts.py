@@ -0,0 +1,404 @@
+"""
+Motor de alertas de salud basado en reglas
+Las escrituras de salud encolan un trabajo persistente en su misma transacción y los
+trabajadores de la cola (app/jobs.py) evalúan las reglas por lotes de usuarios, fuera de
+la petición. Cada regla se evalúa de forma vectorizada (pandas) sobre los datos recientes
+del lote. Una alerta abierta no se repite y, una vez resuelta, no se vuelve a crear dentro
+de su ventana (clave única por usuario, tipo y ventana). Cuando las lecturas se normalizan
+la alerta se resuelve sola.
+Los eventos SSE de alertas se publican en el EventBroker del proceso que las evalúa: solo
+llegan al dashboard con los trabajadores dentro del proceso web (JOBS_WORKERS > 0). Las
+que evalúa 'flask worker' en otro proceso se ven al consultar las notificaciones.
+"""
+
+import threading
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from flask import current_app
+from sqlalchemy import event, select
+
+from app.models import db, insert_for_dialect, User, HealthData, HealthAlert
+from app.notification_state import add_notification
+from app.events import event_broker
+from app.jobs import job_queue
+
+alert_table = HealthAlert.__table__
+
+# Días de datos que se leen por usuario para calcular los indicadores
+LOOKBACK_DAYS = 30
+
+# Umbrales de las reglas
+SYSTOLIC_LIMIT = 140
+DIASTOLIC_LIMIT = 90
+BLOOD_PRESSURE_MAX_AGE_DAYS = 7    # lecturas más antiguas no activan ni resuelven
+DEHYDRATION_RATIO = 0.5            # fracción de water_target en los días anteriores
+DEHYDRATION_MIN_DAYS = 2           # de los últimos 3 días completos
+SEDENTARY_WEEKLY_MINUTES = 60
+SEDENTARY_MIN_DAYS_LOGGED = 4      # días con registros en la última semana
+WEIGHT_CHANGE_RATIO = 0.05
+WEIGHT_CHANGE_MIN_SPAN_DAYS = 7
+
+# Las fechas de la base son UTC sin zona horaria
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+class AlertRule:
+    """Regla declarativa: condición vectorizada sobre los indicadores de cada usuario
+
+    condition recibe el DataFrame de indicadores (un usuario por fila) y devuelve una
+    Serie booleana. requires son los indicadores que deben existir para evaluar la regla:
+    sin ellos no se crea ni se resuelve la alerta.
+    """
+
+    def __init__(self, alert_type, level, condition, requires, message, action_recommended,
+                 notification=None, priority='normal', window=timedelta(days=1)):
+        self.alert_type = alert_type
+        self.level = level
+        self.condition = condition
+        self.requires = requires
+        self.message = message
+        self.action_recommended = action_recommended
+        self.notification = notification
+        self.priority = priority
+        self.window = window
+
+    def evaluate(self, features):
+        """Devolver (activa, evaluable) como Series booleanas indexadas por usuario"""
+        known = features[list(self.requires)].notna().all(axis=1)
+        active = self.condition(features).fillna(False).astype(bool) & known
+        return active, known
+
+    def window_start(self, now):
+        """Inicio de la ventana de deduplicación que contiene a now (alineada a la época Unix)"""
+        seconds = int(self.window.total_seconds())
+        elapsed = int((now - UNIX_EPOCH).total_seconds())
+        return UNIX_EPOCH + timedelta(seconds=elapsed // seconds * seconds)
+
+
+ALERT_RULES = (
+    AlertRule(
+        'high_blood_pressure', 'high',
+        lambda f: (f.systolic > SYSTOLIC_LIMIT) | (f.diastolic > DIASTOLIC_LIMIT),
+        requires=('systolic', 'diastolic'),
+        message='Tu presión arterial está elevada. Consulta a tu médico.',
+        action_recommended='Reduce el sodio y aumenta la actividad física',
+        notification='⚠️ Presión arterial elevada detectada',
+        priority='urgent',
+        window=timedelta(days=1),
+    ),
+    AlertRule(
+        'dehydration', 'medium',
+        lambda f: (f.water_ratio < DEHYDRATION_RATIO) & (f.water_today_ratio.fillna(0) < 1),
+        requires=('water_ratio',),
+        message='En los últimos días bebiste menos de la mitad de tu meta de agua.',
+        action_recommended='Ten una botella a mano y registra cada toma',
+        notification='💧 Hidratación baja en los últimos días',
+        priority='high',
+        window=timedelta(days=3),
+    ),
+    AlertRule(
+        'sedentary', 'low',
+        lambda f: f.exercise_week < SEDENTARY_WEEKLY_MINUTES,
+        requires=('exercise_week',),
+        message=f'Hiciste menos de {SEDENTARY_WEEKLY_MINUTES} minutos de ejercicio en la última semana.',
+        action_recommended='Intenta caminar 20 minutos al día',
+        window=timedelta(days=7),
+    ),
+    AlertRule(
+        'weight_change', 'medium',
+        lambda f: f.weight_change.abs() >= WEIGHT_CHANGE_RATIO,
+        requires=('weight_change',),
+        message=f'Tu peso cambió más de un {WEIGHT_CHANGE_RATIO:.0%} en el último mes.',
+        action_recommended='Si el cambio no fue intencional, consulta a tu médico',
+        notification='⚖️ Cambio de peso importante en el último mes',
+        priority='high',
+        window=timedelta(days=30),
+    ),
+)
+
+RULES_BY_TYPE = {rule.alert_type: rule for rule in ALERT_RULES}
+
+FEATURE_COLUMNS = ('systolic', 'diastolic', 'water_ratio', 'water_today_ratio', 'exercise_week', 'weight_change')
+
+
+# ==================== INDICADORES ====================
+
+def load_health_frame(user_ids, today):
+    """Registros de salud de los últimos LOOKBACK_DAYS días de los usuarios (una consulta)"""
+    stmt = select(
+        HealthData.user_id, HealthData.date, HealthData.water_intake, HealthData.water_target,
+        HealthData.systolic_pressure, HealthData.diastolic_pressure, HealthData.weight,
+        HealthData.exercise_minutes
+    ).where(
+        HealthData.user_id.in_(user_ids),
+        HealthData.date >= today - timedelta(days=LOOKBACK_DAYS),
+        HealthData.date <= today
+    )
+    frame = pd.DataFrame(db.session.execute(stmt).all(), columns=[
+        'user_id', 'date', 'water_intake', 'water_target', 'systolic', 'diastolic', 'weight', 'exercise_minutes'
+    ])
+    frame['age'] = [(today - day).days for day in frame['date']]
+    return frame
+
+
+def compute_features(frame, user_ids):
+    """Indicadores por usuario (NaN cuando no hay datos suficientes)"""
+    features = pd.DataFrame(index=pd.Index(sorted(set(user_ids)), name='user_id'),
+                            columns=list(FEATURE_COLUMNS), dtype=float)
+    if frame.empty:
+        return features
+    frame = frame.sort_values(['user_id', 'date'])
+
+    # Última lectura de presión reciente
+    readings = frame[frame.systolic.notna() & frame.diastolic.notna() & (frame.age <= BLOOD_PRESSURE_MAX_AGE_DAYS)]
+    latest = readings.groupby('user_id')[['systolic', 'diastolic']].last()
+    features.loc[latest.index, ['systolic', 'diastolic']] = latest.values
+
+    # Hidratación: días anteriores con agua registrada y el día de hoy
+    ratio = frame.water_intake.fillna(0) / frame.water_target.where(frame.water_target > 0)
+    tracked = (frame.water_intake > 0) & ratio.notna()
+    previous = ratio[tracked & frame.age.between(1, 3)].groupby(frame.user_id).agg(['mean', 'count'])
+    previous = previous[previous['count'] >= DEHYDRATION_MIN_DAYS]
+    features.loc[previous.index, 'water_ratio'] = previous['mean'].values
+    today_ratio = ratio[frame.age == 0].groupby(frame.user_id).last()
+    features.loc[today_ratio.index, 'water_today_ratio'] = today_ratio.values
+
+    # Ejercicio de la última semana, solo si el usuario registró datos la mayoría de los días
+    week = frame[frame.age <= 6].assign(exercise=frame.exercise_minutes.fillna(0)).groupby('user_id').agg(
+        days=('date', 'count'), minutes=('exercise', 'sum')
+    )
+    week = week[week['days'] >= SEDENTARY_MIN_DAYS_LOGGED]
+    features.loc[week.index, 'exercise_week'] = week['minutes'].values
+
+    # Cambio de peso entre el primer y el último registro del periodo
+    weights = frame[frame.weight.notna()].groupby('user_id').agg(
+        first=('weight', 'first'), last=('weight', 'last'), first_age=('age', 'first'), last_age=('age', 'last')
+    )
+    weights = weights[(weights.first_age - weights.last_age >= WEIGHT_CHANGE_MIN_SPAN_DAYS) & (weights['first'] > 0)]
+    features.loc[weights.index, 'weight_change'] = ((weights['last'] - weights['first']) / weights['first']).values
+
+    return features
+
+
+# ==================== EVALUACIÓN ====================
+
+def evaluate_users(user_ids, today=None, now=None):
+    """Evaluar todas las reglas para un lote de usuarios (sin commit)
+
+    Crea las alertas nuevas con un único INSERT ... ON CONFLICT DO NOTHING sobre la clave
+    (usuario, tipo, ventana) y resuelve las abiertas que se normalizaron con un único UPDATE.
+    Devuelve {'users', 'created', 'resolved'}.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return {'users': 0, 'created': 0, 'resolved': 0}
+    today = today or date.today()
+    now = now or datetime.utcnow()
+
+    features = compute_features(load_health_frame(user_ids, today), user_ids)
+
+    open_alerts = {}
+    for alert_id, user_id, alert_type in db.session.execute(
+        select(HealthAlert.id, HealthAlert.user_id, HealthAlert.alert_type).where(
+            HealthAlert.user_id.in_(user_ids),
+            HealthAlert.resolved == False  # noqa: E712
+        )
+    ):
+        open_alerts.setdefault((user_id, alert_type), []).append(alert_id)
+
+    new_alerts, resolved_ids = [], []
+    for rule in ALERT_RULES:
+        active, known = rule.evaluate(features)
+        window_start = rule.window_start(now)
+        for user_id in features.index[active.values]:
+            if (user_id, rule.alert_type) not in open_alerts:
+                new_alerts.append({
+                    'user_id': int(user_id), 'alert_type': rule.alert_type, 'level': rule.level,
+                    'message': rule.message, 'action_recommended': rule.action_recommended,
+                    'resolved': False, 'created_at': now, 'window_start': window_start,
+                })
+        for user_id in features.index[(known & ~active).values]:
+            resolved_ids.extend(open_alerts.get((user_id, rule.alert_type), ()))
+
+    created = _create_alerts(new_alerts) if new_alerts else []
+    if resolved_ids:
+        _resolve_alerts(resolved_ids, now)
+    return {'users': len(user_ids), 'created': len(created), 'resolved': len(resolved_ids)}
+
+
+def _create_alerts(rows):
+    """Insertar las alertas que no existan ya en su ventana y notificar las creadas"""
+    stmt = insert_for_dialect(alert_table).values(rows).on_conflict_do_nothing(
+        index_elements=['user_id', 'alert_type', 'window_start']
+    ).returning(*alert_table.c)
+    created = db.session.execute(stmt).mappings().all()
+
+    for alert in created:
+        rule = RULES_BY_TYPE[alert['alert_type']]
+        if rule.notification:
+            add_notification(alert['user_id'], type='health_alert', message=rule.notification,
+                             priority=rule.priority)
+        if event_broker.has_subscribers(alert['user_id']):
+            event_broker.publish_after_commit(db.session, alert['user_id'], 'alert',
+                                              HealthAlert(**alert).to_dict())
+    return created
+
+
+def _resolve_alerts(alert_ids, now):
+    """Marcar como resueltas las alertas indicadas con un único UPDATE"""
+    rows = db.session.execute(
+        db.update(HealthAlert).where(
+            HealthAlert.id.in_(alert_ids),
+            HealthAlert.resolved == False  # noqa: E712
+        ).values(resolved=True, resolved_at=now).returning(HealthAlert.id, HealthAlert.user_id,
+                                                           HealthAlert.alert_type),
+        execution_options={'synchronize_session': False}
+    ).all()
+    for alert_id, user_id, alert_type in rows:
+        if event_broker.has_subscribers(user_id):
+            event_broker.publish_after_commit(db.session, user_id, 'alert_resolved',
+                                              {'id': alert_id, 'alert_type': alert_type})
+
+
+def evaluate_all_users(batch_size=500, today=None, report=None):
+    """Reevaluar las reglas de todos los usuarios por lotes, con commit por lote"""
+    totals = {'users': 0, 'created': 0, 'resolved': 0}
+    last_id = 0
+    while True:
+        user_ids = db.session.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).scalars().all()
+        if not user_ids:
+            return totals
+        result = evaluate_users(user_ids, today)
+        db.session.commit()
+        for key in totals:
+            totals[key] += result[key]
+        if report:
+            report(totals)
+        last_id = user_ids[-1]
+
+
+# ==================== COLA FUERA DE LA PETICIÓN ====================
+
+class AlertEngine:
+    """Encolado de usuarios a evaluar y evaluación por lotes
+
+    Con ALERTS_ASYNC las rutas agregan en su transacción un trabajo 'alerts.evaluate'
+    diferido ALERTS_BATCH_DELAY_MS, para juntar escrituras seguidas; los trabajadores de la
+    cola evalúan hasta ALERTS_MAX_BATCH usuarios por lote. Sin ALERTS_ASYNC (pruebas, CLI)
+    los usuarios marcados se evalúan al terminar cada petición.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = set()
+        self.asynchronous = True
+        self.batch_delay = 0.2
+        self.max_batch = 500
+        self.batches = 0
+        self.evaluated = 0
+        self.failures = 0
+
+    def init_app(self, app):
+        """Registrar los listeners de la sesión y el modo de evaluación"""
+        self.asynchronous = app.config['ALERTS_ASYNC']
+        self.batch_delay = app.config['ALERTS_BATCH_DELAY_MS'] / 1000
+        self.max_batch = app.config['ALERTS_MAX_BATCH']
+        job_queue.handlers['alerts.evaluate'].batch_size = self.max_batch
+
+        for name, listener in SESSION_LISTENERS:
+            if not event.contains(db.session, name, listener):
+                event.listen(db.session, name, listener)
+        if not self.asynchronous:
+            app.after_request(self._after_request)
+
+    def evaluate_after_commit(self, session, user_id):
+        """Evaluar al usuario cuando la transacción de la sesión se confirme"""
+        pending = session.info.setdefault('pending_alert_users', set())
+        if user_id in pending:
+            return
+        pending.add(user_id)
+        if self.asynchronous:
+            job_queue.enqueue('alerts.evaluate', {'user_id': user_id}, delay=self.batch_delay, session=session)
+
+    def enqueue(self, user_ids):
+        """Agregar usuarios a la cola en memoria (se evalúan una sola vez aunque se repitan)"""
+        with self._lock:
+            self._pending.update(user_ids)
+
+    def _take_batch(self):
+        with self._lock:
+            batch = sorted(self._pending)[:self.max_batch]
+            self._pending.difference_update(batch)
+            return batch
+
+    def evaluate_batch(self, user_ids):
+        """Evaluar un lote de usuarios (sin commit) y actualizar los contadores"""
+        result = evaluate_users(user_ids)
+        with self._lock:
+            self.batches += 1
+            self.evaluated += len(user_ids)
+        return result
+
+    def run_pending(self):
+        """Evaluar en el hilo actual todo lo encolado en memoria (requiere contexto de aplicación)"""
+        totals = {'users': 0, 'created': 0, 'resolved': 0}
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return totals
+            try:
+                result = self.evaluate_batch(batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.failures += 1
+                current_app.logger.exception('Falló la evaluación de alertas de %d usuarios', len(batch))
+                continue
+            for key in totals:
+                totals[key] += result[key]
+
+    def _after_request(self, response):
+        if self._pending:
+            self.run_pending()
+        return response
+
+    def stats(self):
+        """Usuarios en la cola en memoria y contadores de evaluación"""
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'batches': self.batches,
+                'evaluated': self.evaluated,
+                'failures': self.failures,
+            }
+
+
+# Instancia compartida (se configura en create_app)
+alert_engine = AlertEngine()
+
+
+@job_queue.handler('alerts.evaluate', batch_size=500)
+def evaluate_alert_jobs(payloads):
+    """Evaluar de una vez a los usuarios de un lote de trabajos (los repetidos, una sola vez)"""
+    alert_engine.evaluate_batch(sorted({payload['user_id'] for payload in payloads}))
+
+
+def _enqueue_pending(session):
+    """Pasar a la cola en memoria los usuarios marcados en la transacción confirmada"""
+    user_ids = session.info.pop('pending_alert_users', None)
+    if user_ids and not alert_engine.asynchronous:
+        alert_engine.enqueue(user_ids)
+
+
+def _discard_pending(session):
+    """Olvidar los usuarios marcados en una transacción revertida"""
+    session.info.pop('pending_alert_users', None)
+
+
+SESSION_LISTENERS = (
+    ('after_commit', _enqueue_pending),
+    ('after_rollback', _discard_pending),
+)
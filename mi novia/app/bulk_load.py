@@ -0,0 +1,213 @@
+"""
+Carga masiva de los CSV generados por data/generate_sample_data.py
+Lee cada archivo por bloques y lo inserta con executemany en una única transacción
+por tabla, con los índices no únicos diferidos y PRAGMAs de SQLite ajustados para carga.
+Esos PRAGMAs no toleran una caída a mitad de carga, por eso solo se cargan bases sin datos
+y fuera de modo WAL: si algo falla, se vuelve a crear la base y a cargar.
+"""
+
+import itertools
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from app.models import User, HealthData, Task, Notification
+
+# Orden de carga (respeta las claves foráneas): (tabla, modelo, archivo sin prefijo)
+LOAD_ORDER = (
+    ('users', User, 'users.csv'),
+    ('health_data', HealthData, 'health_data.csv'),
+    ('tasks', Task, 'tasks.csv'),
+    ('notifications', Notification, 'notifications.csv'),
+)
+
+# Los CSV de muestra no traen contraseña: un hash que nunca coincide impide iniciar sesión
+UNUSABLE_PASSWORD = '!'
+
+LOAD_DEFAULTS = {
+    'users': {'password_hash': UNUSABLE_PASSWORD},
+}
+
+# PRAGMAs de la conexión de carga (solo para bases nuevas): sin fsync, diario en memoria
+# y caché de 256 MB. Las claves foráneas se verifican: las filas huérfanas se rechazan.
+LOAD_PRAGMAS = (
+    'PRAGMA synchronous = OFF',
+    'PRAGMA journal_mode = MEMORY',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -262144',
+    'PRAGMA foreign_keys = ON',
+)
+
+# Resultado de cargar una tabla; rejected: {motivo de SQLite: filas rechazadas}
+LoadResult = namedtuple('LoadResult', 'read inserted rejected seconds')
+
+
+class LoadError(Exception):
+    """Archivo CSV incompatible con la tabla de destino o base que no admite la carga"""
+
+
+def _default_value(column):
+    """Valor por defecto de Python de una columna, listo para sqlite3"""
+    default = column.default
+    if default is None or not (default.is_scalar or default.is_callable):
+        return None
+    value = default.arg(None) if default.is_callable else default.arg
+    if isinstance(value, (datetime, date)):
+        return str(value)
+    return value
+
+
+def _extra_columns(table, header, table_name):
+    """Columnas ausentes del encabezado que se rellenan con su valor por defecto"""
+    unknown = [name for name in header if name not in table.c]
+    if unknown:
+        raise LoadError(f'{table_name}: columnas desconocidas {", ".join(unknown)}')
+
+    extra = dict(LOAD_DEFAULTS.get(table_name, {}))
+    for column in table.columns:
+        if column.name not in header and column.name not in extra and not column.primary_key:
+            value = _default_value(column)
+            if value is not None:
+                extra[column.name] = value
+    return extra
+
+
+def prepare_insert(table_name, model, header):
+    """Construir (INSERT, valores por defecto añadidos) para un encabezado de columnas"""
+    extra = _extra_columns(model.__table__, header, table_name)
+    columns = list(header) + list(extra)
+    sql = (f'INSERT INTO {table_name} ({", ".join(columns)}) '
+           f'VALUES ({", ".join("?" for _ in columns)})')
+    return sql, extra
+
+
+def frame_rows(frame, extra=None):
+    """Convertir un DataFrame en tuplas de tipos de Python para executemany
+
+    Los nulos (NaN, NaT, NA) pasan a None y las fechas con hora se escriben
+    como texto 'YYYY-MM-DD HH:MM:SS.ffffff', el formato de SQLAlchemy en SQLite.
+    """
+    columns = []
+    for name in frame.columns:
+        series = frame[name]
+        if series.dtype.kind == 'M':
+            text = np.char.replace(np.datetime_as_string(series.to_numpy(), unit='us'), 'T', ' ')
+            series = pd.Series(text, index=series.index, dtype=object).where(series.notna(), None)
+        elif series.hasnans:
+            series = series.astype(object).where(series.notna(), None)
+        columns.append(series.tolist())
+    for value in (extra or {}).values():
+        columns.append(itertools.repeat(value, len(frame)))
+    return list(zip(*columns))
+
+
+def _deferred_indexes(conn, table_name):
+    """Índices no únicos de la tabla: se eliminan antes de cargar y se recrean al final"""
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table_name,)
+    ).fetchall()
+    return [(name, sql) for name, sql in rows if not sql.upper().startswith('CREATE UNIQUE')]
+
+
+def _insert_chunk(conn, sql, rows, rejected):
+    """Insertar un bloque; si alguna fila viola una restricción, reintentar fila por fila
+
+    Devuelve las filas insertadas y suma a rejected las rechazadas por motivo.
+    """
+    conn.execute('SAVEPOINT chunk')
+    try:
+        conn.executemany(sql, rows)
+        inserted = len(rows)
+    except sqlite3.IntegrityError:
+        conn.execute('ROLLBACK TO chunk')
+        inserted = 0
+        for row in rows:
+            try:
+                conn.execute(sql, row)
+                inserted += 1
+            except sqlite3.IntegrityError as error:
+                rejected[str(error)] = rejected.get(str(error), 0) + 1
+    conn.execute('RELEASE chunk')
+    return inserted
+
+
+def load_csv_table(conn, table_name, model, path, chunk_size=50000):
+    """Cargar un CSV en su tabla; devuelve un LoadResult
+
+    Las filas que violan una restricción (NOT NULL, clave única como el mismo usuario y
+    día en health_data, clave foránea) no se insertan y se cuentan por motivo.
+    """
+    start = time.perf_counter()
+    read = inserted = 0
+    rejected = {}
+
+    # El parser de pandas en C es varias veces más rápido que csv.reader y ya entrega
+    # enteros, decimales y booleanos; solo la celda vacía se interpreta como nulo
+    try:
+        chunks = pd.read_csv(path, chunksize=chunk_size, keep_default_na=False, na_values=[''])
+        first = next(chunks)
+    except pd.errors.EmptyDataError:
+        return LoadResult(0, 0, {}, 0.0)
+    sql, extra = prepare_insert(table_name, model, list(first.columns))
+
+    deferred = _deferred_indexes(conn, table_name)
+    conn.execute('BEGIN')
+    try:
+        for name, _ in deferred:
+            conn.execute(f'DROP INDEX {name}')
+        for chunk in itertools.chain([first], chunks):
+            read += len(chunk)
+            inserted += _insert_chunk(conn, sql, frame_rows(chunk, extra), rejected)
+        for _, index_sql in deferred:
+            conn.execute(index_sql)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+    return LoadResult(read, inserted, rejected, time.perf_counter() - start)
+
+
+def check_load_target(conn):
+    """Lanzar LoadError si la base está en modo WAL o alguna tabla de destino ya tiene filas"""
+    if conn.execute('PRAGMA journal_mode').fetchone()[0].lower() == 'wal':
+        raise LoadError('La base está en modo WAL (en uso por la aplicación): '
+                        'carga los CSV en una base nueva con el perfil de almacenamiento por defecto')
+    filled = [table_name for table_name, _, _ in LOAD_ORDER
+              if conn.execute(f'SELECT 1 FROM {table_name} LIMIT 1').fetchone()]
+    if filled:
+        raise LoadError(f'Las tablas {", ".join(filled)} ya tienen datos: '
+                        f'la carga masiva solo se hace sobre una base nueva')
+
+
+def load_sample_csvs(db_path, directory, prefix='sample_', chunk_size=50000, report=print):
+    """Cargar los CSV disponibles del directorio en orden en una base vacía; devuelve {tabla: LoadResult}"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        check_load_target(conn)
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+
+        results = {}
+        for table_name, model, filename in LOAD_ORDER:
+            path = os.path.join(directory, f'{prefix}{filename}')
+            if not os.path.exists(path):
+                continue
+            result = load_csv_table(conn, table_name, model, path, chunk_size)
+            results[table_name] = result
+            rate = result.read / result.seconds if result.seconds > 0 else 0
+            report(f'{table_name}: {result.inserted}/{result.read} filas en {result.seconds:.1f}s '
+                   f'({rate:,.0f} filas/s)')
+            for reason, count in sorted(result.rejected.items(), key=lambda item: -item[1]):
+                report(f'  {count} filas rechazadas: {reason}')
+
+        conn.execute('ANALYZE')
+        return results
+    finally:
+        conn.close()
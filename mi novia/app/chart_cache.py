@@ -0,0 +1,212 @@
+"""
+Caché de gráficos renderizados para HealthDataAnalyzer
+Las claves incluyen una huella de los datos de origen, de modo que un gráfico
+solo se vuelve a renderizar cuando cambian las filas que lo alimentan.
+Nivel en memoria con desalojo LRU por tamaño y nivel opcional en disco.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def frame_fingerprint(df):
+    """Huella estable del contenido de un DataFrame"""
+    if df is None or df.empty:
+        return 'empty'
+    digest = hashlib.sha1(','.join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """Caché LRU de gráficos (cadenas base64 o SVG) limitada por bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        """Inicializar la caché; disk_dir activa el nivel en disco"""
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clave -> (user_id, valor)
+        self._bytes = 0
+        self._disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.configure(max_bytes, disk_dir, max_disk_bytes)
+
+    def configure(self, max_bytes=None, disk_dir=None, max_disk_bytes=None):
+        """Ajustar límites y directorio en disco (en cada proceso trabajador de reportes)"""
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if max_disk_bytes is not None:
+                self.max_disk_bytes = max_disk_bytes
+            self.disk_dir = disk_dir
+            self._disk_bytes = 0
+            if disk_dir:
+                os.makedirs(disk_dir, exist_ok=True)
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            self._evict_memory()
+
+    @staticmethod
+    def make_key(chart_type, user_id, days, *frames):
+        """Construir la clave (tipo, usuario, días, huella de los datos)"""
+        fingerprint = '-'.join(frame_fingerprint(df) for df in frames)
+        return (chart_type, user_id, days, fingerprint)
+
+    def get(self, key):
+        """Obtener un gráfico de la caché o None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store_memory(key, value)
+        return value
+
+    def put(self, key, value):
+        """Guardar un gráfico en memoria y, si está activo, en disco"""
+        if value is None:
+            return value
+        with self._lock:
+            self._store_memory(key, value)
+        self._write_disk(key, value)
+        return value
+
+    def clear(self):
+        """Vaciar el nivel en memoria"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Contadores de uso de la caché"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'disk_bytes': self._disk_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups * 100) if lookups > 0 else 0
+            }
+
+    # ==================== NIVEL EN MEMORIA ====================
+
+    def _store_memory(self, key, value):
+        """Insertar una entrada y desalojar las menos usadas (requiere el lock)"""
+        if len(value) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous[1])
+        self._entries[key] = (key[1], value)
+        self._bytes += len(value)
+        self._evict_memory()
+
+    def _evict_memory(self):
+        """Desalojar por LRU hasta respetar el límite de bytes (requiere el lock)"""
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, value) = self._entries.popitem(last=False)
+            self._bytes -= len(value)
+            self.evictions += 1
+
+    # ==================== NIVEL EN DISCO ====================
+
+    def _disk_path(self, key):
+        """Ruta del archivo de una clave (con el usuario como prefijo)"""
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_dir, f'{key[1]}-{digest}.chart')
+
+    def _read_disk(self, key):
+        """Leer una entrada del disco y marcarla como usada"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                value = handle.read()
+            os.utime(path)
+            return value
+        except OSError:
+            return None
+
+    def _write_disk(self, key, value):
+        """Escribir una entrada en disco de forma atómica y aplicar el límite de tamaño
+
+        El total en disco se lleva sumando lo escrito y el directorio solo se recorre al
+        superar el límite. Cada proceso suma únicamente sus escrituras (una clave que se
+        sobrescribe cuenta dos veces); el recorrido corrige el total con el tamaño real.
+        """
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        data = value.encode('utf-8')
+        try:
+            with open(tmp_path, 'wb') as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove_file(tmp_path)
+            return
+        with self._lock:
+            self._disk_bytes += len(data)
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _disk_files(self):
+        """Archivos de la caché en disco como (mtime, tamaño, ruta)"""
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.chart'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _evict_disk(self):
+        """Borrar los archivos usados hace más tiempo hasta respetar el límite en disco"""
+        files = self._disk_files()
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            self._remove_file(path)
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.evictions += evicted
+
+    @staticmethod
+    def _remove_file(path):
+        """Eliminar un archivo ignorando si ya no existe"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Caché compartida por los analizadores del proceso
+chart_cache = ChartCache()
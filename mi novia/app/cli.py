@@ -0,0 +1,326 @@
+"""
+Comandos de CLI de Life Organizer (flask <comando>)
+"""
+
+import os
+import re
+import tempfile
+import time
+from datetime import date, timedelta
+
+import click
+from sqlalchemy import event
+
+from app.models import db, User, HealthData, Task, HealthAlert, DailyStats
+from app.migrations import upgrade_database, get_schema_version
+from app.task_stats import rebuild_task_counters
+from app.notification_state import add_notification, rebuild_notification_counters
+from app.daily_stats import rebuild_daily_stats
+from app.cohort_analysis import CohortAnalyzer
+from app.bulk_load import load_sample_csvs, LoadError
+from app.storage import storage_maintenance, analytics_engine
+from app.alerts import evaluate_users, evaluate_all_users
+from app.jobs import job_queue
+
+# Rutas que se ejecutan para capturar sus consultas: (método, url, json)
+ROUTE_CALLS = [
+    ('GET', '/dashboard', None),
+    ('GET', '/health-tracker', None),
+    ('GET', '/analytics', None),
+    ('POST', '/api/health/water', {'amount': 250}),
+    ('POST', '/api/health/blood-pressure', {'systolic': 150, 'diastolic': 95}),
+    ('POST', '/api/health/weight', {'weight': 70.5}),
+    ('POST', '/api/health/meal', {'meal_type': 'lunch'}),
+    ('POST', '/api/health/exercise', {'minutes': 30, 'type': 'cardio'}),
+    ('POST', '/api/health/batch', {'readings': [
+        {'type': 'water', 'amount': 250, 'date': (date.today() - timedelta(days=1)).isoformat()},
+        {'type': 'sleep', 'hours': 7.5, 'quality': 'good'},
+    ]}),
+    ('GET', '/api/health/summary', None),
+    ('GET', '/api/tasks', None),
+    # Cursores de (2099-01-01, id 100) y de (sin fecha, id 100)
+    ('GET', '/api/tasks?cursor=MjA5OS0wMS0wMXwxMDA', None),
+    ('GET', '/api/tasks?cursor=fDEwMA', None),
+    ('GET', '/api/tasks?category=work,health', None),
+    ('GET', '/api/tasks?completed=false&priority=high', None),
+    ('GET', f'/api/tasks?due_from={(date.today() - timedelta(days=30)).isoformat()}&due_to={date.today().isoformat()}', None),
+    ('POST', '/api/tasks', {'title': 'Tarea', 'category': 'work', 'due_date': date.today().isoformat()}),
+    ('PUT', '/api/tasks/1', {'completed': True}),
+    ('DELETE', '/api/tasks/2', None),
+    ('GET', '/api/notifications', None),
+    ('GET', '/api/notifications?since=1', None),
+    ('GET', '/api/notifications/unread-count', None),
+    ('PUT', '/api/notifications/1/read', None),
+    ('PUT', '/api/notifications/read', {'ids': [1, 2]}),
+    ('PUT', '/api/notifications/read', {'all': True}),
+    ('GET', '/api/analytics/health-trends?days=30', None),
+    ('GET', '/api/analytics/health-trends?days=365&granularity=week', None),
+    ('GET', '/api/analytics/health-trends?days=365&format=columnar', None),
+    ('GET', '/api/analytics/health-trends?days=365&granularity=month&format=columnar', None),
+    ('GET', '/api/analytics/task-completion', None),
+    ('GET', '/api/export', None),
+]
+
+
+def _seed_plan_database():
+    """Crear un usuario con datos mínimos para ejercitar todas las rutas"""
+    user = User(name='Plan', email='plan@example.com')
+    user.set_password('plan')
+    db.session.add(user)
+    db.session.flush()
+
+    today = date.today()
+    for offset in range(3):
+        db.session.add(HealthData(user_id=user.id, date=today - timedelta(days=offset + 1),
+                                  water_intake=1500, weight=70.0))
+    for category in ('work', 'health'):
+        db.session.add(Task(user_id=user.id, title=category, category=category, due_date=today))
+    add_notification(user.id, type='achievement', message='Hola')
+    db.session.add(HealthAlert(user_id=user.id, alert_type='dehydration', level='low', message='Agua'))
+    db.session.commit()
+    return user.id
+
+
+# Recorridos completos de un índice cubriente aceptados a propósito: (tabla, índice)
+COVERING_SCAN_ALLOWLIST = frozenset()
+
+
+def _uses_index(detail):
+    """Indicar si una línea de EXPLAIN QUERY PLAN evita un recorrido completo
+
+    Toda búsqueda (SEARCH) pasa; un SCAN solo si es de una fila constante o de un índice
+    cubriente de COVERING_SCAN_ALLOWLIST. SCAN ... USING INDEX recorre el índice entero.
+    """
+    if not detail.startswith('SCAN '):
+        return True
+    if detail == 'SCAN CONSTANT ROW':
+        return True
+    match = re.fullmatch(r'SCAN (\S+)(?: AS \S+)? USING COVERING INDEX (\S+)', detail)
+    return match is not None and match.groups() in COVERING_SCAN_ALLOWLIST
+
+
+def check_route_query_plans():
+    """Ejecutar cada ruta contra una base temporal y verificar el plan de sus consultas
+
+    Devuelve las consultas que recorren una tabla completa como (sentencia, líneas del plan),
+    las rutas que fallaron al ejecutarse y el total de consultas verificadas.
+    """
+    from app import create_app
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'plans.db')
+        app = create_app({
+            'PROPAGATE_EXCEPTIONS': False,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'DB_AUTO_UPGRADE': True,
+            # Las reglas de alertas se evalúan al final de cada petición para capturar sus consultas
+            'ALERTS_ASYNC': False,
+            'JOBS_WORKERS': 0,
+        })
+
+        with app.app_context():
+            user_id = _seed_plan_database()
+            engine = db.engine
+            captured = {}
+            route_errors = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                verb = statement.lstrip().split(None, 1)[0].upper()
+                if verb in ('SELECT', 'UPDATE', 'DELETE') and not executemany:
+                    captured.setdefault(statement, parameters)
+
+            # Las lecturas analíticas (exportación) van por el pool de solo lectura
+            engines = {engine, analytics_engine()}
+            for listened in engines:
+                event.listen(listened, 'before_cursor_execute', capture)
+            try:
+                client = app.test_client()
+                with client.session_transaction() as sess:
+                    sess['user_id'] = user_id
+                for method, url, payload in ROUTE_CALLS:
+                    response = client.open(url, method=method, json=payload)
+                    if response.status_code >= 500:
+                        route_errors.append((method, url, response.status_code))
+
+                # Consultas de los trabajadores de la cola: tomar, terminar, recuperar y medir
+                job_queue.enqueue('alerts.evaluate', {'user_id': user_id})
+                db.session.commit()
+                job_queue.next_run_at()
+                job_queue.drain('plans')
+                job_queue.requeue_expired()
+                job_queue.purge_done()
+                job_queue.queue_depth()
+                db.session.commit()
+            finally:
+                for listened in engines:
+                    event.remove(listened, 'before_cursor_execute', capture)
+
+            failures = []
+            with engine.connect() as conn:
+                for statement, parameters in captured.items():
+                    rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+                    details = [row[3] for row in rows]
+                    if not all(_uses_index(detail) for detail in details):
+                        failures.append((statement, details))
+
+            db.session.remove()
+            for listened in engines:
+                listened.dispose()
+
+    return failures, route_errors, len(captured)
+
+
+def register_commands(app):
+    """Registrar los comandos de CLI en la aplicación"""
+
+    @app.cli.command('db-upgrade')
+    def db_upgrade():
+        """Crear las tablas que falten y aplicar las migraciones de esquema pendientes"""
+        version = upgrade_database(db.engine, db.metadata)
+        click.echo(f'Versión de esquema: {version}')
+
+    @app.cli.command('db-version')
+    def db_version():
+        """Mostrar la versión de esquema de la base de datos"""
+        with db.engine.connect() as conn:
+            click.echo(f'Versión de esquema: {get_schema_version(conn)}')
+
+    @app.cli.command('db-maintenance')
+    def db_maintenance():
+        """Ejecutar PRAGMA optimize y vaciar el WAL (checkpoint TRUNCATE)"""
+        with db.engine.connect() as conn:
+            mode = conn.exec_driver_sql('PRAGMA journal_mode').scalar()
+        busy, wal_pages, checkpointed = storage_maintenance.run(db.engine, checkpoint='TRUNCATE')
+        click.echo(f'journal_mode={mode}; checkpoint: {checkpointed}/{wal_pages} páginas'
+                   f'{" (bloqueado por otra conexión)" if busy else ""}')
+
+    @app.cli.command('rebuild-task-counters')
+    @click.option('--user-id', type=int, default=None, help='Recalcular solo este usuario')
+    def rebuild_task_counters_command(user_id):
+        """Recalcular los contadores de tareas por categoría"""
+        rebuild_task_counters(user_id)
+        db.session.commit()
+        click.echo('Contadores de tareas recalculados')
+
+    @app.cli.command('rebuild-notification-counters')
+    @click.option('--user-id', type=int, default=None, help='Recalcular solo este usuario')
+    def rebuild_notification_counters_command(user_id):
+        """Recalcular las notificaciones sin leer y la versión de cada usuario"""
+        rebuild_notification_counters(user_id)
+        db.session.commit()
+        click.echo('Contadores de notificaciones recalculados')
+
+    @app.cli.command('evaluate-alerts')
+    @click.option('--user-id', type=int, default=None, help='Evaluar solo este usuario')
+    @click.option('--batch-size', type=int, default=500, help='Usuarios por lote')
+    def evaluate_alerts(user_id, batch_size):
+        """Reevaluar las reglas de alertas de salud (crea y resuelve alertas)"""
+        start = time.perf_counter()
+        if user_id is not None:
+            totals = evaluate_users([user_id])
+            db.session.commit()
+        else:
+            totals = evaluate_all_users(batch_size)
+        click.echo(f'{totals["users"]} usuarios evaluados en {time.perf_counter() - start:.1f}s: '
+                   f'{totals["created"]} alertas creadas, {totals["resolved"]} resueltas')
+
+    @app.cli.command('worker')
+    @click.option('--threads', type=int, default=None, help='Hilos trabajadores (por defecto JOBS_WORKERS)')
+    @click.option('--once', is_flag=True, help='Procesar los trabajos disponibles y salir')
+    def worker(threads, once):
+        """Procesar la cola de trabajos diferidos en este proceso"""
+        if once:
+            processed = job_queue.drain()
+            click.echo(f'{processed} trabajos procesados: {job_queue.stats()}')
+            return
+
+        job_queue.start(threads or max(app.config['JOBS_WORKERS'], 1))
+        click.echo(f'Trabajador {job_queue.worker_prefix} en marcha con '
+                   f'{job_queue.stats()["workers"]} hilos (Ctrl+C para detener)')
+        try:
+            while job_queue.is_running():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            click.echo('Deteniendo: se termina el lote en curso')
+        finally:
+            job_queue.stop()
+        click.echo(f'Trabajador detenido: {job_queue.stats()}')
+
+    @app.cli.command('retry-failed-jobs')
+    @click.option('--name', default=None, help='Reintentar solo los trabajos de este tipo')
+    def retry_failed_jobs(name):
+        """Devolver a la cola los trabajos fallidos"""
+        count = job_queue.retry_failed(name)
+        db.session.commit()
+        click.echo(f'{count} trabajos devueltos a la cola')
+
+    @app.cli.command('backfill-daily-stats')
+    @click.option('--user-id', type=int, default=None, help='Reconstruir solo este usuario')
+    def backfill_daily_stats(user_id):
+        """Reconstruir la tabla daily_stats desde health_data y tasks"""
+        rebuild_daily_stats(user_id)
+        db.session.commit()
+        click.echo(f'Resumen diario reconstruido: {DailyStats.query.count()} filas')
+
+    @app.cli.command('load-data')
+    @click.option('--directory', type=click.Path(file_okay=False, exists=True), default='data',
+                  help='Directorio con los CSV')
+    @click.option('--prefix', default='sample_', help='Prefijo de los archivos (sample_users.csv, ...)')
+    @click.option('--chunk-size', type=int, default=50000, help='Filas por executemany')
+    def load_data(directory, prefix, chunk_size):
+        """Cargar en bloque los CSV de data/generate_sample_data.py en una base nueva (db-upgrade)"""
+        if db.engine.dialect.name != 'sqlite':
+            raise click.ClickException('load-data solo está disponible para SQLite')
+
+        # Liberar las conexiones del pool: la carga usa una conexión propia
+        db.session.remove()
+        db.engine.dispose()
+        try:
+            results = load_sample_csvs(db.engine.url.database, directory, prefix, chunk_size, click.echo)
+        except LoadError as error:
+            raise click.ClickException(str(error))
+        if not results:
+            raise click.ClickException(f'No se encontraron archivos {prefix}*.csv en {directory}')
+
+        start = time.perf_counter()
+        rebuild_task_counters()
+        rebuild_notification_counters()
+        rebuild_daily_stats()
+        db.session.commit()
+        click.echo(f'Contadores y resumen diario reconstruidos en {time.perf_counter() - start:.1f}s')
+
+        read = sum(result.read for result in results.values())
+        inserted = sum(result.inserted for result in results.values())
+        seconds = sum(result.seconds for result in results.values())
+        click.echo(f'Total: {inserted}/{read} filas insertadas en {seconds:.1f}s '
+                   f'({read / seconds if seconds else 0:,.0f} filas/s), {read - inserted} rechazadas')
+
+    @app.cli.command('cohort-report')
+    @click.option('--days', type=int, default=30, help='Días analizados')
+    @click.option('--output', type=click.Path(dir_okay=False), required=True, help='Archivo CSV de salida')
+    def cohort_report(days, output):
+        """Calcular las estadísticas de todos los usuarios en una pasada y guardarlas en CSV"""
+        results = CohortAnalyzer(engine=analytics_engine()).analyze(days=days)
+        report = results['water'].add_prefix('water_').join([
+            results['blood_pressure'].add_prefix('bp_'),
+            results['weight'].add_prefix('weight_'),
+            results['tasks'].add_prefix('tasks_')
+        ], how='outer')
+        report.index.name = 'user_id'
+        report.to_csv(output)
+        click.echo(f'Reporte de cohorte: {len(report)} usuarios -> {output}')
+
+    @app.cli.command('check-query-plans')
+    def check_query_plans():
+        """Verificar con EXPLAIN QUERY PLAN que cada consulta de las rutas usa un índice"""
+        failures, route_errors, total = check_route_query_plans()
+        for method, url, status in route_errors:
+            click.echo(f'Advertencia: {method} {url} respondió {status}', err=True)
+        for statement, details in failures:
+            click.echo('Consulta sin índice:', err=True)
+            click.echo(f'  {" ".join(statement.split())}', err=True)
+            for detail in details:
+                click.echo(f'    {detail}', err=True)
+        if failures:
+            raise SystemExit(1)
+        click.echo(f'{total} consultas verificadas, todas usan índices')
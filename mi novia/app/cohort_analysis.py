@@ -0,0 +1,262 @@
+"""
+Análisis de cohortes para Life Organizer
+Calcula las mismas estadísticas que HealthDataAnalyzer para muchos usuarios a la vez,
+con los mismos datos de origen (daily_stats) y la misma fecha de corte: una consulta
+por grupo de usuarios y agregaciones con groupby en lugar de un bucle por usuario.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from app.storage import DEFAULT_DB_PATH, read_only_engine
+
+# Columnas mínimas que necesitan las estadísticas (nombres de health_data, como HealthDataAnalyzer)
+HEALTH_COLUMNS = 'user_id, date, water_intake, water_target, systolic_pressure, diastolic_pressure, weight'
+TASK_COLUMNS = 'id, user_id, category, priority, completed'
+
+# Usuarios por grupo: ids por consulta IN (SQLite limita los parámetros por sentencia)
+# o ancho de cada rango de ids cuando se analizan todos los usuarios
+USER_ID_BATCH = 500
+
+
+class CohortAnalyzer:
+    """Estadísticas de salud y tareas de un conjunto de usuarios (o de todos)"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, engine=None):
+        """Inicializar con un motor o la ruta de la base (pool de solo lectura)"""
+        self.db_path = db_path
+        self.engine = engine if engine is not None else read_only_engine(db_path)
+
+    # ==================== CARGA ====================
+
+    def _user_batches(self, user_ids):
+        """Filtros de cada grupo de usuarios como (condición SQL, parámetros)
+
+        Con ids, grupos de USER_ID_BATCH en un IN; con None, rangos consecutivos de
+        USER_ID_BATCH ids de la tabla users. En ambos casos todas las filas de un usuario
+        caen en un mismo grupo, así que las estadísticas se pueden calcular grupo por grupo.
+        """
+        if user_ids is not None:
+            user_ids = sorted(set(user_ids))
+            batches = []
+            for start in range(0, len(user_ids), USER_ID_BATCH):
+                batch = user_ids[start:start + USER_ID_BATCH]
+                names = [f'user_{index}' for index in range(len(batch))]
+                batches.append((f"AND user_id IN ({', '.join(':' + name for name in names)})",
+                                dict(zip(names, batch))))
+            return batches
+
+        with self.engine.connect() as conn:
+            low, high = conn.execute(text('SELECT MIN(id), MAX(id) FROM users')).one()
+        if low is None:
+            return []
+        return [('AND user_id BETWEEN :user_low AND :user_high',
+                 {'user_low': start, 'user_high': start + USER_ID_BATCH - 1})
+                for start in range(low, high + 1, USER_ID_BATCH)]
+
+    def _read_frames(self, sql, batches, params):
+        """Ejecutar la consulta una vez por grupo de usuarios y devolver un DataFrame por grupo
+
+        Se lee con la conexión sqlite3 subyacente: pandas construye el DataFrame
+        directamente desde el cursor, sin pasar por las filas de SQLAlchemy. Las
+        estadísticas (medianas, varianzas, primer y último peso) necesitan todas las
+        filas de cada usuario, así que los grupos son de usuarios y no de filas.
+        """
+        raw = self.engine.raw_connection()
+        try:
+            for user_filter, batch_params in batches:
+                yield pd.read_sql_query(sql.format(user_filter=user_filter), raw.driver_connection,
+                                        params=dict(params, **batch_params))
+        finally:
+            raw.close()
+
+    def _health_frames(self, batches, days):
+        """Datos de salud por grupo, desde daily_stats con el corte de HealthDataAnalyzer"""
+        sql = f"""
+        SELECT user_id, stat_date AS date, water_intake_ml AS water_intake, water_target_ml AS water_target,
+               systolic_pressure, diastolic_pressure, weight
+        FROM daily_stats
+        WHERE stat_date >= :start_date {{user_filter}}
+        ORDER BY user_id, stat_date
+        """
+        # Fecha de corte local calculada una vez, igual que get_user_health_data
+        start_date = (date.today() - timedelta(days=days)).isoformat()
+        for frame in self._read_frames(sql, batches, {'start_date': start_date}):
+            frame = _compact(frame)
+            frame['date'] = pd.to_datetime(frame['date'], format='%Y-%m-%d')
+            yield frame
+
+    def _task_frames(self, batches, days):
+        """Tareas por grupo, con el mismo corte que get_user_tasks"""
+        sql = f"""
+        SELECT {TASK_COLUMNS} FROM tasks
+        WHERE created_at >= datetime('now', '-' || :days || ' days') {{user_filter}}
+        ORDER BY user_id, created_at
+        """
+        for frame in self._read_frames(sql, batches, {'days': days}):
+            yield _categorize(_compact(frame))
+
+    def get_health_data(self, user_ids=None, days=30):
+        """Datos de salud de los últimos N días de los usuarios indicados (None = todos)"""
+        frames = list(self._health_frames(self._user_batches(user_ids), days))
+        if not frames:
+            return pd.DataFrame(columns=[column.strip() for column in HEALTH_COLUMNS.split(',')])
+        return pd.concat(frames, ignore_index=True)
+
+    def get_tasks(self, user_ids=None, days=30):
+        """Tareas creadas en los últimos N días de los usuarios indicados (None = todos)"""
+        frames = list(self._task_frames(self._user_batches(user_ids), days))
+        if not frames:
+            return pd.DataFrame(columns=[column.strip() for column in TASK_COLUMNS.split(',')])
+        return _categorize(pd.concat(frames, ignore_index=True))
+
+    # ==================== ANÁLISIS ====================
+
+    def analyze(self, user_ids=None, days=30, health_df=None, tasks_df=None):
+        """Calcular todas las estadísticas de la cohorte
+
+        Devuelve un diccionario de DataFrames indexados por user_id (o por
+        user_id y categoría/prioridad en el desglose de tareas). Si no se reciben
+        los DataFrames, se leen y se calculan grupo por grupo de usuarios, de modo
+        que en memoria solo están las filas de un grupo a la vez.
+        """
+        if health_df is not None or tasks_df is not None:
+            if health_df is None:
+                health_df = self.get_health_data(user_ids, days)
+            if tasks_df is None:
+                tasks_df = self.get_tasks(user_ids, days)
+            return cohort_stats(health_df, tasks_df)
+
+        batches = self._user_batches(user_ids)
+        parts = [cohort_stats(health, tasks) for health, tasks
+                 in zip(self._health_frames(batches, days), self._task_frames(batches, days))]
+        if not parts:
+            return cohort_stats(self.get_health_data([], days), self.get_tasks([], days))
+        return {name: pd.concat([part[name] for part in parts if not part[name].empty] or [parts[0][name]])
+                for name in parts[0]}
+
+
+def _compact(df):
+    """Reducir la memoria de un DataFrame leído: ids como enteros de 32 bits"""
+    for column in ('id', 'user_id'):
+        if column in df.columns:
+            df[column] = df[column].astype('int32')
+    return df
+
+
+def _categorize(df):
+    """Las categorías se repiten mucho: el tipo category ahorra memoria y acelera el groupby"""
+    df['category'] = df['category'].astype('category')
+    df['priority'] = df['priority'].astype('category')
+    return df
+
+
+def cohort_stats(health_df, tasks_df):
+    """Todas las estadísticas por usuario a partir de los DataFrames de salud y tareas"""
+    return {
+        'water': water_intake_stats(health_df),
+        'blood_pressure': blood_pressure_stats(health_df),
+        'weight': weight_stats(health_df),
+        'tasks': task_overall_stats(tasks_df),
+        'tasks_by_category': task_breakdown_stats(tasks_df, 'category'),
+        'tasks_by_priority': task_breakdown_stats(tasks_df, 'priority')
+    }
+
+
+# ==================== ESTADÍSTICAS VECTORIZADAS ====================
+
+def water_intake_stats(df):
+    """Equivalente de analyze_water_intake_trends()['stats'] para cada usuario"""
+    water = df[df['water_intake'] > 0]
+    grouped = water.groupby('user_id')['water_intake']
+    stats = grouped.agg(['mean', 'median', 'max', 'min', 'std'])
+    stats.columns = ['average_daily', 'median_daily', 'max_daily', 'min_daily', 'std_daily']
+    achieved = (water['water_intake'] >= water['water_target']).groupby(water['user_id']).mean() * 100
+    stats['target_achievement_rate'] = achieved
+    return stats
+
+
+def blood_pressure_stats(df):
+    """Equivalente de analyze_blood_pressure_trends()['stats'] para cada usuario"""
+    bp = df[df['systolic_pressure'].notna() & df['diastolic_pressure'].notna()]
+    grouped = bp.groupby('user_id')
+    stats = pd.DataFrame({
+        'avg_systolic': grouped['systolic_pressure'].mean(),
+        'avg_diastolic': grouped['diastolic_pressure'].mean(),
+        'max_systolic': grouped['systolic_pressure'].max(),
+        'max_diastolic': grouped['diastolic_pressure'].max(),
+        'min_systolic': grouped['systolic_pressure'].min(),
+        'min_diastolic': grouped['diastolic_pressure'].min(),
+    })
+    high = (bp['systolic_pressure'] > 140) | (bp['diastolic_pressure'] > 90)
+    stats['high_bp_readings'] = high.groupby(bp['user_id']).sum()
+    stats['total_readings'] = grouped.size()
+    return stats
+
+
+def weight_stats(df):
+    """Equivalente de analyze_weight_trends()['stats'] para cada usuario (filas ordenadas por fecha)"""
+    weight = df[df['weight'].notna()]
+    grouped = weight.groupby('user_id')['weight']
+    stats = pd.DataFrame({
+        'current_weight': grouped.last(),
+        'starting_weight': grouped.first(),
+    })
+    stats['weight_change'] = np.where(grouped.size() > 1, stats['current_weight'] - stats['starting_weight'], 0)
+    stats['avg_weight'] = grouped.mean()
+    stats['max_weight'] = grouped.max()
+    stats['min_weight'] = grouped.min()
+    stats['weight_variance'] = grouped.var()
+    return stats
+
+
+def task_overall_stats(df):
+    """Equivalente de analyze_task_completion_patterns()['overall'] para cada usuario"""
+    completed = df['completed'].fillna(0).astype(int)
+    grouped = completed.groupby(df['user_id'])
+    stats = pd.DataFrame({
+        'total_tasks': grouped.size(),
+        'completed_tasks': grouped.sum(),
+    })
+    stats['completion_rate'] = stats['completed_tasks'] / stats['total_tasks'] * 100
+    return stats
+
+
+def task_breakdown_stats(df, column):
+    """Equivalente de by_category/by_priority, indexado por (user_id, valor)"""
+    grouped = df.groupby(['user_id', column], observed=True)
+    stats = pd.DataFrame({
+        'total': grouped['completed'].count(),
+        'completed': grouped['completed'].sum(),
+        'total_count': grouped['id'].count(),
+    })
+    stats['completion_rate'] = (stats['completed'] / stats['total'] * 100).round(1)
+    return stats
+
+
+def user_stats(results, user_id):
+    """Extraer de analyze() las estadísticas de un usuario con la forma de HealthDataAnalyzer"""
+    def row(frame):
+        if user_id not in frame.index:
+            return None
+        return frame.loc[[user_id]].to_dict('records')[0]
+
+    def breakdown(frame):
+        if user_id not in frame.index.get_level_values('user_id'):
+            return {}
+        return frame.xs(user_id, level='user_id').to_dict('index')
+
+    overall = row(results['tasks'])
+    return {
+        'water_analysis': row(results['water']),
+        'blood_pressure_analysis': row(results['blood_pressure']),
+        'weight_analysis': row(results['weight']),
+        'task_analysis': None if overall is None else {
+            'overall': overall,
+            'by_category': breakdown(results['tasks_by_category']),
+            'by_priority': breakdown(results['tasks_by_priority'])
+        }
+    }
@@ -0,0 +1,270 @@
+"""
+Resumen diario por usuario (tabla daily_stats)
+Cada escritura recalcula solo la fila del día afectado a partir de health_data y tasks,
+de modo que las tendencias no vuelven a recorrer los datos crudos.
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Float, Integer, Numeric, bindparam, cast, func, literal, select, text
+
+from app.models import db, DailyStats
+
+STATS_COLUMNS = (
+    'user_id, stat_date, tasks_completed, tasks_total, water_intake_ml, water_target_ml, exercise_minutes, '
+    'meals_completed, health_score, weight, systolic_pressure, diastolic_pressure, '
+    'created_at, updated_at'
+)
+
+# CASE en lugar de sumar booleanos: PostgreSQL no convierte boolean a entero
+MEALS_EXPRESSION = (
+    'CASE WHEN h.breakfast_completed THEN 1 ELSE 0 END'
+    ' + CASE WHEN h.lunch_completed THEN 1 ELSE 0 END'
+    ' + CASE WHEN h.dinner_completed THEN 1 ELSE 0 END'
+)
+
+# Puntuación 0-100: hidratación respecto a la meta (40), comidas (30) y 30 minutos de ejercicio (30)
+HEALTH_SCORE_EXPRESSION = """
+    CAST(ROUND(
+        {least}(COALESCE(h.water_intake, 0) * 1.0 / {greatest}(COALESCE(h.water_target, 2000), 1), 1) * 40
+        + ({meals}) / 3.0 * 30
+        + {least}(COALESCE(h.exercise_minutes, 0) / 30.0, 1) * 30
+    ) AS INTEGER)
+"""
+
+# WHERE true es necesario para que SQLite no confunda ON CONFLICT con un JOIN
+STATS_UPSERT = """
+    INSERT INTO daily_stats ({columns})
+    SELECT k.user_id, k.day,
+           COALESCE(t.completed, 0), COALESCE(t.total, 0),
+           COALESCE(h.water_intake, 0), h.water_target, COALESCE(h.exercise_minutes, 0),
+           {meals}, {score},
+           h.weight, h.systolic_pressure, h.diastolic_pressure,
+           :now, :now
+    FROM ({keys}) AS k
+    LEFT JOIN health_data AS h ON h.user_id = k.user_id AND h.date = k.day
+    LEFT JOIN (
+        SELECT user_id, due_date, COUNT(*) AS total,
+               SUM(CASE WHEN completed THEN 1 ELSE 0 END) AS completed
+        FROM tasks
+        WHERE {task_filter}
+        GROUP BY user_id, due_date
+    ) AS t ON t.user_id = k.user_id AND t.due_date = k.day
+    WHERE true
+    ON CONFLICT (user_id, stat_date) DO UPDATE SET
+        tasks_completed = excluded.tasks_completed,
+        tasks_total = excluded.tasks_total,
+        water_intake_ml = excluded.water_intake_ml,
+        water_target_ml = excluded.water_target_ml,
+        exercise_minutes = excluded.exercise_minutes,
+        meals_completed = excluded.meals_completed,
+        health_score = excluded.health_score,
+        weight = excluded.weight,
+        systolic_pressure = excluded.systolic_pressure,
+        diastolic_pressure = excluded.diastolic_pressure,
+        updated_at = excluded.updated_at
+"""
+
+
+def upsert_statement(dialect_name, keys, task_filter):
+    """Armar el INSERT ... SELECT ... ON CONFLICT de daily_stats para el dialecto indicado"""
+    # SQLite usa MIN/MAX con varios argumentos; PostgreSQL, LEAST/GREATEST
+    least, greatest = ('MIN', 'MAX') if dialect_name == 'sqlite' else ('LEAST', 'GREATEST')
+    score = HEALTH_SCORE_EXPRESSION.format(least=least, greatest=greatest, meals=MEALS_EXPRESSION)
+    return text(STATS_UPSERT.format(
+        columns=STATS_COLUMNS,
+        meals=MEALS_EXPRESSION,
+        score=score,
+        keys=keys,
+        task_filter=task_filter,
+    ))
+
+
+_refresh_statements = {}
+
+
+def _refresh_statement(dialect_name):
+    """Sentencia que recalcula un día de un usuario (compilada una vez por dialecto)"""
+    statement = _refresh_statements.get(dialect_name)
+    if statement is None:
+        statement = _refresh_statements[dialect_name] = upsert_statement(
+            dialect_name,
+            keys='SELECT :user_id AS user_id, :day AS day',
+            task_filter='user_id = :user_id AND due_date = :day',
+        ).bindparams(bindparam('day', type_=Date), bindparam('now', type_=DateTime))
+    return statement
+
+
+def backfill_statement(dialect_name='sqlite', user_id=None):
+    """Construir el INSERT ... SELECT que reconstruye todos los días (de uno o todos los usuarios)"""
+    user_filter = ' AND user_id = :user_id' if user_id is not None else ''
+    keys = (
+        f'SELECT user_id, date AS day FROM health_data WHERE 1 = 1{user_filter} '
+        f'UNION SELECT user_id, due_date FROM tasks WHERE due_date IS NOT NULL{user_filter}'
+    )
+    return upsert_statement(
+        dialect_name,
+        keys=keys,
+        task_filter=f'due_date IS NOT NULL{user_filter}',
+    ).bindparams(bindparam('now', type_=DateTime))
+
+
+def refresh_daily_stats(user_id, days):
+    """Recalcular las filas de daily_stats de los días indicados (sin commit)"""
+    days = [day for day in set(days) if day is not None]
+    if not days:
+        return
+
+    # Las tareas pendientes en la sesión deben estar en la base antes de agregarlas
+    db.session.flush()
+    now = datetime.utcnow()
+    db.session.execute(_refresh_statement(db.engine.dialect.name), [
+        {'user_id': user_id, 'day': day, 'now': now} for day in days
+    ])
+
+
+def rebuild_daily_stats(user_id=None):
+    """Reconstruir daily_stats desde cero para uno o todos los usuarios (sin commit)"""
+    delete = DailyStats.query
+    if user_id is not None:
+        delete = delete.filter_by(user_id=user_id)
+    delete.delete(synchronize_session=False)
+
+    params = {'now': datetime.utcnow()}
+    if user_id is not None:
+        params['user_id'] = user_id
+    db.session.execute(backfill_statement(db.engine.dialect.name, user_id), params)
+
+
+# ==================== PERIODOS ====================
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def period_start(column, granularity, dialect_name):
+    """Expresión SQL con el inicio del periodo de una fecha: lunes de su semana ISO o día 1 del mes
+
+    Agrupar por el lunes mantiene juntos los días de una semana que cruza el Año Nuevo.
+    """
+    if dialect_name == 'postgresql':
+        return cast(func.date_trunc(granularity, column), Date)
+    if granularity == 'week':
+        # 'weekday 0' avanza hasta el domingo de la semana (o se queda en él); seis días antes es el lunes
+        return func.date(column, 'weekday 0', '-6 days')
+    return func.date(column, 'start of month')
+
+
+def _round_average(column, digits=0):
+    """Promedio redondeado (PostgreSQL solo redondea a decimales sobre NUMERIC)"""
+    return func.round(cast(func.avg(column), Numeric), digits, type_=Float)
+
+
+def get_daily_stats_trends(user_id, start_date, granularity='day'):
+    """Tendencias de salud leídas de daily_stats, por día o agregadas por semana ISO/mes
+
+    En los periodos agregados la fecha es el primer día con datos, agua, peso y
+    presión son promedios diarios y el ejercicio es el total de minutos.
+    """
+    filters = (DailyStats.user_id == user_id, DailyStats.stat_date >= start_date)
+
+    if granularity == 'day':
+        rows = db.session.query(
+            DailyStats.stat_date,
+            DailyStats.water_intake_ml,
+            DailyStats.weight,
+            DailyStats.systolic_pressure,
+            DailyStats.diastolic_pressure,
+            DailyStats.exercise_minutes
+        ).filter(*filters).order_by(DailyStats.stat_date).all()
+    else:
+        period = period_start(DailyStats.stat_date, granularity, db.engine.dialect.name)
+        rows = db.session.query(
+            func.min(DailyStats.stat_date),
+            _round_average(func.nullif(DailyStats.water_intake_ml, 0)),
+            _round_average(DailyStats.weight, 1),
+            _round_average(DailyStats.systolic_pressure),
+            _round_average(DailyStats.diastolic_pressure),
+            func.sum(DailyStats.exercise_minutes)
+        ).filter(*filters).group_by(period).order_by(period).all()
+        rows = [
+            (
+                datetime.strptime(row[0], '%Y-%m-%d').date() if isinstance(row[0], str) else row[0],
+                _as_int(row[1]), row[2], _as_int(row[3]), _as_int(row[4]), row[5]
+            )
+            for row in rows
+        ]
+
+    return {
+        'water_intake': [{'date': day.isoformat(), 'value': water} for day, water, _, _, _, _ in rows if water],
+        'weight': [{'date': day.isoformat(), 'value': weight} for day, _, weight, _, _, _ in rows if weight],
+        'blood_pressure': [
+            {'date': day.isoformat(), 'systolic': systolic, 'diastolic': diastolic}
+            for day, _, _, systolic, diastolic, _ in rows if systolic and diastolic
+        ],
+        'exercise': [{'date': day.isoformat(), 'minutes': minutes} for day, _, _, _, _, minutes in rows if minutes]
+    }
+
+
+def _as_int(value):
+    """Convertir un promedio redondeado a entero conservando None"""
+    return int(value) if value is not None else None
+
+
+# ==================== RESPUESTA COLUMNAR ====================
+
+stats_table = DailyStats.__table__
+
+# Días desde 1970-01-01 (julianday de la época Unix es 2440587.5)
+UNIX_EPOCH = date(1970, 1, 1)
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+COLUMNAR_SERIES = ('water', 'weight', 'systolic', 'diastolic', 'exercise')
+
+
+def _epoch_day(column, dialect_name):
+    """Expresión SQL que convierte una fecha en días desde la época Unix"""
+    if dialect_name == 'postgresql':
+        # En PostgreSQL la resta de dos fechas ya es un número entero de días
+        return cast(column - literal(UNIX_EPOCH, Date), Integer)
+    return cast(func.julianday(column) - UNIX_EPOCH_JULIAN_DAY, Integer)
+
+
+def get_daily_stats_columns(user_id, start_date, granularity='day'):
+    """Tendencias de salud en formato columnar desde una única consulta proyectada
+
+    Devuelve {'dates': [días desde 1970-01-01], 'water': [...], ...} con una
+    posición por día (o periodo) y None donde no hay lectura. Las filas se leen
+    como tuplas, sin construir objetos del ORM.
+    """
+    table = stats_table
+    dialect_name = db.engine.dialect.name
+    water = func.nullif(table.c.water_intake_ml, 0)
+    exercise = func.nullif(table.c.exercise_minutes, 0)
+
+    if granularity == 'day':
+        query = select(
+            _epoch_day(table.c.stat_date, dialect_name),
+            water,
+            table.c.weight,
+            table.c.systolic_pressure,
+            table.c.diastolic_pressure,
+            exercise
+        ).order_by(table.c.stat_date)
+    else:
+        period = period_start(table.c.stat_date, granularity, dialect_name)
+        query = select(
+            _epoch_day(func.min(table.c.stat_date), dialect_name),
+            cast(_round_average(water), Integer),
+            _round_average(table.c.weight, 1),
+            cast(_round_average(table.c.systolic_pressure), Integer),
+            cast(_round_average(table.c.diastolic_pressure), Integer),
+            func.sum(exercise)
+        ).group_by(period).order_by(period)
+
+    query = query.where(table.c.user_id == user_id, table.c.stat_date >= start_date)
+    rows = db.session.execute(query).all()
+
+    columns = [list(column) for column in zip(*rows)] or [[] for _ in range(len(COLUMNAR_SERIES) + 1)]
+    result = {'granularity': granularity, 'dates': columns[0]}
+    result.update(zip(COLUMNAR_SERIES, columns[1:]))
+    return result
@@ -4,43 +4,64 @@ Incluye análisis estadísticos y visualizaciones de datos de salud
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 from datetime import datetime, date, timedelta
-from sqlalchemy import create_engine, text
-import os
 from io import BytesIO
 import base64
 
-# Configuración de matplotlib para mejor calidad
-try:
-    plt.style.use('seaborn-v0_8')
-except OSError:
-    try:
-        plt.style.use('seaborn-v0_8-darkgrid')
-    except OSError:
-        plt.style.use('seaborn-darkgrid')
-sns.set_palette("husl")
+from app import svg_charts
+from app.chart_cache import chart_cache
+from app.storage import DEFAULT_DB_PATH, read_only_engine
+
+_pyplot_module = None
+
+def _pyplot():
+    """Importar matplotlib.pyplot y seaborn al renderizar el primer PNG (SVG y análisis no los cargan)"""
+    global _pyplot_module
+    if _pyplot_module is None:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
+        # Configuración de matplotlib para mejor calidad
+        try:
+            plt.style.use('seaborn-v0_8')
+        except OSError:
+            try:
+                plt.style.use('seaborn-v0_8-darkgrid')
+            except OSError:
+                plt.style.use('seaborn-darkgrid')
+        sns.set_palette("husl")
+        _pyplot_module = plt
+    return _pyplot_module
 
 class HealthDataAnalyzer:
     """Clase para análisis de datos de salud"""
     
-    def __init__(self, db_path='life_organizer.db'):
-        """Inicializar con conexión a base de datos"""
+    def __init__(self, db_path=DEFAULT_DB_PATH, cache=chart_cache, engine=None):
+        """Inicializar con un motor (p. ej. analytics_engine()) o la ruta de la base, y caché de gráficos
+
+        Sin engine se usa el pool de solo lectura compartido por los analizadores de
+        la misma base; cache=None desactiva la caché de gráficos.
+        """
         self.db_path = db_path
-        self.engine = create_engine(f'sqlite:///{db_path}')
+        self.engine = engine if engine is not None else read_only_engine(db_path)
+        self.chart_cache = cache
         
     def get_user_health_data(self, user_id, days=30):
-        """Obtener datos de salud de un usuario"""
+        """Obtener datos de salud de un usuario desde el resumen diario (daily_stats)"""
+        # Mismos nombres de columna que health_data para los análisis y gráficos
         query = """
-        SELECT * FROM health_data 
+        SELECT stat_date AS date, water_intake_ml AS water_intake, water_target_ml AS water_target,
+               systolic_pressure, diastolic_pressure, weight, exercise_minutes,
+               meals_completed, health_score
+        FROM daily_stats 
         WHERE user_id = :user_id 
-        AND date >= date('now', '-' || :days || ' days')
-        ORDER BY date
+        AND stat_date >= :start_date
+        ORDER BY stat_date
         """
         
-        df = pd.read_sql_query(query, self.engine, params={'user_id': user_id, 'days': days})
+        start_date = (date.today() - timedelta(days=days)).isoformat()
+        df = pd.read_sql_query(query, self.engine, params={'user_id': user_id, 'start_date': start_date})
         if not df.empty:
             df['date'] = pd.to_datetime(df['date'])
         return df
@@ -60,9 +81,21 @@ class HealthDataAnalyzer:
             df['due_date'] = pd.to_datetime(df['due_date'])
         return df
     
-    def analyze_water_intake_trends(self, user_id, days=30):
+    def _health_frame(self, user_id, days, health_df=None):
+        """Usar el DataFrame de salud ya cargado o consultarlo si no se recibió"""
+        if health_df is not None:
+            return health_df
+        return self.get_user_health_data(user_id, days)
+    
+    def _tasks_frame(self, user_id, days, tasks_df=None):
+        """Usar el DataFrame de tareas ya cargado o consultarlo si no se recibió"""
+        if tasks_df is not None:
+            return tasks_df
+        return self.get_user_tasks(user_id, days)
+    
+    def analyze_water_intake_trends(self, user_id, days=30, health_df=None):
         """Analizar tendencias de consumo de agua"""
-        df = self.get_user_health_data(user_id, days)
+        df = self._health_frame(user_id, days, health_df)
         
         if df.empty:
             return None
@@ -88,9 +121,9 @@ class HealthDataAnalyzer:
             'stats': stats
         }
     
-    def analyze_blood_pressure_trends(self, user_id, days=30):
+    def analyze_blood_pressure_trends(self, user_id, days=30, health_df=None):
         """Analizar tendencias de presión arterial"""
-        df = self.get_user_health_data(user_id, days)
+        df = self._health_frame(user_id, days, health_df)
         
         if df.empty:
             return None
@@ -118,9 +151,9 @@ class HealthDataAnalyzer:
             'stats': stats
         }
     
-    def analyze_weight_trends(self, user_id, days=30):
+    def analyze_weight_trends(self, user_id, days=30, health_df=None):
         """Analizar tendencias de peso"""
-        df = self.get_user_health_data(user_id, days)
+        df = self._health_frame(user_id, days, health_df)
         
         if df.empty:
             return None
@@ -149,9 +182,9 @@ class HealthDataAnalyzer:
             'stats': stats
         }
     
-    def analyze_task_completion_patterns(self, user_id, days=30):
+    def analyze_task_completion_patterns(self, user_id, days=30, tasks_df=None):
         """Analizar patrones de completación de tareas"""
-        df = self.get_user_tasks(user_id, days)
+        df = self._tasks_frame(user_id, days, tasks_df)
         
         if df.empty:
             return None
@@ -189,21 +222,34 @@ class HealthDataAnalyzer:
             'by_priority': priority_stats.to_dict('index')
         }
     
-    def create_water_intake_chart(self, user_id, days=30):
+    def create_water_intake_chart(self, user_id, days=30, health_df=None, fmt='png'):
         """Crear gráfico de consumo de agua"""
-        df = self.get_user_health_data(user_id, days)
+        df = self._health_frame(user_id, days, health_df)
+        
+        cache_key = self._chart_cache_key(f'water_intake.{fmt}', user_id, days, df)
+        cached = self._cached_chart(cache_key)
+        if cached is not None:
+            return cached
         
         if df.empty or df['water_intake'].sum() == 0:
             return None
         
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
         # Filtrar datos con consumo de agua
         water_data = df[df['water_intake'] > 0].copy()
         
         if water_data.empty:
             return None
         
+        if fmt == 'svg':
+            target = water_data['water_target'].iloc[0] if 'water_target' in water_data.columns else None
+            chart = svg_charts.water_intake_chart(water_data['date'].dt.date.tolist(),
+                                                  water_data['water_intake'].tolist(), target)
+            return self._store_chart(cache_key, chart.to_svg())
+        
+        plt = _pyplot()
+        
+        fig, ax = plt.subplots(figsize=(12, 6))
+        
         # Crear gráfico de barras
         ax.bar(water_data['date'], water_data['water_intake'], 
                alpha=0.7, color='skyblue', label='Consumo diario')
@@ -223,11 +269,16 @@ class HealthDataAnalyzer:
         plt.xticks(rotation=45)
         plt.tight_layout()
         
-        return self._fig_to_base64(fig)
+        return self._store_chart(cache_key, self._fig_to_base64(fig))
     
-    def create_blood_pressure_chart(self, user_id, days=30):
+    def create_blood_pressure_chart(self, user_id, days=30, health_df=None, fmt='png'):
         """Crear gráfico de presión arterial"""
-        df = self.get_user_health_data(user_id, days)
+        df = self._health_frame(user_id, days, health_df)
+        
+        cache_key = self._chart_cache_key(f'blood_pressure.{fmt}', user_id, days, df)
+        cached = self._cached_chart(cache_key)
+        if cached is not None:
+            return cached
         
         if df.empty:
             return None
@@ -238,6 +289,14 @@ class HealthDataAnalyzer:
         if bp_data.empty:
             return None
         
+        if fmt == 'svg':
+            chart = svg_charts.blood_pressure_chart(bp_data['date'].dt.date.tolist(),
+                                                    bp_data['systolic_pressure'].tolist(),
+                                                    bp_data['diastolic_pressure'].tolist())
+            return self._store_chart(cache_key, chart.to_svg())
+        
+        plt = _pyplot()
+        
         fig, ax = plt.subplots(figsize=(12, 6))
         
         # Gráfico de líneas para presión sistólica y diastólica
@@ -259,11 +318,16 @@ class HealthDataAnalyzer:
         plt.xticks(rotation=45)
         plt.tight_layout()
         
-        return self._fig_to_base64(fig)
+        return self._store_chart(cache_key, self._fig_to_base64(fig))
     
-    def create_weight_trend_chart(self, user_id, days=30):
+    def create_weight_trend_chart(self, user_id, days=30, health_df=None, fmt='png'):
         """Crear gráfico de tendencia de peso"""
-        df = self.get_user_health_data(user_id, days)
+        df = self._health_frame(user_id, days, health_df)
+        
+        cache_key = self._chart_cache_key(f'weight_trend.{fmt}', user_id, days, df)
+        cached = self._cached_chart(cache_key)
+        if cached is not None:
+            return cached
         
         if df.empty:
             return None
@@ -274,6 +338,17 @@ class HealthDataAnalyzer:
         if weight_data.empty:
             return None
         
+        if fmt == 'svg':
+            trend = None
+            if len(weight_data) > 1:
+                z = np.polyfit(range(len(weight_data)), weight_data['weight'], 1)
+                trend = np.poly1d(z)(range(len(weight_data))).tolist()
+            chart = svg_charts.weight_trend_chart(weight_data['date'].dt.date.tolist(),
+                                                  weight_data['weight'].tolist(), trend)
+            return self._store_chart(cache_key, chart.to_svg())
+        
+        plt = _pyplot()
+        
         fig, ax = plt.subplots(figsize=(12, 6))
         
         # Gráfico de línea para peso
@@ -296,21 +371,44 @@ class HealthDataAnalyzer:
         plt.xticks(rotation=45)
         plt.tight_layout()
         
-        return self._fig_to_base64(fig)
+        return self._store_chart(cache_key, self._fig_to_base64(fig))
     
-    def create_task_completion_chart(self, user_id, days=30):
+    def create_task_completion_chart(self, user_id, days=30, tasks_df=None, fmt='png'):
         """Crear gráfico de completación de tareas"""
-        df = self.get_user_tasks(user_id, days)
+        df = self._tasks_frame(user_id, days, tasks_df)
+        
+        cache_key = self._chart_cache_key(f'task_completion.{fmt}', user_id, days, df)
+        cached = self._cached_chart(cache_key)
+        if cached is not None:
+            return cached
         
         if df.empty:
             return None
         
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-        
-        # Gráfico de completación por categoría
+        # Completación por categoría y por prioridad
         category_completion = df.groupby('category')['completed'].agg(['count', 'sum']).reset_index()
         category_completion['completion_rate'] = (category_completion['sum'] / category_completion['count'] * 100)
+        priority_completion = df.groupby('priority')['completed'].agg(['count', 'sum']).reset_index()
+        priority_completion['completion_rate'] = (priority_completion['sum'] / priority_completion['count'] * 100)
+        
+        if fmt == 'svg':
+            svg = svg_charts.grid([
+                svg_charts.completion_chart(category_completion['category'].tolist(),
+                                            category_completion['completion_rate'].tolist(),
+                                            'Tasa de Completación por Categoría',
+                                            ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']),
+                svg_charts.completion_chart(priority_completion['priority'].tolist(),
+                                            priority_completion['completion_rate'].tolist(),
+                                            'Tasa de Completación por Prioridad',
+                                            ['#FF9999', '#66B2FF', '#99FF99'])
+            ])
+            return self._store_chart(cache_key, svg)
+        
+        plt = _pyplot()
+        
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
         
+        # Gráfico de completación por categoría
         bars1 = ax1.bar(category_completion['category'], category_completion['completion_rate'], 
                        color=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7'])
         ax1.set_title('Tasa de Completación por Categoría', fontweight='bold')
@@ -324,9 +422,6 @@ class HealthDataAnalyzer:
                     f'{height:.1f}%', ha='center', va='bottom')
         
         # Gráfico de completación por prioridad
-        priority_completion = df.groupby('priority')['completed'].agg(['count', 'sum']).reset_index()
-        priority_completion['completion_rate'] = (priority_completion['sum'] / priority_completion['count'] * 100)
-        
         bars2 = ax2.bar(priority_completion['priority'], priority_completion['completion_rate'],
                        color=['#FF9999', '#66B2FF', '#99FF99'])
         ax2.set_title('Tasa de Completación por Prioridad', fontweight='bold')
@@ -341,14 +436,26 @@ class HealthDataAnalyzer:
         
         plt.tight_layout()
         
-        return self._fig_to_base64(fig)
+        return self._store_chart(cache_key, self._fig_to_base64(fig))
     
-    def create_health_summary_dashboard(self, user_id, days=30):
+    def create_health_summary_dashboard(self, user_id, days=30, health_df=None, tasks_df=None, fmt='png'):
         """Crear dashboard completo de salud"""
+        water_data = self._health_frame(user_id, days, health_df)
+        task_data = self._tasks_frame(user_id, days, tasks_df)
+        
+        cache_key = self._chart_cache_key(f'dashboard.{fmt}', user_id, days, water_data, task_data)
+        cached = self._cached_chart(cache_key)
+        if cached is not None:
+            return cached
+        
+        if fmt == 'svg':
+            return self._store_chart(cache_key, self._svg_dashboard(days, water_data, task_data))
+        
+        plt = _pyplot()
+        
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
         
         # 1. Consumo de agua
-        water_data = self.get_user_health_data(user_id, days)
         if not water_data.empty and water_data['water_intake'].sum() > 0:
             water_daily = water_data[water_data['water_intake'] > 0]
             ax1.bar(water_daily['date'], water_daily['water_intake'], alpha=0.7, color='skyblue')
@@ -379,7 +486,6 @@ class HealthDataAnalyzer:
             ax3.tick_params(axis='x', rotation=45)
         
         # 4. Completación de tareas
-        task_data = self.get_user_tasks(user_id, days)
         if not task_data.empty:
             daily_completion = task_data.groupby(task_data['created_at'].dt.date)['completed'].mean() * 100
             ax4.plot(daily_completion.index, daily_completion.values, marker='o', linewidth=2, color='green')
@@ -390,29 +496,81 @@ class HealthDataAnalyzer:
         plt.suptitle(f'Dashboard de Salud - Últimos {days} días', fontsize=16, fontweight='bold')
         plt.tight_layout()
         
-        return self._fig_to_base64(fig)
+        return self._store_chart(cache_key, self._fig_to_base64(fig))
     
-    def generate_health_report(self, user_id, days=30):
-        """Generar reporte completo de salud"""
+    def generate_health_report(self, user_id, days=30, fmt='png'):
+        """Generar reporte completo de salud (gráficos en PNG base64 o en SVG)"""
+        # Una sola consulta de salud y una de tareas para todo el reporte
+        health_df = self.get_user_health_data(user_id, days)
+        tasks_df = self.get_user_tasks(user_id, days)
+        
         report = {
             'user_id': user_id,
             'period_days': days,
             'generated_at': datetime.now().isoformat(),
-            'water_analysis': self.analyze_water_intake_trends(user_id, days),
-            'blood_pressure_analysis': self.analyze_blood_pressure_trends(user_id, days),
-            'weight_analysis': self.analyze_weight_trends(user_id, days),
-            'task_analysis': self.analyze_task_completion_patterns(user_id, days),
+            'water_analysis': self.analyze_water_intake_trends(user_id, days, health_df),
+            'blood_pressure_analysis': self.analyze_blood_pressure_trends(user_id, days, health_df),
+            'weight_analysis': self.analyze_weight_trends(user_id, days, health_df),
+            'task_analysis': self.analyze_task_completion_patterns(user_id, days, tasks_df),
             'charts': {
-                'water_intake': self.create_water_intake_chart(user_id, days),
-                'blood_pressure': self.create_blood_pressure_chart(user_id, days),
-                'weight_trend': self.create_weight_trend_chart(user_id, days),
-                'task_completion': self.create_task_completion_chart(user_id, days),
-                'dashboard': self.create_health_summary_dashboard(user_id, days)
+                'water_intake': self.create_water_intake_chart(user_id, days, health_df, fmt),
+                'blood_pressure': self.create_blood_pressure_chart(user_id, days, health_df, fmt),
+                'weight_trend': self.create_weight_trend_chart(user_id, days, health_df, fmt),
+                'task_completion': self.create_task_completion_chart(user_id, days, tasks_df, fmt),
+                'dashboard': self.create_health_summary_dashboard(user_id, days, health_df, tasks_df, fmt)
             }
         }
         
         return report
     
+    def _svg_dashboard(self, days, water_data, task_data):
+        """Dashboard de cuatro paneles renderizado como SVG"""
+        panels = []
+        size = {'width': 520, 'height': 300}
+        
+        if not water_data.empty and water_data['water_intake'].sum() > 0:
+            water_daily = water_data[water_data['water_intake'] > 0]
+            target = water_daily['water_target'].iloc[0] if 'water_target' in water_daily.columns else None
+            panels.append(svg_charts.water_intake_chart(water_daily['date'].dt.date.tolist(),
+                                                        water_daily['water_intake'].tolist(), target, **size))
+        
+        bp_data = water_data[(water_data['systolic_pressure'].notna()) & (water_data['diastolic_pressure'].notna())]
+        if not bp_data.empty:
+            panels.append(svg_charts.blood_pressure_chart(bp_data['date'].dt.date.tolist(),
+                                                          bp_data['systolic_pressure'].tolist(),
+                                                          bp_data['diastolic_pressure'].tolist(), **size))
+        
+        weight_data = water_data[water_data['weight'].notna()]
+        if not weight_data.empty:
+            panels.append(svg_charts.weight_trend_chart(weight_data['date'].dt.date.tolist(),
+                                                        weight_data['weight'].tolist(), **size))
+        
+        if not task_data.empty:
+            daily_completion = task_data.groupby(task_data['created_at'].dt.date)['completed'].mean() * 100
+            chart = svg_charts.SvgChart(daily_completion.index.tolist(), title='Completación Diaria de Tareas',
+                                        y_label='Porcentaje', y_range=(0, 100), **size)
+            panels.append(chart.line(daily_completion.tolist(), '#2ca02c'))
+        
+        return svg_charts.grid(panels, columns=2, title=f'Dashboard de Salud - Últimos {days} días')
+    
+    def _chart_cache_key(self, chart_type, user_id, days, *frames):
+        """Clave de caché del gráfico según sus datos de origen"""
+        if self.chart_cache is None:
+            return None
+        return self.chart_cache.make_key(chart_type, user_id, days, *frames)
+    
+    def _cached_chart(self, cache_key):
+        """Obtener un gráfico ya renderizado con los mismos datos"""
+        if cache_key is None:
+            return None
+        return self.chart_cache.get(cache_key)
+    
+    def _store_chart(self, cache_key, chart):
+        """Guardar el gráfico renderizado en la caché y devolverlo"""
+        if cache_key is not None:
+            self.chart_cache.put(cache_key, chart)
+        return chart
+    
     def _fig_to_base64(self, fig):
         """Convertir figura de matplotlib a base64 para mostrar en web"""
         if fig is None:
@@ -422,7 +580,7 @@ class HealthDataAnalyzer:
         fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
         buffer.seek(0)
         image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close(fig)
+        _pyplot().close(fig)
         
         return f"data:image/png;base64,{image_base64}"
 
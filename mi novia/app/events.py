@@ -0,0 +1,219 @@
+"""
+Eventos en vivo para el dashboard (Server-Sent Events)
+Pub/sub en memoria del proceso: las rutas de escritura encolan eventos en la sesión de
+SQLAlchemy y se publican solo si la transacción se confirma. Cada usuario conserva un
+historial corto para reanudar con Last-Event-ID; la cantidad de streams por proceso está acotada.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+
+from app.models import Notification, HealthAlert
+
+
+class StreamLimitError(Exception):
+    """Se alcanzó el máximo de streams abiertos del proceso o del usuario"""
+
+
+class Subscription:
+    """Conexión SSE de un usuario: cola acotada de eventos pendientes de enviar"""
+
+    def __init__(self, broker, user_id, max_queue):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+        self.closed = False
+        self.cursor = None  # último id publicado al abrir el stream
+
+    def offer(self, item):
+        """Encolar sin bloquear; si el cliente no da abasto se marca para reconectar"""
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.overflowed = True
+
+    def close(self):
+        """Liberar el lugar del stream (idempotente)"""
+        self.broker._unsubscribe(self)
+
+
+class EventBroker:
+    """Pub/sub por usuario con historial para reanudar y límites de streams"""
+
+    def __init__(self, max_streams=50, max_streams_per_user=5, history_size=100, max_queue=100):
+        """Inicializar el broker vacío"""
+        self._lock = threading.Lock()
+        self._subscribers = {}  # user_id -> set de Subscription
+        self._history = {}      # user_id -> deque de (id, tipo, datos JSON)
+        self._evicted = {}      # user_id -> id del último evento descartado del historial
+        # Los ids parten de la hora de inicio, así siguen creciendo tras reiniciar el proceso
+        self._start_id = int(time.time() * 1000)
+        self._last_id = self._start_id
+        self.configure(max_streams, max_streams_per_user, history_size, max_queue)
+
+    def configure(self, max_streams=None, max_streams_per_user=None, history_size=None, max_queue=None):
+        """Ajustar los límites (se usa desde create_app)"""
+        with self._lock:
+            if max_streams is not None:
+                self.max_streams = max_streams
+            if max_streams_per_user is not None:
+                self.max_streams_per_user = max_streams_per_user
+            if history_size is not None:
+                self.history_size = history_size
+            if max_queue is not None:
+                self.max_queue = max_queue
+
+    # ==================== PUBLICACIÓN ====================
+
+    def has_subscribers(self, user_id):
+        """Indicar si el usuario tiene algún stream abierto en este proceso"""
+        return bool(self._subscribers.get(user_id))
+
+    def publish(self, user_id, event_type, data):
+        """Publicar un evento a los streams del usuario y guardarlo en su historial"""
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        with self._lock:
+            self._last_id += 1
+            item = (self._last_id, event_type, payload)
+            history = self._history.setdefault(user_id, deque())
+            history.append(item)
+            while len(history) > self.history_size:
+                self._evicted[user_id] = history.popleft()[0]
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.offer(item)
+        return item[0]
+
+    def publish_after_commit(self, session, user_id, event_type, data):
+        """Encolar un evento que se publica solo si la transacción de la sesión se confirma"""
+        session.info.setdefault('pending_events', []).append((user_id, event_type, data))
+
+    # ==================== SUSCRIPCIÓN ====================
+
+    def subscribe(self, user_id, last_event_id=None):
+        """Abrir un stream; devuelve (suscripción, eventos a reenviar, requiere resincronizar)
+
+        Con last_event_id se reenvían los eventos posteriores del historial. Si alguno
+        ya se descartó (o el proceso se reinició) se pide al cliente que resincronice.
+        """
+        with self._lock:
+            total = sum(len(subscribers) for subscribers in self._subscribers.values())
+            # Límites antes de registrar al usuario: un rechazo no deja un conjunto vacío
+            if total >= self.max_streams or \
+                    len(self._subscribers.get(user_id, ())) >= self.max_streams_per_user:
+                raise StreamLimitError('Demasiados streams abiertos')
+
+            subscription = Subscription(self, user_id, self.max_queue)
+            subscription.cursor = self._last_id
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+
+            replay, resync = [], False
+            if last_event_id is not None:
+                replay = [item for item in self._history.get(user_id, ()) if item[0] > last_event_id]
+                resync = last_event_id < self._evicted.get(user_id, self._start_id)
+        return subscription, replay, resync
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def stats(self):
+        """Streams abiertos y usuarios conectados"""
+        with self._lock:
+            return {
+                'streams': sum(len(subscribers) for subscribers in self._subscribers.values()),
+                'users': len(self._subscribers),
+                'max_streams': self.max_streams,
+                'last_event_id': self._last_id
+            }
+
+    # ==================== STREAM ====================
+
+    def stream(self, subscription, replay=(), resync=False, heartbeat=15, max_seconds=300, retry_ms=3000):
+        """Generador del cuerpo text/event-stream
+
+        Envía un comentario cada 'heartbeat' segundos para mantener viva la conexión y
+        detectar clientes caídos, y cierra tras max_seconds (EventSource reconecta solo
+        con Last-Event-ID), de modo que ningún stream retiene un hilo indefinidamente.
+        """
+        try:
+            yield f'retry: {retry_ms}\n\n'
+            if resync:
+                yield format_event(None, 'resync', '{}')
+            for item in replay:
+                yield format_event(*item)
+            # Fija Last-Event-ID aunque no lleguen eventos: al reconectar no se pierde nada
+            yield format_event(subscription.cursor, 'ready', '{}')
+
+            deadline = time.monotonic() + max_seconds
+            while not subscription.overflowed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = subscription.queue.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+                    continue
+                yield format_event(*item)
+        finally:
+            subscription.close()
+
+
+def format_event(event_id, event_type, payload):
+    """Serializar un evento en el formato de Server-Sent Events"""
+    lines = [] if event_id is None else [f'id: {event_id}']
+    lines.append(f'event: {event_type}')
+    lines.extend(f'data: {line}' for line in payload.split('\n'))
+    return '\n'.join(lines) + '\n\n'
+
+
+# Instancia compartida (se configura en create_app)
+event_broker = EventBroker()
+
+
+def _collect_new_objects(session, flush_context):
+    """Encolar las notificaciones y alertas nuevas de usuarios con streams abiertos"""
+    for obj in session.new:
+        if isinstance(obj, Notification) and event_broker.has_subscribers(obj.user_id):
+            event_broker.publish_after_commit(session, obj.user_id, 'notification', obj.to_dict())
+        elif isinstance(obj, HealthAlert) and event_broker.has_subscribers(obj.user_id):
+            event_broker.publish_after_commit(session, obj.user_id, 'alert', obj.to_dict())
+
+
+def _publish_pending(session):
+    """Publicar los eventos encolados al confirmar la transacción"""
+    for user_id, event_type, data in session.info.pop('pending_events', ()):
+        event_broker.publish(user_id, event_type, data)
+
+
+def _discard_pending(session):
+    """Descartar los eventos de una transacción revertida"""
+    session.info.pop('pending_events', None)
+
+
+SESSION_LISTENERS = (
+    ('after_flush', _collect_new_objects),
+    ('after_commit', _publish_pending),
+    ('after_rollback', _discard_pending),
+)
+
+
+def register_session_events(session):
+    """Conectar los listeners a la sesión de la app (una sola vez aunque se creen varias apps)"""
+    for name, listener in SESSION_LISTENERS:
+        if not event.contains(session, name, listener):
+            event.listen(session, name, listener)
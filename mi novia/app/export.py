@@ -0,0 +1,129 @@
+"""
+Exportación en streaming del historial completo de un usuario
+Las filas se leen por lotes (yield_per) y se serializan a medida que se envían,
+de modo que la memoria no depende de la cantidad de datos exportados. Todas las
+tablas se leen en una misma conexión y transacción: la exportación es una instantánea.
+"""
+
+import csv
+import io
+import json
+import zlib
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from app.models import HealthData, Task, Notification, HealthAlert, Medication
+from app.storage import analytics_engine
+
+# Tablas exportables y columna de orden (la que acompaña a user_id en su índice)
+EXPORT_TABLES = {
+    'health_data': (HealthData, HealthData.date),
+    'tasks': (Task, Task.created_at),
+    'notifications': (Notification, Notification.created_at),
+    'health_alerts': (HealthAlert, HealthAlert.id),
+    'medications': (Medication, Medication.id),
+}
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Filas leídas por lote y bytes acumulados antes de enviar un fragmento
+EXPORT_BATCH_SIZE = 500
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+
+def _export_value(value):
+    """Convertir fechas a ISO 8601; el resto se exporta tal cual"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+@contextmanager
+def snapshot_connection():
+    """Conexión con una única transacción de lectura para toda la exportación
+
+    La exportación puede durar mucho: se lee del pool de análisis, no del de la app.
+    pysqlite no abre transacción para los SELECT, así que en SQLite se emite BEGIN;
+    en PostgreSQL, REPEATABLE READ. Al cerrar la conexión la transacción se revierte.
+    """
+    engine = analytics_engine()
+    with engine.connect() as conn:
+        if engine.dialect.name == 'sqlite':
+            conn.exec_driver_sql('BEGIN')
+        else:
+            conn = conn.execution_options(isolation_level='REPEATABLE READ')
+        yield conn
+
+
+def iter_table_rows(conn, table_name, user_id):
+    """Recorrer las filas de una tabla del usuario como diccionarios, por lotes"""
+    model, order_column = EXPORT_TABLES[table_name]
+    table = model.__table__
+    stmt = (
+        select(table)
+        .where(table.c.user_id == user_id)
+        .order_by(order_column, table.c.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for row in conn.execute(stmt).mappings():
+        yield {key: _export_value(value) for key, value in row.items()}
+
+
+def _ndjson_lines(conn, table_names, user_id):
+    """Una línea JSON por fila: {"table": ..., "data": {...}}"""
+    for table_name in table_names:
+        for row in iter_table_rows(conn, table_name, user_id):
+            yield json.dumps({'table': table_name, 'data': row}, ensure_ascii=False) + '\n'
+
+
+def _csv_lines(conn, table_name, user_id):
+    """Encabezado y filas CSV de una única tabla"""
+    columns = [column.name for column in EXPORT_TABLES[table_name][0].__table__.columns]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    yield buffer.getvalue()
+    for row in iter_table_rows(conn, table_name, user_id):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+
+def _export_lines(user_id, table_names, fmt):
+    """Líneas de la exportación; la conexión se libera apenas se lee la última fila"""
+    with snapshot_connection() as conn:
+        if fmt == 'csv':
+            yield from _csv_lines(conn, table_names[0], user_id)
+        else:
+            yield from _ndjson_lines(conn, table_names, user_id)
+
+
+def generate_export(user_id, table_names, fmt='ndjson', compress=False):
+    """Generador de fragmentos de bytes de la exportación (gzip opcional)"""
+    lines = _export_lines(user_id, table_names, fmt)
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    pending = []
+    pending_bytes = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            pending.append(data)
+            pending_bytes += len(data)
+        if pending_bytes >= EXPORT_FLUSH_BYTES:
+            yield b''.join(pending)
+            pending = []
+            pending_bytes = 0
+
+    if compressor is not None:
+        pending.append(compressor.flush())
+    if pending:
+        yield b''.join(pending)
@@ -0,0 +1,231 @@
+"""
+Escritura atómica de datos de salud diarios
+Cada operación es un único INSERT ... ON CONFLICT(user_id, date) DO UPDATE con RETURNING
+"""
+
+import json
+from datetime import date, datetime
+
+from sqlalchemy import func, not_, select
+
+from app.models import db, insert_for_dialect, HealthData
+
+health_table = HealthData.__table__
+
+# Columnas que se devuelven tras cada escritura
+RETURNING_COLUMNS = (
+    health_table.c.id,
+    health_table.c.water_intake,
+    health_table.c.water_target,
+    health_table.c.systolic_pressure,
+    health_table.c.diastolic_pressure,
+    health_table.c.weight,
+    health_table.c.breakfast_completed,
+    health_table.c.lunch_completed,
+    health_table.c.dinner_completed,
+    health_table.c.exercise_minutes,
+)
+
+
+def build_health_upsert(values=(), increments=(), toggles=()):
+    """Construir el upsert del registro diario de salud
+
+    - values: columnas que se sobrescriben con el valor recibido
+    - increments: columnas que se suman al valor existente (p. ej. water_intake)
+    - toggles: columnas booleanas que se invierten (p. ej. breakfast_completed)
+
+    Los parámetros de la sentencia son user_id, date y el nombre de cada columna.
+    Para las columnas en toggles el valor insertado debe ser True, ya que el
+    registro nuevo parte de False.
+    """
+    stmt = insert_for_dialect(health_table)
+    excluded = stmt.excluded
+
+    set_ = {}
+    for column in values:
+        set_[column] = excluded[column]
+    for column in increments:
+        set_[column] = func.coalesce(health_table.c[column], 0) + excluded[column]
+    for column in toggles:
+        set_[column] = not_(func.coalesce(health_table.c[column], False))
+    set_['updated_at'] = excluded.updated_at
+
+    return stmt.on_conflict_do_update(index_elements=['user_id', 'date'], set_=set_)
+
+
+def upsert_health_data(user_id, day, values=None, increments=None, toggles=()):
+    """Insertar o actualizar el registro de salud de un día en una sola sentencia
+
+    Devuelve la fila resultante con RETURNING_COLUMNS. No hace commit; el llamador
+    confirma la transacción junto con cualquier otra escritura de la petición.
+    """
+    values = values or {}
+    increments = increments or {}
+
+    params = {'user_id': user_id, 'date': day}
+    params.update(values)
+    params.update(increments)
+    params.update({column: True for column in toggles})
+
+    stmt = build_health_upsert(values, increments, toggles).values(**params).returning(*RETURNING_COLUMNS)
+    return db.session.execute(stmt).one()
+
+
+def daily_health_summary(user_id, day):
+    """Valores del registro de un día (RETURNING_COLUMNS) como diccionario, o None"""
+    row = db.session.execute(
+        select(*RETURNING_COLUMNS).where(health_table.c.user_id == user_id, health_table.c.date == day)
+    ).mappings().first()
+    if row is None:
+        return None
+    return dict(row, date=day.isoformat())
+
+
+# ==================== INGESTA EN LOTE ====================
+
+MAX_BATCH_READINGS = 1000
+
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner')
+SLEEP_QUALITIES = ('poor', 'fair', 'good', 'excellent')
+
+
+class ReadingError(ValueError):
+    """Lectura inválida dentro de un lote"""
+
+
+def _number(reading, key, kind, minimum, maximum, required=True):
+    """Leer y validar un valor numérico de una lectura"""
+    value = reading.get(key)
+    if value is None:
+        if required:
+            raise ReadingError(f'Campo requerido: {key}')
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ReadingError(f'Valor numérico inválido: {key}')
+    if kind is int and value != int(value):
+        raise ReadingError(f'Se esperaba un entero: {key}')
+    if not minimum <= value <= maximum:
+        raise ReadingError(f'Valor fuera de rango: {key}')
+    return kind(value)
+
+
+def _time_of_day(reading, key):
+    """Leer y validar una hora en formato HH:MM"""
+    value = reading.get(key)
+    if value is None:
+        return None
+    try:
+        datetime.strptime(value, '%H:%M')
+    except (TypeError, ValueError):
+        raise ReadingError(f'Hora inválida (HH:MM): {key}')
+    return value
+
+
+def _reading_date(reading, today):
+    """Leer la fecha de la lectura (por defecto hoy); no se aceptan fechas futuras"""
+    value = reading.get('date')
+    if value is None:
+        return today
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ReadingError('Fecha inválida (YYYY-MM-DD)')
+    if day > today:
+        raise ReadingError('La fecha no puede ser futura')
+    return day
+
+
+def parse_reading(reading, today):
+    """Validar una lectura tipada y devolver (fecha, valores, incrementos)"""
+    if not isinstance(reading, dict):
+        raise ReadingError('Cada lectura debe ser un objeto')
+
+    day = _reading_date(reading, today)
+    reading_type = reading.get('type')
+    values = {}
+    increments = {}
+
+    if reading_type == 'water':
+        increments['water_intake'] = _number(reading, 'amount', int, 1, 10000)
+    elif reading_type == 'blood_pressure':
+        values['systolic_pressure'] = _number(reading, 'systolic', int, 40, 300)
+        values['diastolic_pressure'] = _number(reading, 'diastolic', int, 20, 200)
+    elif reading_type == 'weight':
+        values['weight'] = _number(reading, 'weight', float, 20, 500)
+    elif reading_type == 'meal':
+        meal_type = reading.get('meal_type')
+        if meal_type not in MEAL_TYPES:
+            raise ReadingError('Tipo de comida inválido')
+        completed = reading.get('completed', True)
+        if not isinstance(completed, bool):
+            raise ReadingError('completed debe ser booleano')
+        values[f'{meal_type}_completed'] = completed
+    elif reading_type == 'exercise':
+        increments['exercise_minutes'] = _number(reading, 'minutes', int, 1, 1440)
+        calories = _number(reading, 'calories_burned', int, 0, 20000, required=False)
+        if calories is not None:
+            increments['calories_burned'] = calories
+        if reading.get('exercise_type'):
+            values['exercise_type'] = str(reading['exercise_type'])[:100]
+    elif reading_type == 'sleep':
+        values['sleep_hours'] = _number(reading, 'hours', float, 0, 24)
+        quality = reading.get('quality')
+        if quality is not None:
+            if quality not in SLEEP_QUALITIES:
+                raise ReadingError('Calidad de sueño inválida')
+            values['sleep_quality'] = quality
+        for key in ('bedtime', 'wakeup_time'):
+            value = _time_of_day(reading, key)
+            if value is not None:
+                values[key] = value
+    elif reading_type == 'medications':
+        medications = reading.get('medications')
+        if not isinstance(medications, list):
+            raise ReadingError('medications debe ser una lista')
+        values['medications_taken'] = json.dumps(medications)
+    else:
+        raise ReadingError('Tipo de lectura inválido')
+
+    return day, values, increments
+
+
+def apply_health_readings(user_id, readings, today=None):
+    """Validar un lote de lecturas y aplicarlas con upserts masivos
+
+    Las lecturas se agrupan por día: los incrementos se suman y los valores
+    posteriores sustituyen a los anteriores. Los días con las mismas columnas
+    comparten una sentencia ejecutada con executemany. No hace commit.
+
+    Devuelve (estado por lectura, días afectados).
+    """
+    today = today or date.today()
+    statuses = []
+    days = {}
+
+    for index, reading in enumerate(readings):
+        try:
+            day, values, increments = parse_reading(reading, today)
+        except ReadingError as error:
+            statuses.append({'index': index, 'status': 'error', 'error': str(error)})
+            continue
+
+        pending = days.setdefault(day, ({}, {}))
+        pending[0].update(values)
+        for column, amount in increments.items():
+            pending[1][column] = pending[1].get(column, 0) + amount
+        statuses.append({'index': index, 'status': 'ok', 'date': day.isoformat()})
+
+    # Agrupar los días por conjunto de columnas para reutilizar la sentencia
+    groups = {}
+    for day, (values, increments) in days.items():
+        signature = (tuple(sorted(values)), tuple(sorted(increments)))
+        row = {'user_id': user_id, 'date': day}
+        row.update(values)
+        row.update(increments)
+        groups.setdefault(signature, []).append(row)
+
+    for (value_columns, increment_columns), rows in groups.items():
+        stmt = build_health_upsert(value_columns, increment_columns)
+        db.session.execute(stmt, rows)
+
+    return statuses, sorted(days)
@@ -0,0 +1,428 @@
+"""
+Cola persistente de trabajos diferidos
+Las rutas agregan trabajos a la tabla jobs en la misma transacción que su escritura y
+responden sin esperar: si la transacción se revierte, el trabajo no existe. Hilos del
+proceso web (JOBS_WORKERS) o 'flask worker' toman los trabajos por prioridad, juntan en un
+lote los del mismo tipo, reintentan con espera exponencial y recuperan los que quedaron
+tomados por un trabajador caído al vencer su tiempo de visibilidad. La entrega es al menos
+una vez: los manejadores deben tolerar ejecutarse de nuevo.
+"""
+
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, case, event, func
+
+from app.metrics import Histogram, render_counter, render_gauge, render_histogram
+from app.models import db, Job
+
+logger = logging.getLogger('app.jobs')
+
+job_table = Job.__table__
+
+# Límites superiores de los histogramas de espera en cola y duración (segundos)
+JOB_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# Estados que cuentan como profundidad de la cola en /metrics
+OPEN_STATUSES = ('queued', 'running', 'failed')
+
+
+class JobHandler:
+    """Función que procesa los trabajos de un tipo y sus límites"""
+
+    def __init__(self, name, function, batch_size=1, max_attempts=None, timeout=None):
+        self.name = name
+        self.function = function
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+
+
+class JobQueue:
+    """Registro de manejadores, encolado y trabajadores de la tabla jobs
+
+    Cada trabajador toma el trabajo disponible de mayor prioridad y, en la misma sentencia,
+    hasta batch_size trabajos más del mismo tipo. El manejador recibe la lista de payloads
+    y sus escrituras se confirman en la misma transacción que marca el lote como terminado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self.handlers = {}
+        self.app = None
+        self.workers = 1
+        self.poll_interval = 1.0
+        self.visibility_timeout = 300
+        self.max_attempts = 5
+        self.backoff_seconds = 2.0
+        self.backoff_max_seconds = 600
+        self.keep_done_seconds = 86400
+        self.next_sweep = 0.0
+        self.next_purge = 0.0
+        self.worker_prefix = f'{socket.gethostname()}:{os.getpid()}'
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        """Vaciar las series de espera, duración y resultados"""
+        with self._lock:
+            self.wait_seconds = Histogram(JOB_BUCKETS)
+            self.run_seconds = Histogram(JOB_BUCKETS)
+            self.outcomes = {}  # (tipo, resultado) -> trabajos
+
+    def init_app(self, app):
+        """Leer la configuración y registrar los listeners de la sesión"""
+        self.app = app
+        self.workers = app.config['JOBS_WORKERS']
+        self.poll_interval = app.config['JOBS_POLL_INTERVAL']
+        self.visibility_timeout = app.config['JOBS_VISIBILITY_TIMEOUT']
+        self.max_attempts = app.config['JOBS_MAX_ATTEMPTS']
+        self.backoff_seconds = app.config['JOBS_BACKOFF_SECONDS']
+        self.backoff_max_seconds = app.config['JOBS_BACKOFF_MAX_SECONDS']
+        self.keep_done_seconds = app.config['JOBS_KEEP_DONE_SECONDS']
+
+        for name, listener in SESSION_LISTENERS:
+            if not event.contains(db.session, name, listener):
+                event.listen(db.session, name, listener)
+        if self.workers:
+            # Los hilos arrancan con la primera petición, no al importar la app desde la CLI
+            app.before_request(self._before_request)
+
+    def handler(self, name, batch_size=1, max_attempts=None, timeout=None):
+        """Decorador que registra la función que procesa los trabajos de un tipo
+
+        La función recibe la lista de payloads del lote (uno si batch_size es 1) dentro de
+        un contexto de aplicación; timeout reemplaza JOBS_VISIBILITY_TIMEOUT para el tipo.
+        """
+        def decorator(function):
+            self.handlers[name] = JobHandler(name, function, batch_size, max_attempts, timeout)
+            return function
+        return decorator
+
+    # ==================== ENCOLADO ====================
+
+    def enqueue(self, name, payload=None, priority=0, delay=0, max_attempts=None, session=None):
+        """Agregar un trabajo a la sesión (sin commit); los trabajadores lo ven al confirmarse"""
+        session = session or db.session
+        handler = self.handlers.get(name)
+        job = Job(
+            name=name,
+            payload=json.dumps(payload or {}, separators=(',', ':'), sort_keys=True),
+            priority=priority,
+            max_attempts=max_attempts or (handler and handler.max_attempts) or self.max_attempts,
+            run_at=datetime.utcnow() + timedelta(seconds=delay)
+        )
+        session.add(job)
+        session.info['jobs_enqueued'] = True
+        return job
+
+    def notify(self):
+        """Despertar a los trabajadores del proceso (arrancándolos si hace falta)"""
+        if self.workers and not self._threads:
+            self.start()
+        self._wakeup.set()
+
+    # ==================== TRABAJADORES ====================
+
+    def start(self, workers=None):
+        """Arrancar los hilos trabajadores (no hace nada si ya están en marcha)"""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for index in range(workers or self.workers):
+                thread = threading.Thread(target=self._run, args=(f'{self.worker_prefix}:{index}',),
+                                          name=f'job-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Pedir a los hilos que terminen su lote actual y esperarlos"""
+        self._stop.set()
+        self._wakeup.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def is_running(self):
+        """Indicar si hay hilos trabajadores vivos"""
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _before_request(self):
+        if not self._threads:
+            self.start()
+
+    def _run(self, worker_id):
+        app = self.app
+        while not self._stop.is_set():
+            # El aviso se limpia antes de consultar: un notify() que llegue durante la consulta
+            # o el lote deja el evento activo y la espera de abajo termina enseguida
+            self._wakeup.clear()
+            processed, next_run_at = 0, None
+            with app.app_context():
+                try:
+                    processed = self.run_once(worker_id)
+                    if not processed:
+                        next_run_at = self.next_run_at()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Falló el trabajador %s', worker_id)
+                finally:
+                    db.session.remove()
+            if processed:
+                continue
+
+            # Sin trabajos disponibles: esperar un aviso, el próximo trabajo diferido o el sondeo
+            wait = self.poll_interval
+            if next_run_at is not None:
+                wait = min(wait, max((next_run_at - datetime.utcnow()).total_seconds(), 0.01))
+            self._wakeup.wait(wait)
+
+    def run_once(self, worker_id=None):
+        """Tomar y ejecutar un lote en el hilo actual (requiere contexto de aplicación)
+
+        Devuelve la cantidad de trabajos tomados (0 si no había ninguno disponible).
+        """
+        worker_id = worker_id or self.worker_prefix
+        self._maintain()
+        handler, name, rows = self.claim(worker_id)
+        if not rows:
+            return 0
+
+        start = time.perf_counter()
+        started_at = datetime.utcnow()
+        try:
+            if handler is None:
+                raise LookupError(f'No hay manejador registrado para {name}')
+            handler.function([json.loads(row.payload) for row in rows])
+            db.session.execute(
+                db.update(Job).where(Job.id.in_([row.id for row in rows]), Job.locked_by == worker_id)
+                .values(status='done', finished_at=datetime.utcnow(), locked_by=None,
+                        locked_until=None, last_error=None),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+            outcome = 'done'
+        except Exception as error:
+            db.session.rollback()
+            logger.exception('Falló el lote de %d trabajos %s', len(rows), name)
+            outcome = self._retry_or_fail(rows, worker_id, error, retry=handler is not None)
+            db.session.commit()
+
+        self._record(name, rows, outcome, started_at, time.perf_counter() - start)
+        return len(rows)
+
+    def drain(self, worker_id=None):
+        """Ejecutar lotes hasta que no quede ningún trabajo disponible; devuelve trabajos tomados"""
+        total = 0
+        while True:
+            processed = self.run_once(worker_id)
+            if not processed:
+                return total
+            total += processed
+
+    # ==================== SENTENCIAS ====================
+
+    def claim(self, worker_id, now=None):
+        """Marcar como tomados el siguiente lote; devuelve (manejador, tipo, filas)
+
+        El UPDATE solo toma trabajos que siguen en 'queued', así que dos trabajadores
+        (hilos o procesos) nunca reciben el mismo trabajo.
+        """
+        now = now or datetime.utcnow()
+        available = (Job.status == 'queued', Job.run_at <= now)
+        order = (Job.priority.desc(), Job.run_at, Job.id)
+
+        name = db.session.execute(
+            db.select(Job.name).where(*available).order_by(*order).limit(1)
+        ).scalar()
+        if name is None:
+            db.session.rollback()
+            return None, None, []
+
+        handler = self.handlers.get(name)
+        batch_size = handler.batch_size if handler else 1
+        timeout = (handler and handler.timeout) or self.visibility_timeout
+        batch_ids = db.select(Job.id).where(Job.name == name, *available) \
+            .order_by(*order).limit(batch_size).scalar_subquery()
+
+        rows = db.session.execute(
+            db.update(Job).where(Job.id.in_(batch_ids), Job.status == 'queued')
+            .values(status='running', attempts=Job.attempts + 1, locked_by=worker_id,
+                    locked_until=now + timedelta(seconds=timeout), started_at=now)
+            .returning(Job.id, Job.payload, Job.attempts, Job.max_attempts, Job.run_at),
+            execution_options={'synchronize_session': False}
+        ).all()
+        db.session.commit()
+        return handler, name, rows
+
+    def backoff(self, attempts):
+        """Segundos hasta el reintento: exponencial por intento, acotada y con variación aleatoria"""
+        delay = min(self.backoff_seconds * 2 ** (attempts - 1), self.backoff_max_seconds)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _retry_or_fail(self, rows, worker_id, error, retry=True):
+        """Devolver el lote a la cola con espera o marcarlo como fallido (sin commit)"""
+        now = datetime.utcnow()
+        outcome = 'retried'
+        params = []
+        for row in rows:
+            if retry and row.attempts < row.max_attempts:
+                params.append({'job_id': row.id, 'new_status': 'queued', 'new_finished_at': None,
+                               'new_run_at': now + timedelta(seconds=self.backoff(row.attempts))})
+            else:
+                outcome = 'failed'
+                params.append({'job_id': row.id, 'new_status': 'failed', 'new_finished_at': now,
+                               'new_run_at': row.run_at})
+
+        db.session.execute(
+            job_table.update()
+            .where(job_table.c.id == bindparam('job_id'), job_table.c.locked_by == worker_id)
+            .values(status=bindparam('new_status'), run_at=bindparam('new_run_at'),
+                    finished_at=bindparam('new_finished_at'), locked_by=None, locked_until=None,
+                    last_error=f'{type(error).__name__}: {error}'[:2000]),
+            params
+        )
+        return outcome
+
+    def requeue_expired(self, now=None):
+        """Recuperar los trabajos cuyo tiempo de visibilidad venció (sin commit)
+
+        Vuelven a la cola, o quedan fallidos si ya agotaron sus intentos. Devuelve la cantidad.
+        """
+        now = now or datetime.utcnow()
+        exhausted = Job.attempts >= Job.max_attempts
+        result = db.session.execute(
+            db.update(Job).where(Job.status == 'running', Job.locked_until < now)
+            .values(status=case((exhausted, 'failed'), else_='queued'),
+                    finished_at=case((exhausted, now), else_=None),
+                    locked_by=None, locked_until=None,
+                    last_error='Tiempo de visibilidad vencido'),
+            execution_options={'synchronize_session': False}
+        )
+        return result.rowcount
+
+    def purge_done(self, older_than_seconds=None, now=None):
+        """Eliminar los trabajos terminados hace más de JOBS_KEEP_DONE_SECONDS (sin commit)"""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(seconds=self.keep_done_seconds if older_than_seconds is None
+                                 else older_than_seconds)
+        result = db.session.execute(
+            db.delete(Job).where(Job.status == 'done', Job.finished_at < cutoff),
+            execution_options={'synchronize_session': False}
+        )
+        return result.rowcount
+
+    def retry_failed(self, name=None):
+        """Devolver a la cola los trabajos fallidos con los intentos a cero (sin commit)"""
+        stmt = db.update(Job).where(Job.status == 'failed')
+        if name is not None:
+            stmt = stmt.where(Job.name == name)
+        result = db.session.execute(
+            stmt.values(status='queued', attempts=0, run_at=datetime.utcnow(), finished_at=None),
+            execution_options={'synchronize_session': False}
+        )
+        return result.rowcount
+
+    def next_run_at(self):
+        """Fecha del próximo trabajo en cola (disponible o diferido) o None"""
+        return db.session.execute(
+            db.select(func.min(Job.run_at)).where(Job.status == 'queued')
+        ).scalar()
+
+    def _maintain(self):
+        """Recuperar vencidos y purgar terminados de vez en cuando (un solo hilo a la vez)"""
+        now = time.monotonic()
+        with self._lock:
+            sweep = now >= self.next_sweep
+            purge = now >= self.next_purge
+            if sweep:
+                self.next_sweep = now + min(self.visibility_timeout, 30)
+            if purge:
+                self.next_purge = now + 3600
+        if not sweep and not purge:
+            return
+
+        requeued = self.requeue_expired() if sweep else 0
+        purged = self.purge_done() if purge else 0
+        db.session.commit()
+        if requeued:
+            logger.warning('%d trabajos recuperados tras vencer su tiempo de visibilidad', requeued)
+        if purged:
+            logger.info('%d trabajos terminados eliminados', purged)
+
+    # ==================== MÉTRICAS ====================
+
+    def _record(self, name, rows, outcome, started_at, elapsed):
+        with self._lock:
+            for row in rows:
+                self.wait_seconds.observe((name,), max((started_at - row.run_at).total_seconds(), 0.0))
+            self.run_seconds.observe((name,), elapsed)
+            key = (name, outcome)
+            self.outcomes[key] = self.outcomes.get(key, 0) + len(rows)
+
+    def queue_depth(self):
+        """Trabajos abiertos por (tipo, estado) y fecha del más antiguo en cola por tipo"""
+        rows = db.session.execute(
+            db.select(Job.name, Job.status, func.count(), func.min(Job.run_at))
+            .where(Job.status.in_(OPEN_STATUSES))
+            .group_by(Job.name, Job.status)
+        ).all()
+        depth = {(name, status): count for name, status, count, _ in rows}
+        oldest = {name: run_at for name, status, _, run_at in rows if status == 'queued'}
+        return depth, oldest
+
+    def render_metrics(self):
+        """Profundidad de la cola (de la base) y latencias de este proceso en formato Prometheus"""
+        depth, oldest = self.queue_depth()
+        now = datetime.utcnow()
+        lines = []
+        render_gauge(lines, 'jobs', 'Trabajos abiertos por tipo y estado', ('name', 'status'), depth)
+        render_gauge(lines, 'jobs_oldest_queued_seconds', 'Retraso del trabajo disponible más antiguo',
+                     ('name',), {name: max((now - run_at).total_seconds(), 0.0)
+                                 for name, run_at in oldest.items()}, single=True)
+        with self._lock:
+            render_histogram(lines, 'job_wait_seconds', 'Espera desde que el trabajo está disponible',
+                             ('name',), self.wait_seconds)
+            render_histogram(lines, 'job_duration_seconds', 'Duración de cada lote de trabajos',
+                             ('name',), self.run_seconds)
+            render_counter(lines, 'jobs_processed_total', 'Trabajos procesados por tipo y resultado',
+                           ('name', 'outcome'), self.outcomes)
+        return '\n'.join(lines) + '\n'
+
+    def stats(self):
+        """Hilos vivos y trabajos procesados por resultado en este proceso"""
+        with self._lock:
+            totals = {}
+            for (_, outcome), count in self.outcomes.items():
+                totals[outcome] = totals.get(outcome, 0) + count
+            return {'workers': sum(thread.is_alive() for thread in self._threads), **totals}
+
+
+# Instancia compartida (se configura en create_app)
+job_queue = JobQueue()
+
+
+def _notify_workers(session):
+    """Avisar a los trabajadores si la transacción confirmada agregó trabajos"""
+    if session.info.pop('jobs_enqueued', False):
+        job_queue.notify()
+
+
+def _discard_notice(session):
+    session.info.pop('jobs_enqueued', None)
+
+
+SESSION_LISTENERS = (
+    ('after_commit', _notify_workers),
+    ('after_rollback', _discard_notice),
+)
@@ -0,0 +1,214 @@
+"""
+Métricas por endpoint para Life Organizer
+Los hooks de Flask y los eventos de cursor de SQLAlchemy registran la latencia de cada
+petición, la cantidad de consultas SQL, el tiempo en la base y los bytes de respuesta por
+ruta, y /metrics los expone en el formato de texto de Prometheus (solo a localhost o con
+METRICS_TOKEN). Las consultas que superan el umbral se registran en el log 'app.metrics'.
+Desactivadas, no se instala ningún hook.
+"""
+
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('app.metrics')
+
+# Límites superiores de los histogramas (segundos y consultas por petición)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+PREFIX = 'life_organizer'
+
+# Direcciones desde las que se puede leer /metrics sin METRICS_TOKEN
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def scrape_allowed():
+    """Indicar si la petición puede leer /metrics: con METRICS_TOKEN, el token Bearer correcto; sin él, localhost"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        return request.remote_addr in LOCAL_ADDRESSES
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+class Histogram:
+    """Histograma acumulativo por etiquetas, con suma y cantidad"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.series = {}  # etiquetas -> [conteos por cubeta, suma, cantidad]
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+
+def _labels(names, values, extra=''):
+    """Formatear etiquetas de Prometheus: {a="x",b="y"}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    """Escapar un valor de etiqueta"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    """Número en el formato de Prometheus"""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_counter(lines, name, help_text, label_names, values, single=False, kind='counter'):
+    """Agregar a lines una serie por etiquetas (single: claves de una sola etiqueta sin tupla)"""
+    lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+    lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+    for labels, value in sorted(values.items()):
+        if single:
+            labels = (labels,)
+        lines.append(f'{PREFIX}_{name}{_labels(label_names, labels)} {_number(value)}')
+
+
+def render_gauge(lines, name, help_text, label_names, values, single=False):
+    """Igual que render_counter para valores que suben y bajan"""
+    render_counter(lines, name, help_text, label_names, values, single, kind='gauge')
+
+
+def render_histogram(lines, name, help_text, label_names, histogram):
+    """Agregar a lines las cubetas acumuladas, la suma y la cantidad de un Histogram"""
+    lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+    lines.append(f'# TYPE {PREFIX}_{name} histogram')
+    for labels, (counts, total, count) in sorted(histogram.series.items()):
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = f'le="{_number(bound)}"'
+            lines.append(f'{PREFIX}_{name}_bucket{_labels(label_names, labels, le)} {cumulative}')
+        lines.append(f'{PREFIX}_{name}_sum{_labels(label_names, labels)} {_number(total)}')
+        lines.append(f'{PREFIX}_{name}_count{_labels(label_names, labels)} {count}')
+
+
+class RequestMetrics:
+    """Registro de métricas de peticiones y consultas, compartido por el proceso"""
+
+    def __init__(self):
+        """Inicializar el registro vacío"""
+        self._lock = threading.Lock()
+        self.slow_query_seconds = 0.2
+        self.reset()
+
+    def reset(self):
+        """Vaciar todas las series"""
+        with self._lock:
+            self.latency = Histogram(LATENCY_BUCKETS)
+            self.queries_per_request = Histogram(QUERY_COUNT_BUCKETS)
+            self.requests = {}        # (endpoint, método, estado) -> peticiones
+            self.sql_queries = {}     # endpoint -> consultas
+            self.sql_seconds = {}     # endpoint -> segundos en la base
+            self.response_bytes = {}  # endpoint -> bytes
+            self.slow_queries = 0
+
+    def init_app(self, app):
+        """Instalar los hooks de Flask y los eventos del motor si METRICS_ENABLED está activo"""
+        if not app.config.get('METRICS_ENABLED'):
+            return
+        self.slow_query_seconds = app.config.get('SLOW_QUERY_MS', 200) / 1000
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+        from app.models import db
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # ==================== HOOKS ====================
+
+    @staticmethod
+    def _before_request():
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_db_seconds = 0.0
+
+    def _after_request(self, response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        queries = g.pop('metrics_queries', 0)
+        db_seconds = g.pop('metrics_db_seconds', 0.0)
+
+        # La plantilla de la ruta (no la URL) mantiene acotada la cantidad de series;
+        # en respuestas en streaming el tiempo y los bytes cubren solo hasta el primer envío
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        size = response.content_length or 0
+        with self._lock:
+            self.latency.observe((endpoint, request.method), elapsed)
+            self.queries_per_request.observe((endpoint,), queries)
+            key = (endpoint, request.method, response.status_code)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.sql_queries[endpoint] = self.sql_queries.get(endpoint, 0) + queries
+            self.sql_seconds[endpoint] = self.sql_seconds.get(endpoint, 0.0) + db_seconds
+            self.response_bytes[endpoint] = self.response_bytes.get(endpoint, 0) + size
+
+        response.headers['Server-Timing'] = f'db;dur={db_seconds * 1000:.1f}, app;dur={elapsed * 1000:.1f}'
+        return response
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+        endpoint = None
+        if has_request_context():
+            endpoint = request.url_rule.rule if request.url_rule is not None else request.path
+            if 'metrics_queries' in g:
+                g.metrics_queries += 1
+                g.metrics_db_seconds += elapsed
+
+        if elapsed >= self.slow_query_seconds:
+            with self._lock:
+                self.slow_queries += 1
+            logger.warning('Consulta lenta (%.1f ms) en %s: %s', elapsed * 1000, endpoint or '-',
+                           ' '.join(statement.split()))
+
+    # ==================== EXPOSICIÓN ====================
+
+    def render(self):
+        """Todas las series en el formato de texto de Prometheus 0.0.4"""
+        with self._lock:
+            lines = []
+            render_histogram(lines, 'request_duration_seconds', 'Latencia de las peticiones por ruta',
+                             ('endpoint', 'method'), self.latency)
+            render_counter(lines, 'requests_total', 'Peticiones atendidas por ruta, método y estado',
+                           ('endpoint', 'method', 'status'), self.requests)
+            render_histogram(lines, 'sql_queries_per_request', 'Consultas SQL por petición',
+                             ('endpoint',), self.queries_per_request)
+            render_counter(lines, 'sql_queries_total', 'Consultas SQL ejecutadas por ruta',
+                           ('endpoint',), self.sql_queries, single=True)
+            render_counter(lines, 'sql_duration_seconds_total', 'Tiempo en la base de datos por ruta',
+                           ('endpoint',), self.sql_seconds, single=True)
+            render_counter(lines, 'response_bytes_total', 'Bytes de respuesta por ruta',
+                           ('endpoint',), self.response_bytes, single=True)
+            render_counter(lines, 'slow_queries_total', 'Consultas por encima del umbral de lentitud',
+                           (), {(): self.slow_queries})
+        return '\n'.join(lines) + '\n'
+
+
+# Instancia compartida (se configura en create_app)
+request_metrics = RequestMetrics()
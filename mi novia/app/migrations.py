@@ -0,0 +1,196 @@
+"""
+Migraciones versionadas del esquema para Life Organizer
+Usa PRAGMA user_version de SQLite para registrar qué migraciones se aplicaron
+"""
+
+import time
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from app.daily_stats import backfill_statement
+
+
+# Columnas de health_data que se suman al fusionar días duplicados (registros del mismo día)
+_MERGE_SUM_COLUMNS = ('water_intake', 'exercise_minutes', 'calories_burned', 'snacks_count')
+# Comidas: completada si algún registro del día la marcó
+_MERGE_ANY_COLUMNS = ('breakfast_completed', 'lunch_completed', 'dinner_completed')
+# El resto toma el último valor no nulo del día
+_MERGE_LATEST_COLUMNS = ('water_target', 'systolic_pressure', 'diastolic_pressure', 'weight',
+                         'exercise_type', 'sleep_hours', 'sleep_quality', 'bedtime', 'wakeup_time',
+                         'medications_taken', 'updated_at')
+
+
+def _merge_duplicate_health_days(conn):
+    """Fusionar en el primer registro de cada (user_id, date) los datos de los duplicados"""
+    same_day = 'd.user_id = health_data.user_id AND d.date = health_data.date'
+    assignments = [
+        f'{column} = (SELECT SUM(COALESCE(d.{column}, 0)) FROM health_data d WHERE {same_day})'
+        for column in _MERGE_SUM_COLUMNS
+    ] + [
+        f'{column} = (SELECT MAX(COALESCE(d.{column}, 0)) FROM health_data d WHERE {same_day})'
+        for column in _MERGE_ANY_COLUMNS
+    ] + [
+        f'{column} = (SELECT d.{column} FROM health_data d WHERE {same_day} AND d.{column} IS NOT NULL '
+        f'ORDER BY d.updated_at DESC, d.id DESC LIMIT 1)'
+        for column in _MERGE_LATEST_COLUMNS
+    ]
+    conn.execute(text(f"""
+        UPDATE health_data SET {', '.join(assignments)}
+        WHERE id IN (
+            SELECT MIN(id) FROM health_data GROUP BY user_id, date HAVING COUNT(*) > 1
+        )
+    """))
+    conn.execute(text("""
+        DELETE FROM health_data
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM health_data GROUP BY user_id, date
+        )
+    """))
+
+
+def _migration_001_indices_compuestos(conn):
+    """Índices compuestos y clave única (user_id, date) en health_data"""
+    # Antes de crear la clave única, los días duplicados se fusionan en el primer registro
+    # (el que las rutas mostraban con .first()) sin perder las lecturas de los demás
+    _merge_duplicate_health_days(conn)
+
+    statements = [
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_health_data_user_date ON health_data (user_id, date)',
+        'CREATE INDEX IF NOT EXISTS ix_tasks_user_due_date ON tasks (user_id, due_date)',
+        'CREATE INDEX IF NOT EXISTS ix_tasks_user_category_completed ON tasks (user_id, category, completed)',
+        'CREATE INDEX IF NOT EXISTS ix_tasks_user_created_at ON tasks (user_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_notifications_user_read_created ON notifications (user_id, "read", created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_notifications_user_created ON notifications (user_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_health_alerts_user_resolved ON health_alerts (user_id, resolved)',
+        'CREATE INDEX IF NOT EXISTS ix_medications_user_active ON medications (user_id, active)',
+    ]
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+def _migration_002_contadores_de_tareas(conn):
+    """Poblar task_counters a partir de las tareas existentes"""
+    conn.execute(text('DELETE FROM task_counters'))
+    conn.execute(text("""
+        INSERT INTO task_counters (user_id, category, total, completed, updated_at)
+        SELECT user_id, category, COUNT(*), COALESCE(SUM(completed = 1), 0), CURRENT_TIMESTAMP
+        FROM tasks
+        GROUP BY user_id, category
+    """))
+
+
+def _migration_003_resumen_diario(conn):
+    """Poblar daily_stats a partir de health_data y tasks"""
+    conn.execute(text('DELETE FROM daily_stats'))
+    conn.execute(backfill_statement(conn.dialect.name), {'now': datetime.utcnow()})
+
+
+def _migration_004_contadores_de_notificaciones(conn):
+    """Poblar notification_counters a partir de las notificaciones existentes"""
+    conn.execute(text('DELETE FROM notification_counters'))
+    conn.execute(text("""
+        INSERT INTO notification_counters (user_id, unread, version, updated_at)
+        SELECT user_id, COALESCE(SUM("read" = 0), 0), :version, CURRENT_TIMESTAMP
+        FROM notifications
+        GROUP BY user_id
+    """), {'version': int(time.time() * 1000)})
+
+
+def _migration_005_indices_listado_de_tareas(conn):
+    """Índices para el listado paginado de tareas filtrado por categoría o estado"""
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_tasks_user_category_due_date '
+                      'ON tasks (user_id, category, due_date)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_tasks_user_completed_due_date '
+                      'ON tasks (user_id, completed, due_date)'))
+
+
+def _migration_006_ventanas_de_alertas(conn):
+    """Columna window_start y clave única de deduplicación en health_alerts"""
+    columns = {row[1] for row in conn.execute(text('PRAGMA table_info(health_alerts)'))}
+    if 'window_start' not in columns:
+        conn.execute(text('ALTER TABLE health_alerts ADD COLUMN window_start DATETIME'))
+    conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS ux_health_alerts_user_type_window '
+                      'ON health_alerts (user_id, alert_type, window_start)'))
+
+
+def _migration_007_meta_de_agua_en_resumen(conn):
+    """Columna water_target_ml en daily_stats (para que el analizador no lea health_data) y recálculo"""
+    columns = {row[1] for row in conn.execute(text('PRAGMA table_info(daily_stats)'))}
+    if 'water_target_ml' not in columns:
+        conn.execute(text('ALTER TABLE daily_stats ADD COLUMN water_target_ml INTEGER'))
+    conn.execute(text('DELETE FROM daily_stats'))
+    conn.execute(backfill_statement(conn.dialect.name), {'now': datetime.utcnow()})
+
+
+# Lista ordenada de (versión, función). Las nuevas migraciones se agregan al final.
+MIGRATIONS = [
+    (1, _migration_001_indices_compuestos),
+    (2, _migration_002_contadores_de_tareas),
+    (3, _migration_003_resumen_diario),
+    (4, _migration_004_contadores_de_notificaciones),
+    (5, _migration_005_indices_listado_de_tareas),
+    (6, _migration_006_ventanas_de_alertas),
+    (7, _migration_007_meta_de_agua_en_resumen),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+class SchemaVersionError(RuntimeError):
+    """La base de datos tiene migraciones pendientes (se aplican con 'flask db-upgrade')"""
+
+
+def get_schema_version(conn):
+    """Obtener la versión de esquema registrada en la base de datos"""
+    return conn.execute(text('PRAGMA user_version')).scalar()
+
+
+def run_migrations(engine):
+    """Aplicar en orden las migraciones pendientes y devolver la versión final"""
+    if engine.dialect.name != 'sqlite':
+        # user_version solo existe en SQLite; otros motores usan create_all
+        return None
+
+    with engine.begin() as conn:
+        version = get_schema_version(conn)
+        for target_version, migration in MIGRATIONS:
+            if target_version <= version:
+                continue
+            migration(conn)
+            # PRAGMA no admite parámetros enlazados
+            conn.execute(text(f'PRAGMA user_version = {int(target_version)}'))
+            version = target_version
+
+    return version
+
+
+def upgrade_database(engine, metadata):
+    """Crear las tablas que falten y aplicar las migraciones pendientes; devuelve la versión
+
+    Una base vacía recibe el esquema actual completo y queda marcada con la última versión.
+    """
+    if engine.dialect.name != 'sqlite':
+        metadata.create_all(engine)
+        return None
+
+    fresh = not inspect(engine).get_table_names()
+    metadata.create_all(engine)
+    if fresh:
+        with engine.begin() as conn:
+            conn.execute(text(f'PRAGMA user_version = {int(LATEST_VERSION)}'))
+        return LATEST_VERSION
+    return run_migrations(engine)
+
+
+def check_schema_version(engine):
+    """Lanzar SchemaVersionError si la base no tiene aplicadas todas las migraciones"""
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.connect() as conn:
+        version = get_schema_version(conn)
+    if version < LATEST_VERSION:
+        raise SchemaVersionError(
+            f'La base de datos está en la versión de esquema {version} y la aplicación requiere la '
+            f'{LATEST_VERSION}; ejecuta "flask --app run db-upgrade" antes de iniciar la aplicación'
+        )
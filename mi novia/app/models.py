@@ -1,9 +1,16 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, date
+from sqlalchemy.dialects import postgresql, sqlite
 from werkzeug.security import generate_password_hash, check_password_hash
 
 db = SQLAlchemy()
 
+def insert_for_dialect(table):
+    """Obtener la construcción INSERT con soporte de ON CONFLICT para el motor actual"""
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
 class User(db.Model):
     """Modelo de Usuario"""
     __tablename__ = 'users'
@@ -49,6 +56,10 @@ class User(db.Model):
 class HealthData(db.Model):
     """Modelo de Datos de Salud"""
     __tablename__ = 'health_data'
+    __table_args__ = (
+        # Un único registro por usuario y día; también sirve para rangos de fechas
+        db.Index('ux_health_data_user_date', 'user_id', 'date', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -118,6 +129,14 @@ class HealthData(db.Model):
 class Task(db.Model):
     """Modelo de Tareas"""
     __tablename__ = 'tasks'
+    __table_args__ = (
+        db.Index('ix_tasks_user_due_date', 'user_id', 'due_date'),
+        db.Index('ix_tasks_user_category_completed', 'user_id', 'category', 'completed'),
+        db.Index('ix_tasks_user_created_at', 'user_id', 'created_at'),
+        # Listado paginado por (due_date, id) filtrando por categoría o por estado
+        db.Index('ix_tasks_user_category_due_date', 'user_id', 'category', 'due_date'),
+        db.Index('ix_tasks_user_completed_due_date', 'user_id', 'completed', 'due_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -152,6 +171,10 @@ class Task(db.Model):
 class Notification(db.Model):
     """Modelo de Notificaciones"""
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('ix_notifications_user_read_created', 'user_id', 'read', 'created_at'),
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -178,6 +201,11 @@ class Notification(db.Model):
 class HealthAlert(db.Model):
     """Modelo de Alertas de Salud"""
     __tablename__ = 'health_alerts'
+    __table_args__ = (
+        db.Index('ix_health_alerts_user_resolved', 'user_id', 'resolved'),
+        # Una alerta por tipo y ventana de deduplicación (ver app/alerts.py)
+        db.Index('ux_health_alerts_user_type_window', 'user_id', 'alert_type', 'window_start', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -188,6 +216,7 @@ class HealthAlert(db.Model):
     resolved = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     resolved_at = db.Column(db.DateTime)
+    window_start = db.Column(db.DateTime)  # inicio de la ventana de deduplicación de la regla
     
     def to_dict(self):
         """Convertir a diccionario para JSON"""
@@ -206,6 +235,9 @@ class HealthAlert(db.Model):
 class Medication(db.Model):
     """Modelo de Medicamentos"""
     __tablename__ = 'medications'
+    __table_args__ = (
+        db.Index('ix_medications_user_active', 'user_id', 'active'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -232,3 +264,106 @@ class Medication(db.Model):
             'active': self.active,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+class TaskCounter(db.Model):
+    """Contadores de tareas por usuario y categoría (mantenidos al crear, actualizar o eliminar tareas)"""
+    __tablename__ = 'task_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    total = db.Column(db.Integer, default=0, nullable=False)
+    completed = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class NotificationCounter(db.Model):
+    """Versión y no leídas de las notificaciones de cada usuario (mantenidas al crear o marcar notificaciones)"""
+    __tablename__ = 'notification_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    unread = db.Column(db.Integer, default=0, nullable=False)
+    version = db.Column(db.BigInteger, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DailyStats(db.Model):
+    """Resumen diario por usuario (tabla daily_stats), mantenido por los endpoints de escritura"""
+    __tablename__ = 'daily_stats'
+    __table_args__ = (
+        db.Index('ux_daily_stats_user_date', 'user_id', 'stat_date', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    stat_date = db.Column(db.Date, nullable=False)
+    tasks_completed = db.Column(db.Integer, default=0)
+    tasks_total = db.Column(db.Integer, default=0)
+    water_intake_ml = db.Column(db.Integer, default=0)
+    water_target_ml = db.Column(db.Integer)
+    exercise_minutes = db.Column(db.Integer, default=0)
+    meals_completed = db.Column(db.Integer, default=0)
+    health_score = db.Column(db.Integer, default=0)  # puntuación calculada del 0-100
+    
+    # Últimas mediciones del día (para tendencias sin leer health_data)
+    weight = db.Column(db.Float)
+    systolic_pressure = db.Column(db.Integer)
+    diastolic_pressure = db.Column(db.Integer)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convertir a diccionario para JSON"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'stat_date': self.stat_date.isoformat() if self.stat_date else None,
+            'tasks_completed': self.tasks_completed,
+            'tasks_total': self.tasks_total,
+            'water_intake_ml': self.water_intake_ml,
+            'water_target_ml': self.water_target_ml,
+            'exercise_minutes': self.exercise_minutes,
+            'meals_completed': self.meals_completed,
+            'health_score': self.health_score,
+            'weight': self.weight,
+            'systolic_pressure': self.systolic_pressure,
+            'diastolic_pressure': self.diastolic_pressure,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class Job(db.Model):
+    """Trabajo diferido de la cola persistente (app/jobs.py)"""
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_status_priority_run_at', 'status', 'priority', 'run_at'),
+        db.Index('ix_jobs_name_status_priority_run_at', 'name', 'status', 'priority', 'run_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON string
+    priority = db.Column(db.Integer, default=0, nullable=False)  # mayor se ejecuta antes
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # disponible desde
+    locked_by = db.Column(db.String(100))
+    locked_until = db.Column(db.DateTime)  # vencido, otro trabajador puede tomarlo
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        """Convertir a diccionario para JSON"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'priority': self.priority,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
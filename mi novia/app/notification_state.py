@@ -0,0 +1,103 @@
+"""
+Estado de las notificaciones por usuario
+La tabla notification_counters guarda la cantidad de no leídas y una versión que cambia con
+cada notificación nueva o marcada como leída, mantenidas en la misma transacción que la
+escritura. La versión sirve de ETag: un sondeo sin cambios se responde con 304 sin leer notificaciones.
+"""
+
+import time
+from datetime import datetime
+
+from sqlalchemy import case, func
+
+from app.models import db, insert_for_dialect, Notification, NotificationCounter
+
+counter_table = NotificationCounter.__table__
+
+# Máximo de ids por petición de marcado masivo
+MAX_BULK_READ_IDS = 500
+
+
+def _initial_version():
+    """Versión de partida de un contador nuevo o reconstruido
+
+    Parte de la hora actual en milisegundos para no repetir una versión que un cliente
+    ya tenga guardada de antes de reconstruir los contadores.
+    """
+    return int(time.time() * 1000)
+
+
+def adjust_notification_counter(user_id, unread_delta=0):
+    """Sumar el delta de no leídas y avanzar la versión en una sola sentencia (sin commit)"""
+    stmt = insert_for_dialect(counter_table).values(
+        user_id=user_id,
+        unread=unread_delta,
+        version=_initial_version(),
+        updated_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={
+            'unread': counter_table.c.unread + stmt.excluded.unread,
+            'version': counter_table.c.version + 1,
+            'updated_at': stmt.excluded.updated_at,
+        }
+    )
+    db.session.execute(stmt)
+
+
+def add_notification(user_id, type, message, priority='normal'):
+    """Agregar a la sesión una notificación no leída y actualizar el contador (sin commit)"""
+    notification = Notification(user_id=user_id, type=type, message=message, priority=priority)
+    db.session.add(notification)
+    adjust_notification_counter(user_id, unread_delta=1)
+    return notification
+
+
+def mark_notifications_read(user_id, ids=None):
+    """Marcar como leídas las notificaciones indicadas (o todas) con un único UPDATE (sin commit)
+
+    Devuelve la cantidad de notificaciones que estaban sin leer.
+    """
+    stmt = db.update(Notification).where(
+        Notification.user_id == user_id,
+        Notification.read == False  # noqa: E712
+    )
+    if ids is not None:
+        stmt = stmt.where(Notification.id.in_(ids))
+    result = db.session.execute(
+        stmt.values(read=True, read_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    )
+    if result.rowcount:
+        adjust_notification_counter(user_id, unread_delta=-result.rowcount)
+    return result.rowcount
+
+
+def get_notification_state(user_id):
+    """Versión y cantidad de no leídas del usuario (0, 0 si nunca tuvo notificaciones)"""
+    row = db.session.query(
+        NotificationCounter.version, NotificationCounter.unread
+    ).filter_by(user_id=user_id).first()
+    return (row.version, row.unread) if row else (0, 0)
+
+
+def rebuild_notification_counters(user_id=None):
+    """Recalcular los contadores desde la tabla de notificaciones (uno o todos los usuarios, sin commit)"""
+    delete = NotificationCounter.query
+    if user_id is not None:
+        delete = delete.filter_by(user_id=user_id)
+    delete.delete(synchronize_session=False)
+
+    aggregate = db.select(
+        Notification.user_id,
+        func.coalesce(func.sum(case((Notification.read == False, 1), else_=0)), 0),  # noqa: E712
+        db.literal(_initial_version()),
+        func.current_timestamp()
+    ).group_by(Notification.user_id)
+    if user_id is not None:
+        aggregate = aggregate.where(Notification.user_id == user_id)
+
+    db.session.execute(counter_table.insert().from_select(
+        ['user_id', 'unread', 'version', 'updated_at'], aggregate
+    ))
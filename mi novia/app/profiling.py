@@ -0,0 +1,164 @@
+"""
+Perfilado opcional de peticiones individuales
+Con PROFILING_ENABLED y un token de administración (cabecera X-Profile o parámetro
+?profile=), la petición se ejecuta bajo cProfile y un muestreador de pila. Se guardan
+un .prof (pstats, snakeviz) y un .folded (pilas colapsadas para flamegraph.pl o
+speedscope) por petición en un directorio rotativo de tamaño acotado.
+"""
+
+import cProfile
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, request
+
+
+def _short_path(filename):
+    """Paquete y archivo de un código ('matplotlib/figure.py'), suficiente para agrupar la pila"""
+    parent, name = os.path.split(filename)
+    return f'{os.path.basename(parent)}/{name}' if parent else name
+
+
+class StackSampler:
+    """Muestreador de la pila de un hilo: cuenta pilas colapsadas 'a;b;c'"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def write(self, path):
+        """Guardar las pilas en formato colapsado: una pila y su cantidad de muestras por línea"""
+        with open(path, 'w', encoding='utf-8') as handle:
+            for stack, count in self.stacks.most_common():
+                handle.write(f'{stack} {count}\n')
+
+
+def _rotate(directory, max_files):
+    """Conservar solo los max_files perfiles más recientes (cada uno con su .prof y su .folded)"""
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith('.prof')),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in profiles[:max(len(profiles) - max_files, 0)]:
+        for path in (entry.path, entry.path[:-len('.prof')] + '.folded'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def profile_name(label):
+    """Nombre de archivo único y ordenable: fecha, milisegundos y etiqueta saneada"""
+    now = time.time()
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', label).strip('-')[:80] or 'request'
+    return f'{time.strftime("%Y%m%d-%H%M%S", time.localtime(now))}-{int(now % 1 * 1000):03d}-{slug}'
+
+
+@contextmanager
+def profile_block(directory, name, max_files=100, interval=0.005):
+    """Perfilar el bloque en el hilo actual y guardar <name>.prof y <name>.folded"""
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), interval)
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, name)
+        profiler.dump_stats(base + '.prof')
+        sampler.write(base + '.folded')
+        _rotate(directory, max_files)
+
+
+class RequestProfiler:
+    """Hooks de Flask que perfilan las peticiones marcadas por un administrador"""
+
+    def __init__(self):
+        # Una petición perfilada por vez: cProfile admite un solo perfilador activo
+        # por proceso en Python 3.12+ y el costo queda acotado
+        self._busy = threading.Lock()
+
+    def init_app(self, app):
+        """Instalar los hooks si PROFILING_ENABLED está activo y hay PROFILING_TOKEN"""
+        if not app.config.get('PROFILING_ENABLED'):
+            return
+        if not app.config.get('PROFILING_TOKEN'):
+            app.logger.warning('PROFILING_ENABLED sin PROFILING_TOKEN: el perfilado queda desactivado')
+            return
+
+        self.token = app.config['PROFILING_TOKEN']
+        self.directory = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+        self.max_files = app.config.get('PROFILE_MAX_FILES', 100)
+        self.interval = app.config.get('PROFILE_SAMPLE_INTERVAL_MS', 5) / 1000
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _requested(self):
+        """Indicar si la petición trae el token de perfilado correcto"""
+        token = request.headers.get('X-Profile') or request.args.get('profile')
+        return bool(token) and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def _before_request(self):
+        if not self._requested() or not self._busy.acquire(blocking=False):
+            return
+        g.profile_name = profile_name(f'{request.method} {request.path}')
+        g.profile_block = profile_block(self.directory, g.profile_name, self.max_files, self.interval)
+        g.profile_block.__enter__()
+
+    @staticmethod
+    def _after_request(response):
+        if 'profile_name' in g:
+            response.headers['X-Profile-Name'] = g.profile_name
+        return response
+
+    def _teardown_request(self, exc):
+        # teardown corre al terminar la respuesta, incluido el cuerpo en streaming
+        block = g.pop('profile_block', None)
+        if block is not None:
+            try:
+                block.__exit__(None, None, None)
+            finally:
+                self._busy.release()
+
+    def job_options(self, label):
+        """Opciones para perfilar en el proceso trabajador el reporte de una petición perfilada"""
+        if 'profile_name' not in g:
+            return None
+        return (self.directory, f'{g.profile_name}-{label}', self.max_files, self.interval)
+
+
+# Instancia compartida (se configura en create_app)
+request_profiler = RequestProfiler()
@@ -0,0 +1,313 @@
+"""
+Generación asíncrona de reportes de salud en un pool de procesos
+El renderizado con matplotlib es intensivo en CPU y retiene el GIL, así que se
+ejecuta fuera del proceso web; la petición solo recibe un identificador de trabajo.
+"""
+
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from app.metrics import render_counter, render_gauge
+
+# Contadores de la caché de gráficos que cada trabajador informa como diferencias
+CACHE_COUNTERS = ('hits', 'disk_hits', 'misses', 'evictions')
+
+
+class QueueFullError(Exception):
+    """La cola de reportes alcanzó su profundidad máxima"""
+
+
+# ==================== CÓDIGO DEL PROCESO TRABAJADOR ====================
+
+_worker_analyzers = {}
+_reported_counters = {}
+
+
+def _init_worker(cache_options=None):
+    """Preparar matplotlib sin interfaz gráfica y la caché de gráficos del proceso trabajador
+
+    cache_options: (max_bytes, disk_dir, max_disk_bytes) de la configuración de la app. Los
+    gráficos se renderizan solo aquí; con disk_dir los trabajadores comparten lo renderizado.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    if cache_options is not None:
+        from app.chart_cache import chart_cache
+        chart_cache.configure(*cache_options)
+
+
+def _to_json_safe(value):
+    """Convertir tipos de NumPy/pandas del reporte a tipos serializables en JSON"""
+    if isinstance(value, dict):
+        return {str(key): _to_json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json_safe(item) for item in value]
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _cache_usage():
+    """Uso de la caché de gráficos del trabajador: contadores desde el último reporte y bytes actuales"""
+    from app.chart_cache import chart_cache
+
+    stats = chart_cache.stats()
+    usage = {name: stats[name] - _reported_counters.get(name, 0) for name in CACHE_COUNTERS}
+    _reported_counters.update((name, stats[name]) for name in CACHE_COUNTERS)
+    usage.update(pid=os.getpid(), bytes=stats['bytes'], disk_bytes=stats['disk_bytes'])
+    return usage
+
+
+def render_report(db_path, user_id, days, fmt='png', profile=None):
+    """Generar el reporte completo de un usuario (se ejecuta en el proceso trabajador)
+
+    Devuelve (reporte, uso de la caché) para que el proceso web publique las métricas de caché.
+    profile: (directorio, nombre, máximo de archivos, intervalo) para perfilar el renderizado
+    """
+    from app.data_analysis import HealthDataAnalyzer
+
+    analyzer = _worker_analyzers.get(db_path)
+    if analyzer is None:
+        analyzer = _worker_analyzers[db_path] = HealthDataAnalyzer(db_path)
+    if profile is None:
+        report = analyzer.generate_health_report(user_id, days, fmt)
+    else:
+        from app.profiling import profile_block
+        with profile_block(*profile):
+            report = analyzer.generate_health_report(user_id, days, fmt)
+    return _to_json_safe(report), _cache_usage()
+
+
+# ==================== CÓDIGO DEL PROCESO WEB ====================
+
+class ReportJob:
+    """Trabajo de generación de un reporte"""
+
+    def __init__(self, user_id, days, fmt='png'):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.days = days
+        self.fmt = fmt
+        self.future = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def key(self):
+        """Clave para deduplicar trabajos idénticos en curso"""
+        return (self.user_id, self.days, self.fmt)
+
+    @property
+    def status(self):
+        """Estado del trabajo: queued, running, done o failed"""
+        if self.future is None or not self.future.done():
+            return 'running' if self.future is not None and self.future.running() else 'queued'
+        if self.future.cancelled() or self.future.exception() is not None:
+            return 'failed'
+        return 'done'
+
+    def to_dict(self, include_result=True):
+        """Convertir a diccionario para JSON"""
+        status = self.status
+        data = {
+            'job_id': self.id,
+            'status': status,
+            'days': self.days,
+            'format': self.fmt,
+            'created_at': datetime.utcfromtimestamp(self.created_at).isoformat(),
+            'finished_at': datetime.utcfromtimestamp(self.finished_at).isoformat() if self.finished_at else None
+        }
+        if status == 'done' and include_result:
+            data['report'] = self.future.result()[0]
+        elif status == 'failed':
+            data['error'] = 'Reporte cancelado' if self.future.cancelled() else str(self.future.exception())
+        return data
+
+
+class ReportJobRunner:
+    """Ejecutor de reportes con cola acotada, deduplicación y reciclado de procesos"""
+
+    def __init__(self, max_workers=2, max_pending=16, recycle_after=50, result_ttl=600):
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._in_flight = {}
+        self._executor = None
+        self._submitted = 0
+        self.cache_options = None
+        self.cache_counters = dict.fromkeys(CACHE_COUNTERS, 0)
+        self._cache_bytes = {}  # pid del trabajador -> bytes en memoria
+        self._cache_disk_bytes = 0
+        self.configure(max_workers, max_pending, recycle_after, result_ttl)
+
+    def configure(self, max_workers=None, max_pending=None, recycle_after=None, result_ttl=None,
+                  cache_options=None):
+        """Ajustar los límites del ejecutor y la caché de gráficos de los trabajadores (desde create_app)"""
+        with self._lock:
+            if cache_options is not None:
+                self.cache_options = tuple(cache_options)
+            if max_workers is not None:
+                self.max_workers = max_workers
+            if max_pending is not None:
+                self.max_pending = max_pending
+            if recycle_after is not None:
+                self.recycle_after = recycle_after
+            if result_ttl is not None:
+                self.result_ttl = result_ttl
+
+    def submit(self, db_path, user_id, days, fmt='png', profile=None):
+        """Encolar un reporte; devuelve (trabajo, creado) o lanza QueueFullError
+
+        Si el usuario ya tiene en curso un reporte idéntico se devuelve ese trabajo
+        (sin perfilar aunque se pida profile).
+        """
+        with self._lock:
+            self._purge_expired()
+
+            job_id = self._in_flight.get((user_id, days, fmt))
+            if job_id is not None:
+                return self._jobs[job_id], False
+
+            if len(self._in_flight) >= self.max_pending:
+                raise QueueFullError('Demasiados reportes en cola')
+
+            job = ReportJob(user_id, days, fmt)
+            args = (render_report, db_path, user_id, days, fmt, profile)
+            try:
+                job.future = self._get_executor().submit(*args)
+            except BrokenProcessPool:
+                # Un trabajador murió de forma abrupta (p. ej. sin memoria) y el pool quedó
+                # inutilizable: se descarta y el reporte va a un pool nuevo
+                self._discard_executor()
+                job.future = self._get_executor().submit(*args)
+            self._jobs[job.id] = job
+            self._in_flight[job.key] = job.id
+
+        job.future.add_done_callback(lambda _future, job=job: self._finish(job))
+        return job, True
+
+    def get(self, job_id):
+        """Obtener un trabajo por id o None"""
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        """Profundidad de cola y contadores del ejecutor"""
+        with self._lock:
+            return {
+                'pending': len(self._in_flight),
+                'max_pending': self.max_pending,
+                'stored': len(self._jobs),
+                'submitted': self._submitted
+            }
+
+    def render_metrics(self):
+        """Cola de reportes y caché de gráficos de los trabajadores en formato Prometheus"""
+        with self._lock:
+            counters = self.cache_counters
+            lines = []
+            render_gauge(lines, 'report_jobs_pending', 'Reportes en cola o en curso', (),
+                         {(): len(self._in_flight)})
+            render_counter(lines, 'chart_cache_lookups_total',
+                           'Búsquedas en la caché de gráficos de los trabajadores por resultado',
+                           ('result',), {'memory_hit': counters['hits'] - counters['disk_hits'],
+                                         'disk_hit': counters['disk_hits'],
+                                         'miss': counters['misses']}, single=True)
+            render_counter(lines, 'chart_cache_evictions_total', 'Gráficos desalojados de la caché',
+                           (), {(): counters['evictions']})
+            render_gauge(lines, 'chart_cache_bytes', 'Bytes de gráficos en caché por nivel',
+                         ('tier',), {'memory': sum(self._cache_bytes.values()),
+                                     'disk': self._cache_disk_bytes}, single=True)
+        return '\n'.join(lines) + '\n'
+
+    def shutdown(self):
+        """Detener el ejecutor actual (fuera del lock: los futures cancelados llaman a _finish)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finish(self, job):
+        """Marcar un trabajo como terminado, liberar su clave de deduplicación y sumar el uso de caché"""
+        usage = None
+        if not job.future.cancelled() and job.future.exception() is None:
+            usage = job.future.result()[1]
+        with self._lock:
+            job.finished_at = time.time()
+            if self._in_flight.get(job.key) == job.id:
+                del self._in_flight[job.key]
+            if usage is not None:
+                self._record_cache_usage(usage)
+
+    def _record_cache_usage(self, usage):
+        """Acumular el uso de caché informado por un trabajador (requiere el lock)
+
+        Los bytes en memoria se suman por proceso; como nunca hay más de max_workers
+        procesos vivos, se conservan solo los que informaron más recientemente.
+        """
+        for name in CACHE_COUNTERS:
+            self.cache_counters[name] += usage[name]
+        self._cache_bytes.pop(usage['pid'], None)
+        self._cache_bytes[usage['pid']] = usage['bytes']
+        while len(self._cache_bytes) > self.max_workers:
+            del self._cache_bytes[next(iter(self._cache_bytes))]
+        self._cache_disk_bytes = usage['disk_bytes']
+
+    def _discard_executor(self):
+        """Descartar un pool roto y los trabajos que tenía (requiere el lock)
+
+        El propio pool termina sus futures con BrokenProcessPool, así que esos trabajos
+        quedan como failed; se liberan sus claves para que un reintento se vuelva a encolar.
+        Sin cancel_futures: cancelar ejecutaría aquí _finish, que espera este mismo lock.
+        """
+        self._executor.shutdown(wait=False)
+        self._executor = None
+        self._in_flight.clear()
+
+    def _get_executor(self):
+        """Obtener el pool, creándolo la primera vez (requiere el lock)
+
+        Cada proceso trabajador se reemplaza tras recycle_after reportes
+        (max_tasks_per_child, Python 3.11+), lo que libera la memoria que matplotlib
+        acumula entre renderizados sin detener el pool ni los demás procesos.
+        """
+        if self._executor is None:
+            options = {}
+            if sys.version_info >= (3, 11):
+                options['max_tasks_per_child'] = self.recycle_after
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.cache_options,),
+                **options
+            )
+
+        self._submitted += 1
+        return self._executor
+
+    def _purge_expired(self):
+        """Descartar resultados terminados hace más de result_ttl segundos (requiere el lock)"""
+        limit = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < limit]:
+            del self._jobs[job_id]
+
+
+# Ejecutor compartido por las peticiones del proceso web
+report_runner = ReportJobRunner()
@@ -1,5 +1,18 @@
-from flask import Blueprint, request, jsonify, render_template, session, redirect, url_for, flash
+from flask import Blueprint, request, jsonify, render_template, session, redirect, url_for, flash, current_app, Response, stream_with_context
 from app.models import db, User, HealthData, Task, Notification, HealthAlert, Medication
+from app.health_writes import upsert_health_data, apply_health_readings, daily_health_summary, parse_reading, ReadingError, MAX_BATCH_READINGS
+from app.task_stats import adjust_task_counters, get_task_completion_stats
+from app.serialization import notification_serializer
+from app.task_queries import parse_task_filters, parse_page_size, query_tasks_page, TaskQueryError
+from app.notification_state import add_notification, mark_notifications_read, get_notification_state, MAX_BULK_READ_IDS
+from app.daily_stats import refresh_daily_stats, get_daily_stats_trends, get_daily_stats_columns, GRANULARITIES
+from app.report_jobs import report_runner, QueueFullError
+from app.export import EXPORT_TABLES, EXPORT_FORMATS, generate_export
+from app.metrics import request_metrics, scrape_allowed
+from app.profiling import request_profiler
+from app.events import event_broker, StreamLimitError
+from app.alerts import alert_engine
+from app.jobs import job_queue
 from datetime import datetime, date, timedelta
 import json
 
@@ -126,39 +139,67 @@ def logout():
     session.pop('user_id', None)
     return redirect(url_for('main.index'))
 
+@main_bp.route('/metrics')
+def metrics():
+    """Métricas por endpoint, de la cola de trabajos y de los reportes en formato de texto de Prometheus"""
+    if not current_app.config.get('METRICS_ENABLED'):
+        return jsonify({'error': 'Métricas desactivadas'}), 404
+    if not scrape_allowed():
+        return jsonify({'error': 'No autorizado'}), 403
+    return Response(request_metrics.render() + job_queue.render_metrics() + report_runner.render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 # ==================== API ENDPOINTS ====================
 
+def data_changed(user_id, days, health=False):
+    """Actualizar los datos derivados tras escribir datos de salud (health=True) o tareas (antes del commit)"""
+    refresh_daily_stats(user_id, days)
+    if not health:
+        return
+    
+    # Las reglas de alertas se evalúan fuera de la petición, después del commit
+    alert_engine.evaluate_after_commit(db.session, user_id)
+    
+    # Resumen del día para los dashboards abiertos (se publica al confirmar)
+    today = date.today()
+    if today in days and event_broker.has_subscribers(user_id):
+        event_broker.publish_after_commit(db.session, user_id, 'summary', daily_health_summary(user_id, today))
+
+def parse_today_reading(reading):
+    """Validar la lectura de un endpoint individual con las reglas de /health/batch; devuelve (valores, incrementos)"""
+    _, values, increments = parse_reading(reading, date.today())
+    return values, increments
+
 @api_bp.route('/health/water', methods=['POST'])
 def add_water():
     """Agregar consumo de agua"""
     if 'user_id' not in session:
         return jsonify({'error': 'No autorizado'}), 401
     
-    data = request.get_json()
-    amount = data.get('amount', 0)
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        _, increments = parse_today_reading({'type': 'water', 'amount': data.get('amount')})
+    except ReadingError as error:
+        return jsonify({'error': str(error)}), 400
     
+    amount = increments['water_intake']
     user_id = session['user_id']
     today = date.today()
     
-    # Obtener o crear datos de salud del día
-    health_data = HealthData.query.filter_by(user_id=user_id, date=today).first()
-    if not health_data:
-        health_data = HealthData(user_id=user_id, date=today)
-        db.session.add(health_data)
-    
-    health_data.water_intake += amount
-    db.session.commit()
+    # Sumar el consumo en una sola sentencia (crea el registro del día si no existe)
+    health_data = upsert_health_data(user_id, today, increments={'water_intake': amount})
+    data_changed(user_id, [today], health=True)
     
-    # Verificar si se alcanzó la meta
-    if health_data.water_intake >= health_data.water_target:
-        notification = Notification(
-            user_id=user_id,
+    # Notificar solo cuando esta toma alcanza la meta
+    if health_data.water_intake - amount < health_data.water_target <= health_data.water_intake:
+        add_notification(
+            user_id,
             type='achievement',
             message='🎉 ¡Meta de agua alcanzada!',
             priority='normal'
         )
-        db.session.add(notification)
-        db.session.commit()
+    
+    db.session.commit()
     
     return jsonify({'success': True, 'water_intake': health_data.water_intake})
 
@@ -168,46 +209,25 @@ def add_blood_pressure():
     if 'user_id' not in session:
         return jsonify({'error': 'No autorizado'}), 401
     
-    data = request.get_json()
-    systolic = data.get('systolic')
-    diastolic = data.get('diastolic')
+    data = request.get_json(silent=True) or {}
     
-    if not systolic or not diastolic:
-        return jsonify({'error': 'Presión sistólica y diastólica requeridas'}), 400
+    try:
+        values, _ = parse_today_reading({
+            'type': 'blood_pressure',
+            'systolic': data.get('systolic'),
+            'diastolic': data.get('diastolic')
+        })
+    except ReadingError as error:
+        return jsonify({'error': str(error)}), 400
     
     user_id = session['user_id']
     today = date.today()
     
-    # Obtener o crear datos de salud del día
-    health_data = HealthData.query.filter_by(user_id=user_id, date=today).first()
-    if not health_data:
-        health_data = HealthData(user_id=user_id, date=today)
-        db.session.add(health_data)
-    
-    health_data.systolic_pressure = systolic
-    health_data.diastolic_pressure = diastolic
+    # Registrar la lectura en una sola sentencia (crea el registro del día si no existe)
+    upsert_health_data(user_id, today, values=values)
+    data_changed(user_id, [today], health=True)
     db.session.commit()
     
-    # Verificar si está en rango peligroso
-    if systolic > 140 or diastolic > 90:
-        alert = HealthAlert(
-            user_id=user_id,
-            alert_type='high_blood_pressure',
-            level='high',
-            message='Tu presión arterial está elevada. Consulta a tu médico.',
-            action_recommended='Reduce el sodio y aumenta la actividad física'
-        )
-        db.session.add(alert)
-        
-        notification = Notification(
-            user_id=user_id,
-            type='health_alert',
-            message='⚠️ Presión arterial elevada detectada',
-            priority='urgent'
-        )
-        db.session.add(notification)
-        db.session.commit()
-    
     return jsonify({'success': True})
 
 @api_bp.route('/health/weight', methods=['POST'])
@@ -216,22 +236,19 @@ def add_weight():
     if 'user_id' not in session:
         return jsonify({'error': 'No autorizado'}), 401
     
-    data = request.get_json()
-    weight = data.get('weight')
+    data = request.get_json(silent=True) or {}
     
-    if not weight:
-        return jsonify({'error': 'Peso requerido'}), 400
+    try:
+        values, _ = parse_today_reading({'type': 'weight', 'weight': data.get('weight')})
+    except ReadingError as error:
+        return jsonify({'error': str(error)}), 400
     
     user_id = session['user_id']
     today = date.today()
     
-    # Obtener o crear datos de salud del día
-    health_data = HealthData.query.filter_by(user_id=user_id, date=today).first()
-    if not health_data:
-        health_data = HealthData(user_id=user_id, date=today)
-        db.session.add(health_data)
-    
-    health_data.weight = weight
+    # Registrar el peso en una sola sentencia (crea el registro del día si no existe)
+    upsert_health_data(user_id, today, values=values)
+    data_changed(user_id, [today], health=True)
     db.session.commit()
     
     return jsonify({'success': True})
@@ -242,32 +259,79 @@ def toggle_meal():
     if 'user_id' not in session:
         return jsonify({'error': 'No autorizado'}), 401
     
-    data = request.get_json()
-    meal_type = data.get('meal_type')  # breakfast, lunch, dinner
+    data = request.get_json(silent=True) or {}
     
-    if meal_type not in ['breakfast', 'lunch', 'dinner']:
-        return jsonify({'error': 'Tipo de comida inválido'}), 400
+    try:
+        # breakfast, lunch o dinner; el endpoint alterna el estado, no usa completed
+        values, _ = parse_today_reading({'type': 'meal', 'meal_type': data.get('meal_type')})
+    except ReadingError as error:
+        return jsonify({'error': str(error)}), 400
     
     user_id = session['user_id']
     today = date.today()
     
-    # Obtener o crear datos de salud del día
-    health_data = HealthData.query.filter_by(user_id=user_id, date=today).first()
-    if not health_data:
-        health_data = HealthData(user_id=user_id, date=today)
-        db.session.add(health_data)
+    # Alternar el estado de la comida en una sola sentencia
+    column = next(iter(values))
+    health_data = upsert_health_data(user_id, today, toggles=(column,))
+    data_changed(user_id, [today], health=True)
+    db.session.commit()
+    
+    return jsonify({'success': True, 'completed': bool(getattr(health_data, column))})
+
+@api_bp.route('/health/exercise', methods=['POST'])
+def add_exercise():
+    """Registrar minutos de ejercicio"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
+    
+    data = request.get_json(silent=True) or {}
     
-    # Alternar estado de la comida
-    if meal_type == 'breakfast':
-        health_data.breakfast_completed = not health_data.breakfast_completed
-    elif meal_type == 'lunch':
-        health_data.lunch_completed = not health_data.lunch_completed
-    elif meal_type == 'dinner':
-        health_data.dinner_completed = not health_data.dinner_completed
+    try:
+        values, increments = parse_today_reading({
+            'type': 'exercise',
+            'minutes': data.get('minutes'),
+            'exercise_type': data.get('type')
+        })
+    except ReadingError as error:
+        return jsonify({'error': str(error)}), 400
     
+    user_id = session['user_id']
+    today = date.today()
+    
+    health_data = upsert_health_data(user_id, today, values=values, increments=increments)
+    data_changed(user_id, [today], health=True)
     db.session.commit()
     
-    return jsonify({'success': True})
+    return jsonify({'success': True, 'exercise_minutes': health_data.exercise_minutes})
+
+@api_bp.route('/health/batch', methods=['POST'])
+def add_health_batch():
+    """Registrar en una sola transacción un lote de lecturas de salud (sincronización móvil)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
+    
+    data = request.get_json(silent=True)
+    readings = data.get('readings') if isinstance(data, dict) else data
+    
+    if not isinstance(readings, list) or not readings:
+        return jsonify({'error': 'Se requiere una lista de lecturas'}), 400
+    
+    if len(readings) > MAX_BATCH_READINGS:
+        return jsonify({'error': f'Máximo {MAX_BATCH_READINGS} lecturas por lote'}), 413
+    
+    user_id = session['user_id']
+    results, days = apply_health_readings(user_id, readings)
+    data_changed(user_id, days, health=True)
+    db.session.commit()
+    
+    accepted = sum(1 for result in results if result['status'] == 'ok')
+    return jsonify({
+        'success': accepted > 0,
+        'accepted': accepted,
+        'rejected': len(results) - accepted,
+        'dates': [day.isoformat() for day in days],
+        'results': results
+    })
 
 @api_bp.route('/tasks', methods=['GET', 'POST'])
 def tasks():
@@ -278,9 +342,14 @@ def tasks():
     user_id = session['user_id']
     
     if request.method == 'GET':
-        # Obtener tareas del usuario
-        tasks = Task.query.filter_by(user_id=user_id).order_by(Task.due_date.desc()).all()
-        return jsonify([task.to_dict() for task in tasks])
+        # Obtener una página de tareas del usuario (más recientes primero, sin fecha al final)
+        try:
+            filters = parse_task_filters(request.args)
+            limit = parse_page_size(request.args)
+            tasks, next_cursor = query_tasks_page(user_id, filters, request.args.get('cursor'), limit)
+        except TaskQueryError as error:
+            return jsonify({'error': str(error)}), 400
+        return jsonify({'tasks': tasks, 'next_cursor': next_cursor})
     
     elif request.method == 'POST':
         # Crear nueva tarea
@@ -298,6 +367,8 @@ def tasks():
         )
         
         db.session.add(task)
+        adjust_task_counters(user_id, task.category, total_delta=1)
+        data_changed(user_id, [task.due_date])
         db.session.commit()
         
         return jsonify({'success': True, 'task': task.to_dict()})
@@ -319,9 +390,12 @@ def task_detail(task_id):
         data = request.get_json()
         
         if 'completed' in data:
+            was_completed = bool(task.completed)
             task.completed = data['completed']
             if data['completed']:
                 task.completed_at = datetime.utcnow()
+            adjust_task_counters(user_id, task.category,
+                                 completed_delta=int(bool(task.completed)) - int(was_completed))
         
         if 'title' in data:
             task.title = data['title']
@@ -329,25 +403,89 @@ def task_detail(task_id):
         if 'description' in data:
             task.description = data['description']
         
+        data_changed(user_id, [task.due_date])
         db.session.commit()
         return jsonify({'success': True, 'task': task.to_dict()})
     
     elif request.method == 'DELETE':
         # Eliminar tarea
+        adjust_task_counters(user_id, task.category, total_delta=-1,
+                             completed_delta=-int(bool(task.completed)))
         db.session.delete(task)
+        data_changed(user_id, [task.due_date])
         db.session.commit()
         return jsonify({'success': True})
 
+def notification_etag(user_id, version, *variant):
+    """ETag de una respuesta de notificaciones: cambia con cada notificación nueva o leída
+
+    variant distingue el endpoint y los parámetros (since, limit), para que una página
+    nunca se valide con el ETag de otra.
+    """
+    return '-'.join(map(str, (f'n{user_id}', version) + variant))
+
+def notification_response(payload, etag, unread):
+    """Respuesta JSON con ETag y cantidad de no leídas; el navegador debe revalidar siempre"""
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['X-Unread-Count'] = str(unread)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def notifications_not_modified(etag):
+    """Responder 304 si el cliente ya tiene la versión actual (sin leer las notificaciones)"""
+    if not request.if_none_match.contains(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @api_bp.route('/notifications', methods=['GET'])
 def get_notifications():
-    """Obtener notificaciones del usuario"""
+    """Obtener notificaciones del usuario
+
+    Con ?since=<id> devuelve las posteriores a la última que vio el cliente, de la más
+    antigua a la más nueva; con más de `limit` pendientes el cliente pide la siguiente
+    página pasando como since el id de la última recibida.
+    Responde 304 a If-None-Match mientras la versión de sus notificaciones no cambie.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
+    
+    user_id = session['user_id']
+    since = request.args.get('since', type=int)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    
+    version, unread = get_notification_state(user_id)
+    etag = notification_etag(user_id, version, 'list', '' if since is None else since, limit)
+    not_modified = notifications_not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    
+    stmt = notification_serializer.select().where(Notification.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(Notification.id > since).order_by(Notification.id)
+    else:
+        stmt = stmt.order_by(Notification.created_at.desc())
+    _, notifications = notification_serializer.fetch(stmt.limit(limit))
+    
+    return notification_response(notifications, etag, unread)
+
+@api_bp.route('/notifications/unread-count', methods=['GET'])
+def get_unread_notifications_count():
+    """Cantidad de notificaciones sin leer (desde el contador, sin recorrer la tabla)"""
     if 'user_id' not in session:
         return jsonify({'error': 'No autorizado'}), 401
     
     user_id = session['user_id']
-    notifications = Notification.query.filter_by(user_id=user_id).order_by(Notification.created_at.desc()).limit(20).all()
+    version, unread = get_notification_state(user_id)
+    etag = notification_etag(user_id, version, 'count')
+    not_modified = notifications_not_modified(etag)
+    if not_modified is not None:
+        return not_modified
     
-    return jsonify([notification.to_dict() for notification in notifications])
+    return notification_response({'unread_count': unread}, etag, unread)
 
 @api_bp.route('/notifications/<int:notification_id>/read', methods=['PUT'])
 def mark_notification_read(notification_id):
@@ -356,16 +494,38 @@ def mark_notification_read(notification_id):
         return jsonify({'error': 'No autorizado'}), 401
     
     user_id = session['user_id']
-    notification = Notification.query.filter_by(id=notification_id, user_id=user_id).first()
+    if not mark_notifications_read(user_id, [notification_id]):
+        # Sin filas actualizadas: ya estaba leída o no existe
+        exists = db.session.query(Notification.id).filter_by(id=notification_id, user_id=user_id).first()
+        if not exists:
+            return jsonify({'error': 'Notificación no encontrada'}), 404
+    db.session.commit()
+    
+    return jsonify({'success': True})
+
+@api_bp.route('/notifications/read', methods=['PUT'])
+def mark_notifications_read_bulk():
+    """Marcar como leídas varias notificaciones ({"ids": [...]}) o todas ({"all": true})"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
     
-    if not notification:
-        return jsonify({'error': 'Notificación no encontrada'}), 404
+    data = request.get_json(silent=True) or {}
+    ids = None
+    if not data.get('all'):
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not ids or \
+                not all(isinstance(value, int) and not isinstance(value, bool) for value in ids):
+            return jsonify({'error': 'Se requiere "ids" (lista de enteros) o "all": true'}), 400
+        if len(ids) > MAX_BULK_READ_IDS:
+            return jsonify({'error': f'Máximo {MAX_BULK_READ_IDS} notificaciones por petición'}), 400
     
-    notification.read = True
-    notification.read_at = datetime.utcnow()
+    user_id = session['user_id']
+    updated = mark_notifications_read(user_id, ids)
     db.session.commit()
     
-    return jsonify({'success': True})
+    version, unread = get_notification_state(user_id)
+    return notification_response({'success': True, 'updated': updated, 'unread_count': unread},
+                                 notification_etag(user_id, version, 'read'), unread)
 
 @api_bp.route('/analytics/health-trends', methods=['GET'])
 def health_trends():
@@ -376,19 +536,25 @@ def health_trends():
     user_id = session['user_id']
     days = request.args.get('days', 30, type=int)
     
-    # Obtener datos de salud de los últimos N días
+    # Por día salvo que el cliente pida agregar por semana (ISO) o mes
+    granularity = request.args.get('granularity', 'day')
+    
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': 'Granularidad inválida'}), 400
+    
+    # points: lista de objetos por fecha; columnar: un arreglo por serie
+    response_format = request.args.get('format', 'points')
+    
+    if response_format not in ('points', 'columnar'):
+        return jsonify({'error': 'Formato inválido (points o columnar)'}), 400
+    
+    # Tendencias de los últimos N días desde el resumen diario
     start_date = date.today() - timedelta(days=days)
-    health_data = HealthData.query.filter(
-        HealthData.user_id == user_id,
-        HealthData.date >= start_date
-    ).order_by(HealthData.date).all()
-    
-    trends = {
-        'water_intake': [{'date': hd.date.isoformat(), 'value': hd.water_intake} for hd in health_data if hd.water_intake],
-        'weight': [{'date': hd.date.isoformat(), 'value': hd.weight} for hd in health_data if hd.weight],
-        'blood_pressure': [{'date': hd.date.isoformat(), 'systolic': hd.systolic_pressure, 'diastolic': hd.diastolic_pressure} for hd in health_data if hd.systolic_pressure and hd.diastolic_pressure],
-        'exercise': [{'date': hd.date.isoformat(), 'minutes': hd.exercise_minutes} for hd in health_data if hd.exercise_minutes]
-    }
+    
+    if response_format == 'columnar':
+        return jsonify(get_daily_stats_columns(user_id, start_date, granularity))
+    
+    trends = get_daily_stats_trends(user_id, start_date, granularity)
     
     return jsonify(trends)
 
@@ -400,29 +566,49 @@ def task_completion_stats():
     
     user_id = session['user_id']
     
-    # Estadísticas generales
-    total_tasks = Task.query.filter_by(user_id=user_id).count()
-    completed_tasks = Task.query.filter_by(user_id=user_id, completed=True).count()
-    
-    # Estadísticas por categoría
-    categories = ['personal', 'work', 'exercise', 'food', 'health']
-    category_stats = {}
-    
-    for category in categories:
-        total = Task.query.filter_by(user_id=user_id, category=category).count()
-        completed = Task.query.filter_by(user_id=user_id, category=category, completed=True).count()
-        category_stats[category] = {
-            'total': total,
-            'completed': completed,
-            'completion_rate': (completed / total * 100) if total > 0 else 0
-        }
+    use_counters = current_app.config['TASK_COUNTERS_ENABLED']
     
-    return jsonify({
-        'total_tasks': total_tasks,
-        'completed_tasks': completed_tasks,
-        'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
-        'category_stats': category_stats
-    })
+    return jsonify(get_task_completion_stats(user_id, use_counters=use_counters))
+
+@api_bp.route('/analytics/report', methods=['POST'])
+def create_health_report():
+    """Encolar la generación del reporte completo de salud"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    days = data.get('days', 30)
+    
+    if not isinstance(days, int) or not 1 <= days <= 365:
+        return jsonify({'error': 'Días inválidos (1-365)'}), 400
+    
+    # png: imágenes base64 de matplotlib; svg: marcado vectorial ligero
+    fmt = data.get('format', 'png')
+    
+    if fmt not in ('png', 'svg'):
+        return jsonify({'error': 'Formato inválido (png o svg)'}), 400
+    
+    try:
+        # Si la petición se perfila, el renderizado en el trabajador también
+        profile = request_profiler.job_options(f'report-{fmt}')
+        job, created = report_runner.submit(db.engine.url.database, session['user_id'], days, fmt, profile)
+    except QueueFullError:
+        return jsonify({'error': 'Demasiados reportes en cola, intenta más tarde'}), 503
+    
+    return jsonify({'job_id': job.id, 'status': job.status, 'created': created}), 202
+
+@api_bp.route('/analytics/report/<job_id>', methods=['GET'])
+def get_health_report(job_id):
+    """Obtener el estado o el resultado de un reporte encolado"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
+    
+    job = report_runner.get(job_id)
+    
+    if not job or job.user_id != session['user_id']:
+        return jsonify({'error': 'Reporte no encontrado'}), 404
+    
+    return jsonify(job.to_dict())
 
 @api_bp.route('/health/summary', methods=['GET'])
 def health_summary():
@@ -472,3 +658,63 @@ def health_summary():
         'blood_pressure': blood_pressure,
         'weight': health_data.weight
     })
+
+@api_bp.route('/stream', methods=['GET'])
+def event_stream():
+    """Stream de eventos (SSE) del usuario: notificaciones, alertas y resumen del día"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
+    
+    # EventSource reenvía el último id recibido al reconectar
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID inválido'}), 400
+    
+    try:
+        subscription, replay, resync = event_broker.subscribe(session['user_id'], last_event_id)
+    except StreamLimitError:
+        return jsonify({'error': 'Demasiadas conexiones abiertas, intenta más tarde'}), 503
+    
+    config = current_app.config
+    body = event_broker.stream(subscription, replay, resync,
+                               heartbeat=config['STREAM_HEARTBEAT_SECONDS'],
+                               max_seconds=config['STREAM_MAX_SECONDS'])
+    response = Response(body, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Libera el lugar aunque el cliente se desconecte antes de empezar a leer
+    response.call_on_close(subscription.close)
+    return response
+
+@api_bp.route('/export', methods=['GET'])
+def export_data():
+    """Exportar el historial completo del usuario en streaming (NDJSON o CSV, gzip opcional)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
+    
+    fmt = request.args.get('format', 'ndjson')
+    
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Formato inválido (ndjson o csv)'}), 400
+    
+    tables = request.args.get('tables')
+    table_names = tables.split(',') if tables else list(EXPORT_TABLES)
+    
+    if any(name not in EXPORT_TABLES for name in table_names):
+        return jsonify({'error': f'Tablas válidas: {", ".join(EXPORT_TABLES)}'}), 400
+    
+    # Cada tabla tiene columnas distintas, así que un CSV contiene una sola
+    if fmt == 'csv' and len(table_names) != 1:
+        return jsonify({'error': 'El formato csv requiere una única tabla en tables'}), 400
+    
+    compress = request.args.get('gzip', 'false').lower() in ('1', 'true')
+    filename = f'export-{table_names[0] if fmt == "csv" else "historial"}.{fmt}'
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    
+    body = generate_export(session['user_id'], table_names, fmt, compress)
+    return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt], headers=headers)
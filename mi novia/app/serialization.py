@@ -0,0 +1,108 @@
+"""
+Serialización rápida de listados
+Los listados seleccionan solo las columnas de to_dict como tuplas (sin objetos del ORM ni
+identity map) y las convierten a diccionarios con conversores por columna precalculados.
+Si orjson está instalado, las respuestas JSON se codifican con él cuando la salida es la
+misma, byte a byte, que la del proveedor JSON por defecto de Flask.
+"""
+
+import re
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime, select
+
+from app.models import db, Task, Notification
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+
+class RowSerializer:
+    """Columnas de un to_dict y su conversión desde filas de session.execute(select(...))"""
+
+    def __init__(self, model, fields):
+        self.fields = tuple(fields)
+        self.columns = [getattr(model, field) for field in self.fields]
+        # Índices de las columnas de fecha: las demás se copian tal cual
+        self.date_indexes = [
+            index for index, column in enumerate(self.columns)
+            if isinstance(column.type, (Date, DateTime))
+        ]
+
+    def select(self):
+        """SELECT de las columnas del serializador, para encadenar filtros y orden"""
+        return select(*self.columns)
+
+    def to_dicts(self, rows):
+        """Convertir filas en diccionarios con la misma forma que Model.to_dict()"""
+        fields, date_indexes = self.fields, self.date_indexes
+        result = []
+        for row in rows:
+            values = list(row)
+            for index in date_indexes:
+                value = values[index]
+                values[index] = value.isoformat() if value else None
+            result.append(dict(zip(fields, values)))
+        return result
+
+    def fetch(self, stmt):
+        """Ejecutar el SELECT en la sesión y devolver (filas, diccionarios)"""
+        rows = db.session.execute(stmt).all()
+        return rows, self.to_dicts(rows)
+
+
+task_serializer = RowSerializer(Task, (
+    'id', 'user_id', 'title', 'description', 'category', 'priority', 'completed',
+    'due_date', 'due_time', 'reminder_enabled', 'created_at', 'completed_at',
+))
+
+notification_serializer = RowSerializer(Notification, (
+    'id', 'user_id', 'type', 'message', 'priority', 'read', 'created_at', 'read_at',
+))
+
+
+# ==================== CODIFICACIÓN JSON ====================
+
+# Exponentes que orjson escribe sin signo (1e16 frente a 1e+16 de repr()). El patrón empieza
+# por el literal para que la búsqueda sea rápida; también coincide con texto como "2e", lo que
+# solo cuesta usar el camino por defecto.
+_UNSIGNED_EXPONENT = re.compile(rb'e(?<=[0-9]e)')
+
+
+def _stdlib_output_differs(data):
+    """Indicar si json.dumps escribiría distinto la salida de orjson
+
+    Ocurre con texto no ASCII o DEL (json.dumps los escapa como \\uXXXX), con exponentes
+    y con decimales por debajo de 1e-4, que repr() escribe con exponente (1e-05).
+    """
+    return not data.isascii() or b'\x7f' in data or b'0.0000' in data or \
+        _UNSIGNED_EXPONENT.search(data) is not None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask que usa orjson para las respuestas compactas
+
+    Fechas, dataclasses y demás tipos no nativos pasan por el mismo default de Flask y
+    las claves se ordenan. Si la salida de orjson pudiera diferir de la de json.dumps
+    (texto no ASCII, floats con exponente, claves no str, enteros de más de 64 bits) se
+    vuelve a codificar con json.dumps, así que la respuesta no cambia. Escapar el texto
+    no ASCII a posteriori resultó más lento que json.dumps, por eso no se hace.
+    La única diferencia son NaN e infinitos, que orjson escribe como null.
+    """
+
+    options = (orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME |
+               orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs != {'separators': (',', ':')} or \
+                not self.ensure_ascii or not self.sort_keys:
+            return super().dumps(obj, **kwargs)
+        try:
+            data = orjson.dumps(obj, default=self.default, option=self.options)
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+        if _stdlib_output_differs(data):
+            return super().dumps(obj, **kwargs)
+        return data.decode('ascii')
@@ -0,0 +1,199 @@
+"""
+Perfil de almacenamiento SQLite para producción
+Cada conexión nueva activa WAL (los lectores no bloquean al escritor), synchronous=NORMAL,
+espera ante bloqueos y cachés más grandes; el pool del motor se dimensiona por
+configuración y PRAGMA optimize / wal_checkpoint se ejecutan periódicamente en segundo plano.
+Las lecturas analíticas usan un pool aparte de conexiones de solo lectura.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+from flask import current_app
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+# La misma base que usa la app (Flask-SQLAlchemy resuelve sqlite:///life_organizer.db en instance/)
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'instance', 'life_organizer.db')
+
+# Motores de solo lectura del proceso: (ruta absoluta, opciones) -> motor
+_read_only_engines = {}
+_read_only_lock = threading.Lock()
+
+
+def is_sqlite_file(uri):
+    """Indicar si la URI apunta a un archivo SQLite (no a una base en memoria)"""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS del perfil: tamaño del pool y espera del driver"""
+    if config['DB_STORAGE_PROFILE'] != 'production' or not is_sqlite_file(config['SQLALCHEMY_DATABASE_URI']):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_pre_ping': False,
+        'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000, 'check_same_thread': False},
+    }
+
+
+def connection_pragmas(config):
+    """Sentencias PRAGMA que se ejecutan en cada conexión nueva"""
+    return [
+        'PRAGMA journal_mode = WAL',
+        'PRAGMA synchronous = NORMAL',
+        f'PRAGMA busy_timeout = {int(config["SQLITE_BUSY_TIMEOUT_MS"])}',
+        f'PRAGMA mmap_size = {int(config["SQLITE_MMAP_SIZE"])}',
+        f'PRAGMA cache_size = {int(config["SQLITE_CACHE_SIZE"])}',
+        'PRAGMA temp_store = MEMORY',
+    ]
+
+
+def _set_pragmas(pragmas):
+    """Listener de 'connect' que ejecuta las sentencias PRAGMA en cada conexión nueva"""
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in pragmas:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+    return set_sqlite_pragmas
+
+
+def read_only_engine(db_path, pool_size=4, max_overflow=4, busy_timeout_ms=5000,
+                     mmap_size=256 * 1024 * 1024, cache_size=-16000):
+    """Motor de solo lectura sobre un archivo SQLite, compartido por todo el proceso
+
+    Las conexiones se abren con mode=ro y query_only, así que ninguna lectura
+    analítica puede tomar el bloqueo de escritura ni ocupar el pool de la app.
+    """
+    if db_path in (None, '', ':memory:'):
+        return create_engine('sqlite://')
+
+    path = os.path.abspath(db_path)
+    key = (path, pool_size, max_overflow, busy_timeout_ms, mmap_size, cache_size)
+    with _read_only_lock:
+        engine = _read_only_engines.get(key)
+        if engine is not None:
+            return engine
+
+        uri = f'file:{urllib.parse.quote(path)}?mode=ro'
+
+        def connect():
+            return sqlite3.connect(uri, uri=True, timeout=busy_timeout_ms / 1000, check_same_thread=False)
+
+        # El creator evita que la URL de SQLAlchemy tenga que codificar la ruta (espacios, etc.)
+        engine = create_engine('sqlite://', creator=connect, poolclass=QueuePool,
+                               pool_size=pool_size, max_overflow=max_overflow)
+        event.listen(engine, 'connect', _set_pragmas([
+            f'PRAGMA busy_timeout = {int(busy_timeout_ms)}',
+            f'PRAGMA mmap_size = {int(mmap_size)}',
+            f'PRAGMA cache_size = {int(cache_size)}',
+            'PRAGMA temp_store = MEMORY',
+            'PRAGMA query_only = ON',
+        ]))
+        _read_only_engines[key] = engine
+        return engine
+
+
+def analytics_engine():
+    """Motor para lecturas analíticas dentro de la app
+
+    Con el perfil 'production' y ANALYTICS_READ_ONLY_POOL es el pool de solo lectura
+    de la base de la app; en otro caso, el mismo db.engine de Flask-SQLAlchemy.
+    """
+    from app.models import db
+
+    config = current_app.config
+    if config['DB_STORAGE_PROFILE'] != 'production' or not config['ANALYTICS_READ_ONLY_POOL'] or \
+            not is_sqlite_file(config['SQLALCHEMY_DATABASE_URI']):
+        return db.engine
+    return read_only_engine(db.engine.url.database,
+                            pool_size=config['ANALYTICS_POOL_SIZE'],
+                            max_overflow=config['ANALYTICS_MAX_OVERFLOW'],
+                            busy_timeout_ms=config['SQLITE_BUSY_TIMEOUT_MS'],
+                            mmap_size=config['SQLITE_MMAP_SIZE'],
+                            cache_size=config['SQLITE_CACHE_SIZE'])
+
+
+class StorageMaintenance:
+    """PRAGMA optimize y checkpoint de WAL periódicos, lanzados desde after_request
+
+    No hay un hilo permanente: cuando vence el intervalo, la siguiente petición
+    inicia un hilo de corta vida que hace el mantenimiento con su propia conexión.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = False
+        self.next_run = 0.0
+        self.runs = 0
+        self.last_result = None
+
+    def init_app(self, app):
+        """Registrar los PRAGMAs por conexión y el mantenimiento periódico"""
+        if app.config['DB_STORAGE_PROFILE'] != 'production' or \
+                not is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI']):
+            return
+
+        from app.models import db
+        with app.app_context():
+            event.listen(db.engine, 'connect', _set_pragmas(connection_pragmas(app.config)))
+
+        self.interval = app.config['DB_MAINTENANCE_INTERVAL']
+        if self.interval:
+            self.next_run = time.monotonic() + self.interval
+            app.after_request(self._after_request)
+
+    def _after_request(self, response):
+        now = time.monotonic()
+        if now < self.next_run:
+            return response
+        with self._lock:
+            if self._running or now < self.next_run:
+                return response
+            self._running = True
+            self.next_run = now + self.interval
+
+        app = current_app._get_current_object()
+        threading.Thread(target=self._run_in_background, args=(app,), name='sqlite-maintenance',
+                         daemon=True).start()
+        return response
+
+    def _run_in_background(self, app):
+        try:
+            with app.app_context():
+                from app.models import db
+                self.run(db.engine)
+        except Exception:
+            app.logger.exception('Falló el mantenimiento de SQLite')
+        finally:
+            with self._lock:
+                self._running = False
+
+    def run(self, engine, checkpoint='PASSIVE'):
+        """Ejecutar PRAGMA optimize y un checkpoint de WAL; devuelve (ocupado, páginas del WAL, copiadas)
+
+        PASSIVE no espera a lectores ni escritores; TRUNCATE (desde la CLI) además
+        vacía el archivo -wal cuando nadie lo está usando.
+        """
+        with engine.connect() as conn:
+            conn.execute(text('PRAGMA optimize'))
+            result = tuple(conn.execute(text(f'PRAGMA wal_checkpoint({checkpoint})')).one())
+            conn.commit()
+        self.runs += 1
+        self.last_result = result
+        return result
+
+
+# Instancia compartida (se configura en create_app)
+storage_maintenance = StorageMaintenance()
@@ -0,0 +1,264 @@
+"""
+Renderizador SVG en Python puro para los gráficos de HealthDataAnalyzer
+Genera gráficos vectoriales pequeños (barras, líneas y líneas de referencia)
+en milisegundos, sin importar matplotlib.
+"""
+
+import math
+from xml.sax.saxutils import escape
+
+FONT = 'font-family="Helvetica,Arial,sans-serif"'
+
+
+def _fmt(value):
+    """Formatear una coordenada con un decimal como máximo"""
+    text = f'{value:.1f}'
+    return text[:-2] if text.endswith('.0') else text
+
+
+def _nice_step(span, target_ticks=5):
+    """Paso de marcas 'redondo' (1, 2, 2.5, 5 x 10^n) para un rango"""
+    if span <= 0:
+        return 1
+    raw = span / target_ticks
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 2.5, 5, 10):
+        if raw <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
+
+
+def _label(value):
+    """Texto de una etiqueta del eje: fechas como dd/mm, números sin decimales sobrantes"""
+    if hasattr(value, 'strftime'):
+        return value.strftime('%d/%m')
+    if isinstance(value, float):
+        return _fmt(value)
+    return str(value)
+
+
+class SvgChart:
+    """Gráfico cartesiano con eje X categórico y eje Y lineal"""
+
+    def __init__(self, labels, width=640, height=320, title='', y_label='', y_range=None):
+        self.labels = list(labels)
+        self.width = width
+        self.height = height
+        self.title = title
+        self.y_label = y_label
+        self.left, self.right, self.top, self.bottom = 56, 16, 36, 56
+        self.series = []
+        self.legend = []
+        self.y_min, self.y_max = y_range if y_range else (None, None)
+
+    # ==================== DATOS ====================
+
+    def bars(self, values, color, label=None, value_labels=False):
+        """Agregar una serie de barras (color puede ser una lista con un color por barra)"""
+        self.series.append(('bars', list(values), color, value_labels))
+        self._add_legend(label, color if isinstance(color, str) else color[0], 'bar')
+        return self
+
+    def line(self, values, color, label=None, marker=True, dashed=False):
+        """Agregar una serie de líneas (None deja un hueco)"""
+        self.series.append(('line', list(values), color, (marker, dashed)))
+        self._add_legend(label, color, 'dash' if dashed else 'line')
+        return self
+
+    def hline(self, y, color, label=None):
+        """Agregar una línea de referencia horizontal discontinua"""
+        self.series.append(('hline', [y], color, None))
+        self._add_legend(label, color, 'dash')
+        return self
+
+    def _add_legend(self, label, color, kind):
+        if label:
+            self.legend.append((label, color, kind))
+
+    # ==================== ESCALAS ====================
+
+    def _y_bounds(self):
+        values = [v for _, series, _, _ in self.series for v in series if v is not None]
+        low = min(values + [0]) if any(kind == 'bars' for kind, _, _, _ in self.series) else min(values, default=0)
+        high = max(values, default=1)
+        if self.y_min is not None:
+            low, high = self.y_min, self.y_max
+        if high == low:
+            high = low + 1
+        step = _nice_step(high - low)
+        if self.y_min is None:
+            low = math.floor(low / step) * step
+            high = math.ceil(high / step) * step
+            if any(kind == 'line' for kind, _, _, _ in self.series):
+                low -= step if low > 0 else 0
+                high += step
+        return low, high, step
+
+    def _x(self, index):
+        plot_width = self.width - self.left - self.right
+        slot = plot_width / max(len(self.labels), 1)
+        return self.left + slot * (index + 0.5)
+
+    def _y(self, value, low, high):
+        plot_height = self.height - self.top - self.bottom
+        return self.top + plot_height * (1 - (value - low) / (high - low))
+
+    # ==================== RENDERIZADO ====================
+
+    def render_body(self):
+        """Elementos SVG del gráfico sin la etiqueta <svg> exterior"""
+        low, high, step = self._y_bounds()
+        parts = []
+        plot_bottom = self.height - self.bottom
+        plot_right = self.width - self.right
+
+        if self.title:
+            parts.append(f'<text x="{_fmt(self.width / 2)}" y="22" text-anchor="middle" font-size="15" '
+                         f'font-weight="bold">{escape(self.title)}</text>')
+
+        # Cuadrícula y marcas del eje Y
+        tick = low
+        while tick <= high + step / 1000:
+            y = _fmt(self._y(tick, low, high))
+            parts.append(f'<line x1="{self.left}" y1="{y}" x2="{plot_right}" y2="{y}" stroke="#ddd"/>')
+            parts.append(f'<text x="{self.left - 6}" y="{y}" text-anchor="end" dy="4" font-size="10">'
+                         f'{_label(float(tick))}</text>')
+            tick += step
+        parts.append(f'<line x1="{self.left}" y1="{plot_bottom}" x2="{plot_right}" y2="{plot_bottom}" stroke="#888"/>')
+
+        if self.y_label:
+            parts.append(f'<text transform="translate(14 {_fmt((self.top + plot_bottom) / 2)}) rotate(-90)" '
+                         f'text-anchor="middle" font-size="11">{escape(self.y_label)}</text>')
+
+        # Etiquetas del eje X (como máximo ~10 para que no se solapen)
+        every = max(1, math.ceil(len(self.labels) / 10))
+        for index, label in enumerate(self.labels):
+            if index % every:
+                continue
+            x = _fmt(self._x(index))
+            parts.append(f'<text transform="translate({x} {plot_bottom + 12}) rotate(-45)" text-anchor="end" '
+                         f'font-size="10">{escape(_label(label))}</text>')
+
+        slot = (self.width - self.left - self.right) / max(len(self.labels), 1)
+        bar_series = [series for series in self.series if series[0] == 'bars']
+        bar_width = slot * 0.8 / max(len(bar_series), 1)
+
+        for kind, values, color, options in self.series:
+            if kind == 'bars':
+                offset = next(position for position, series in enumerate(bar_series)
+                              if series[1] is values) * bar_width - slot * 0.4
+                base = self._y(max(low, 0), low, high)
+                for index, value in enumerate(values):
+                    if value is None:
+                        continue
+                    top = self._y(value, low, high)
+                    x = self._x(index) + offset
+                    fill = color if isinstance(color, str) else color[index]
+                    parts.append(f'<rect x="{_fmt(x)}" y="{_fmt(min(top, base))}" width="{_fmt(bar_width)}" '
+                                 f'height="{_fmt(abs(base - top))}" fill="{fill}" fill-opacity="0.8"/>')
+                    if options:
+                        parts.append(f'<text x="{_fmt(x + bar_width / 2)}" y="{_fmt(top - 4)}" text-anchor="middle" '
+                                     f'font-size="10">{_fmt(value)}%</text>')
+            elif kind == 'line':
+                marker, dashed = options
+                segments, current = [], []
+                for index, value in enumerate(values):
+                    if value is None:
+                        if current:
+                            segments.append(current)
+                        current = []
+                        continue
+                    current.append((self._x(index), self._y(value, low, high)))
+                if current:
+                    segments.append(current)
+                dash = ' stroke-dasharray="6 4"' if dashed else ''
+                for points in segments:
+                    path = ' '.join(f'{_fmt(x)},{_fmt(y)}' for x, y in points)
+                    parts.append(f'<polyline points="{path}" fill="none" stroke="{color}" stroke-width="2"{dash}/>')
+                    if marker:
+                        parts.extend(f'<circle cx="{_fmt(x)}" cy="{_fmt(y)}" r="3" fill="{color}"/>' for x, y in points)
+            elif kind == 'hline':
+                y = _fmt(self._y(values[0], low, high))
+                parts.append(f'<line x1="{self.left}" y1="{y}" x2="{plot_right}" y2="{y}" stroke="{color}" '
+                             f'stroke-dasharray="6 4" stroke-width="1.5"/>')
+
+        # Leyenda en la esquina superior derecha
+        for position, (label, color, kind) in enumerate(self.legend):
+            y = self.top + 6 + position * 14
+            x = plot_right - 130
+            if kind == 'bar':
+                parts.append(f'<rect x="{x}" y="{y - 8}" width="12" height="8" fill="{color}"/>')
+            else:
+                dash = ' stroke-dasharray="4 2"' if kind == 'dash' else ''
+                parts.append(f'<line x1="{x}" y1="{y - 4}" x2="{x + 12}" y2="{y - 4}" stroke="{color}" '
+                             f'stroke-width="2"{dash}/>')
+            parts.append(f'<text x="{x + 16}" y="{y}" font-size="10">{escape(label)}</text>')
+
+        return ''.join(parts)
+
+    def to_svg(self):
+        """Documento SVG completo"""
+        return wrap_svg(self.width, self.height, self.render_body())
+
+
+def wrap_svg(width, height, body):
+    """Envolver elementos en un documento SVG con fondo blanco"""
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" {FONT}><rect width="100%" height="100%" fill="#fff"/>{body}</svg>')
+
+
+def grid(charts, columns=2, title=''):
+    """Componer varios gráficos en una cuadrícula dentro de un único SVG"""
+    charts = [chart for chart in charts if chart is not None]
+    if not charts:
+        return None
+    cell_width = max(chart.width for chart in charts)
+    cell_height = max(chart.height for chart in charts)
+    offset = 36 if title else 0
+    rows = math.ceil(len(charts) / columns)
+    parts = []
+    if title:
+        parts.append(f'<text x="{cell_width * columns / 2}" y="24" text-anchor="middle" font-size="17" '
+                     f'font-weight="bold">{escape(title)}</text>')
+    for position, chart in enumerate(charts):
+        x = (position % columns) * cell_width
+        y = offset + (position // columns) * cell_height
+        parts.append(f'<g transform="translate({x} {y})">{chart.render_body()}</g>')
+    return wrap_svg(cell_width * columns, offset + rows * cell_height, ''.join(parts))
+
+
+# ==================== GRÁFICOS DE SALUD ====================
+
+def water_intake_chart(dates, intake, target=None, width=640, height=320):
+    """Barras de consumo diario de agua con la meta como referencia"""
+    chart = SvgChart(dates, width, height, 'Consumo de Agua Diario', 'Consumo (ml)')
+    chart.bars(intake, '#87ceeb', 'Consumo diario')
+    if target is not None:
+        chart.hline(target, '#d62728', 'Meta diaria')
+    return chart
+
+
+def blood_pressure_chart(dates, systolic, diastolic, width=640, height=320):
+    """Líneas de presión sistólica y diastólica con referencias 120/80"""
+    chart = SvgChart(dates, width, height, 'Presión Arterial', 'Presión (mmHg)')
+    chart.line(systolic, '#d62728', 'Sistólica')
+    chart.line(diastolic, '#1f77b4', 'Diastólica')
+    chart.hline(120, '#2ca02c', 'Normal Sistólica')
+    chart.hline(80, '#ff7f0e', 'Normal Diastólica')
+    return chart
+
+
+def weight_trend_chart(dates, weights, trend=None, width=640, height=320):
+    """Línea de peso con tendencia lineal opcional"""
+    chart = SvgChart(dates, width, height, 'Tendencia de Peso', 'Peso (kg)')
+    chart.line(weights, '#800080')
+    if trend is not None:
+        chart.line(trend, '#d62728', 'Tendencia', marker=False, dashed=True)
+    return chart
+
+
+def completion_chart(categories, rates, title, colors, width=420, height=320):
+    """Barras de porcentaje de completación (0-100) con el valor sobre cada barra"""
+    chart = SvgChart(categories, width, height, title, 'Porcentaje de Completación', y_range=(0, 100))
+    chart.bars(rates, [colors[index % len(colors)] for index in range(len(rates))], value_labels=True)
+    return chart
@@ -0,0 +1,130 @@
+"""
+Listado paginado de tareas
+Paginación por cursor (keyset) sobre (due_date, id) en orden descendente: cada página
+continúa desde la última tarea enviada con una búsqueda en el índice, sin OFFSET.
+Los filtros se aplican en SQL y las tareas sin fecha van al final del listado.
+"""
+
+import base64
+import binascii
+from datetime import date, datetime
+
+from sqlalchemy import tuple_
+
+from app.models import Task
+from app.serialization import task_serializer
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class TaskQueryError(ValueError):
+    """Parámetro de listado de tareas inválido"""
+
+
+def encode_cursor(task):
+    """Cursor opaco con la fecha y el id de la última tarea (objeto o fila) de la página"""
+    due = task.due_date.isoformat() if task.due_date else ''
+    return base64.urlsafe_b64encode(f'{due}|{task.id}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Obtener (fecha o None, id) de un cursor de encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        due, task_id = raw.split('|')
+        return (date.fromisoformat(due) if due else None), int(task_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise TaskQueryError('Cursor inválido')
+
+
+def _parse_date(args, key):
+    value = args.get(key)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise TaskQueryError(f'Fecha inválida (YYYY-MM-DD): {key}')
+
+
+def _parse_list(args, key):
+    """Valores separados por comas (?category=work,health)"""
+    values = [item.strip() for item in args.get(key, '').split(',') if item.strip()]
+    return values or None
+
+
+def parse_task_filters(args):
+    """Validar los parámetros de consulta del listado (category, priority, completed, due_from, due_to)"""
+    completed = args.get('completed')
+    if completed not in (None, '', 'true', 'false'):
+        raise TaskQueryError('completed debe ser true o false')
+
+    filters = {
+        'category': _parse_list(args, 'category'),
+        'priority': _parse_list(args, 'priority'),
+        'completed': None if not completed else completed == 'true',
+        'due_from': _parse_date(args, 'due_from'),
+        'due_to': _parse_date(args, 'due_to'),
+    }
+    if filters['due_from'] and filters['due_to'] and filters['due_from'] > filters['due_to']:
+        raise TaskQueryError('due_from no puede ser posterior a due_to')
+    return filters
+
+
+def parse_page_size(args):
+    """Tamaño de página pedido, acotado a MAX_PAGE_SIZE"""
+    limit = args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    if limit is None or limit < 1:
+        raise TaskQueryError('limit debe ser un entero positivo')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _filtered_select(user_id, filters):
+    stmt = task_serializer.select().where(Task.user_id == user_id)
+    if filters['category']:
+        stmt = stmt.where(Task.category.in_(filters['category']))
+    if filters['priority']:
+        stmt = stmt.where(Task.priority.in_(filters['priority']))
+    if filters['completed'] is not None:
+        stmt = stmt.where(Task.completed == filters['completed'])
+    if filters['due_from']:
+        stmt = stmt.where(Task.due_date >= filters['due_from'])
+    if filters['due_to']:
+        stmt = stmt.where(Task.due_date <= filters['due_to'])
+    return stmt
+
+
+def query_tasks_page(user_id, filters, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Obtener una página de tareas (diccionarios de Task.to_dict) y el cursor de la siguiente
+
+    Las tareas con fecha se recorren con una comparación de fila (due_date, id) < cursor,
+    que SQLite resuelve como rango del índice; al agotarse, la misma página se completa
+    con las tareas sin fecha (due_date IS NULL, id < cursor). El cursor es None en la última página.
+    """
+    cursor = cursor or None
+    base = _filtered_select(user_id, filters)
+    last_due, last_id = decode_cursor(cursor) if cursor else (None, None)
+    include_undated = not filters['due_from'] and not filters['due_to']
+
+    rows, tasks = [], []
+    if cursor is None or last_due is not None:
+        dated = base.where(Task.due_date.isnot(None))
+        if last_due is not None:
+            dated = dated.where(tuple_(Task.due_date, Task.id) < tuple_(last_due, last_id))
+        rows, tasks = task_serializer.fetch(
+            dated.order_by(Task.due_date.desc(), Task.id.desc()).limit(limit + 1)
+        )
+
+    if include_undated and len(rows) <= limit:
+        undated = base.where(Task.due_date.is_(None))
+        if cursor is not None and last_due is None:
+            undated = undated.where(Task.id < last_id)
+        more_rows, more_tasks = task_serializer.fetch(
+            undated.order_by(Task.id.desc()).limit(limit + 1 - len(rows))
+        )
+        rows, tasks = rows + more_rows, tasks + more_tasks
+
+    if len(rows) > limit:
+        return tasks[:limit], encode_cursor(rows[limit - 1])
+    return tasks, None
@@ -0,0 +1,106 @@
+"""
+Estadísticas de completación de tareas por categoría
+Se sirven desde la tabla task_counters, mantenida en la misma transacción que cada escritura de tareas
+"""
+
+from datetime import datetime
+
+from sqlalchemy import case, func
+
+from app.models import db, insert_for_dialect, Task, TaskCounter
+
+# Categorías que siempre aparecen en la respuesta, aunque no tengan tareas
+DEFAULT_CATEGORIES = ['personal', 'work', 'exercise', 'food', 'health']
+
+counter_table = TaskCounter.__table__
+
+
+def adjust_task_counters(user_id, category, total_delta=0, completed_delta=0):
+    """Sumar los deltas al contador de la categoría en una sola sentencia (sin commit)"""
+    if not total_delta and not completed_delta:
+        return
+
+    stmt = insert_for_dialect(counter_table).values(
+        user_id=user_id,
+        category=category,
+        total=total_delta,
+        completed=completed_delta,
+        updated_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'category'],
+        set_={
+            'total': counter_table.c.total + stmt.excluded.total,
+            'completed': counter_table.c.completed + stmt.excluded.completed,
+            'updated_at': stmt.excluded.updated_at,
+        }
+    )
+    db.session.execute(stmt)
+
+
+def query_task_category_stats(user_id):
+    """Calcular total y completadas por categoría con una única consulta GROUP BY"""
+    return db.session.query(
+        Task.category,
+        func.count(Task.id),
+        func.coalesce(func.sum(case((Task.completed == True, 1), else_=0)), 0)  # noqa: E712
+    ).filter(Task.user_id == user_id).group_by(Task.category).all()
+
+
+def rebuild_task_counters(user_id=None):
+    """Recalcular los contadores desde la tabla de tareas (uno o todos los usuarios, sin commit)"""
+    delete = TaskCounter.query
+    if user_id is not None:
+        delete = delete.filter_by(user_id=user_id)
+    delete.delete(synchronize_session=False)
+
+    aggregate = db.select(
+        Task.user_id,
+        Task.category,
+        func.count(Task.id),
+        func.coalesce(func.sum(case((Task.completed == True, 1), else_=0)), 0),  # noqa: E712
+        func.current_timestamp()
+    ).group_by(Task.user_id, Task.category)
+    if user_id is not None:
+        aggregate = aggregate.where(Task.user_id == user_id)
+
+    db.session.execute(counter_table.insert().from_select(
+        ['user_id', 'category', 'total', 'completed', 'updated_at'], aggregate
+    ))
+
+
+def get_task_completion_stats(user_id, use_counters=True):
+    """Estadísticas generales y por categoría del usuario
+
+    Con use_counters se leen los contadores (coste proporcional al número de
+    categorías); sin ellos se agrega directamente la tabla de tareas.
+    """
+    if use_counters:
+        rows = db.session.query(
+            TaskCounter.category, TaskCounter.total, TaskCounter.completed
+        ).filter_by(user_id=user_id).all()
+    else:
+        rows = query_task_category_stats(user_id)
+
+    category_stats = {
+        category: {'total': 0, 'completed': 0, 'completion_rate': 0}
+        for category in DEFAULT_CATEGORIES
+    }
+    for category, total, completed in rows:
+        if total <= 0:
+            continue
+        category_stats[category] = {
+            'total': total,
+            'completed': completed,
+            'completion_rate': completed / total * 100
+        }
+
+    total_tasks = sum(stats['total'] for stats in category_stats.values())
+    completed_tasks = sum(stats['completed'] for stats in category_stats.values())
+
+    return {
+        'total_tasks': total_tasks,
+        'completed_tasks': completed_tasks,
+        'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
+        'category_stats': category_stats
+    }
@@ -0,0 +1,99 @@
+"""
+Benchmark de renderizado de gráficos: PNG (matplotlib) frente a SVG (app.svg_charts)
+Mide la latencia mediana y el tamaño de la respuesta de cada gráfico del reporte
+sobre datos sintéticos, sin base de datos y con la caché de gráficos desactivada.
+
+Uso: python benchmarks/bench_charts.py [--days 30] [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+
+from app.data_analysis import HealthDataAnalyzer
+
+CHARTS = ('water_intake', 'blood_pressure', 'weight_trend', 'task_completion', 'dashboard')
+
+
+def synthetic_frames(days, seed=42):
+    """Generar DataFrames de salud y tareas con la misma forma que los de la base"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(datetime.now().date() - timedelta(days=days - 1), periods=days)
+
+    health_df = pd.DataFrame({
+        'date': dates,
+        'water_intake': rng.integers(800, 3000, days),
+        'water_target': 2000,
+        'systolic_pressure': rng.integers(110, 150, days).astype(float),
+        'diastolic_pressure': rng.integers(70, 95, days).astype(float),
+        'weight': 70 + rng.uniform(-2, 2, days),
+    })
+
+    tasks = days * 3
+    tasks_df = pd.DataFrame({
+        'created_at': pd.to_datetime(rng.choice(dates.values, tasks)),
+        'category': rng.choice(['work', 'personal', 'health', 'finance', 'other'], tasks),
+        'priority': rng.choice(['low', 'medium', 'high'], tasks),
+        'completed': rng.random(tasks) < 0.6,
+    })
+    return health_df, tasks_df
+
+
+def render(analyzer, chart, health_df, tasks_df, days, fmt):
+    """Renderizar un gráfico del reporte en el formato indicado"""
+    if chart == 'water_intake':
+        return analyzer.create_water_intake_chart(1, days, health_df, fmt)
+    if chart == 'blood_pressure':
+        return analyzer.create_blood_pressure_chart(1, days, health_df, fmt)
+    if chart == 'weight_trend':
+        return analyzer.create_weight_trend_chart(1, days, health_df, fmt)
+    if chart == 'task_completion':
+        return analyzer.create_task_completion_chart(1, days, tasks_df, fmt)
+    return analyzer.create_health_summary_dashboard(1, days, health_df, tasks_df, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comparar el renderizado PNG y SVG de los gráficos de salud')
+    parser.add_argument('--days', type=int, default=30, help='Días de datos sintéticos')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por gráfico y formato')
+    args = parser.parse_args()
+
+    analyzer = HealthDataAnalyzer(db_path=':memory:', cache=None)
+    health_df, tasks_df = synthetic_frames(args.days)
+
+    print(f'{"gráfico":<16} {"png ms":>9} {"svg ms":>9} {"png KB":>9} {"svg KB":>9} {"aceleración":>12}')
+    totals = {'png': [0, 0], 'svg': [0, 0]}
+    for chart in CHARTS:
+        results = {}
+        for fmt in ('png', 'svg'):
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                output = render(analyzer, chart, health_df, tasks_df, args.days, fmt)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[fmt] = (statistics.median(timings), len(output.encode()))
+            totals[fmt][0] += results[fmt][0]
+            totals[fmt][1] += results[fmt][1]
+
+        (png_ms, png_bytes), (svg_ms, svg_bytes) = results['png'], results['svg']
+        print(f'{chart:<16} {png_ms:>9.1f} {svg_ms:>9.1f} {png_bytes / 1024:>9.1f} {svg_bytes / 1024:>9.1f} '
+              f'{png_ms / svg_ms:>11.0f}x')
+
+    (png_ms, png_bytes), (svg_ms, svg_bytes) = totals['png'], totals['svg']
+    print(f'{"total":<16} {png_ms:>9.1f} {svg_ms:>9.1f} {png_bytes / 1024:>9.1f} {svg_bytes / 1024:>9.1f} '
+          f'{png_ms / svg_ms:>11.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark del análisis de cohortes frente al bucle por usuario de HealthDataAnalyzer
+Crea una base SQLite temporal con N usuarios, mide CohortAnalyzer.analyze() sobre
+todos ellos y extrapola el coste del bucle por usuario a partir de una muestra,
+comprobando que las estadísticas de la muestra coinciden.
+
+Uso: python benchmarks/bench_cohort.py [--users 100000] [--days 30] [--sample 200]
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+
+from app import create_app
+from app.cohort_analysis import CohortAnalyzer, user_stats
+from app.data_analysis import HealthDataAnalyzer
+
+CATEGORIES = np.array(['personal', 'work', 'exercise', 'food', 'health'])
+PRIORITIES = np.array(['low', 'medium', 'high'])
+
+
+def build_database(path, users, days, tasks_per_user, seed=7):
+    """Crear el esquema con create_app y poblarlo con executemany"""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'DB_AUTO_UPGRADE': True})
+    with app.app_context():
+        from app.models import db
+        db.engine.dispose()
+
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+
+    conn.executemany(
+        'INSERT INTO users (id, name, email, password_hash) VALUES (?, ?, ?, ?)',
+        ((user_id, f'Usuario {user_id}', f'user{user_id}@example.com', '-') for user_id in range(1, users + 1))
+    )
+
+    today = datetime.now().date()
+    day_strings = [(today - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+    rows = users * days
+    user_column = np.repeat(np.arange(1, users + 1), days)
+    water = rng.integers(0, 3200, rows)
+    has_bp = rng.random(rows) < 0.4
+    systolic = np.where(has_bp, rng.integers(100, 170, rows), -1)
+    diastolic = np.where(has_bp, rng.integers(60, 105, rows), -1)
+    has_weight = rng.random(rows) < 0.3
+    weight = np.where(has_weight, np.round(rng.normal(72, 12, rows), 1), np.nan)
+
+    def health_rows():
+        for index in range(rows):
+            yield (
+                int(user_column[index]), day_strings[index % days], int(water[index]), 2000,
+                int(systolic[index]) if has_bp[index] else None,
+                int(diastolic[index]) if has_bp[index] else None,
+                float(weight[index]) if has_weight[index] else None
+            )
+
+    conn.executemany(
+        'INSERT INTO health_data (user_id, date, water_intake, water_target, systolic_pressure, '
+        'diastolic_pressure, weight) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        health_rows()
+    )
+
+    tasks = users * tasks_per_user
+    task_users = np.repeat(np.arange(1, users + 1), tasks_per_user)
+    categories = rng.choice(CATEGORIES, tasks)
+    priorities = rng.choice(PRIORITIES, tasks)
+    completed = rng.random(tasks) < 0.6
+    created = datetime.now() - timedelta(days=days - 1)
+    offsets = rng.integers(0, (days - 1) * 86400, tasks)
+
+    conn.executemany(
+        'INSERT INTO tasks (user_id, title, category, priority, completed, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+        ((int(task_users[index]), 'Tarea', str(categories[index]), str(priorities[index]), bool(completed[index]),
+          (created + timedelta(seconds=int(offsets[index]))).isoformat(' ')) for index in range(tasks))
+    )
+    conn.commit()
+    conn.close()
+
+    # Los dos analizadores leen el resumen diario, no health_data
+    with app.app_context():
+        from app.daily_stats import rebuild_daily_stats
+        rebuild_daily_stats()
+        db.session.commit()
+        db.engine.dispose()
+
+
+def per_user_stats(analyzer, user_id, days):
+    """Estadísticas de un usuario con HealthDataAnalyzer (4 análisis, una consulta cada uno)"""
+    water = analyzer.analyze_water_intake_trends(user_id, days)
+    bp = analyzer.analyze_blood_pressure_trends(user_id, days)
+    weight = analyzer.analyze_weight_trends(user_id, days)
+    tasks = analyzer.analyze_task_completion_patterns(user_id, days)
+    return {
+        'water_analysis': water['stats'] if water else None,
+        'blood_pressure_analysis': bp['stats'] if bp else None,
+        'weight_analysis': weight['stats'] if weight else None,
+        'task_analysis': tasks
+    }
+
+
+def same(expected, actual):
+    """Comparar estructuras de estadísticas con tolerancia numérica (NaN == NaN)"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return expected.keys() == actual.keys() and all(same(expected[key], actual[key]) for key in expected)
+    if expected is None or actual is None:
+        return expected is None and actual is None
+    expected, actual = float(expected), float(actual)
+    if math.isnan(expected) or math.isnan(actual):
+        return math.isnan(expected) and math.isnan(actual)
+    return math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comparar el análisis de cohortes con el bucle por usuario')
+    parser.add_argument('--users', type=int, default=100000, help='Usuarios en la base temporal')
+    parser.add_argument('--days', type=int, default=30, help='Días de datos por usuario')
+    parser.add_argument('--tasks', type=int, default=5, help='Tareas por usuario')
+    parser.add_argument('--sample', type=int, default=200, help='Usuarios analizados con el bucle por usuario')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cohort.db')
+
+        start = time.perf_counter()
+        build_database(path, args.users, args.days, args.tasks)
+        print(f'Base creada: {args.users} usuarios, {args.users * args.days} filas de salud, '
+              f'{args.users * args.tasks} tareas ({time.perf_counter() - start:.1f}s)')
+
+        cohort = CohortAnalyzer(path)
+        start = time.perf_counter()
+        health_df = cohort.get_health_data(days=args.days)
+        tasks_df = cohort.get_tasks(days=args.days)
+        load_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        results = cohort.analyze(days=args.days, health_df=health_df, tasks_df=tasks_df)
+        compute_seconds = time.perf_counter() - start
+        cohort_seconds = load_seconds + compute_seconds
+        print(f'Cohorte: carga {load_seconds:.2f}s + cálculo {compute_seconds:.2f}s = {cohort_seconds:.2f}s '
+              f'({len(results["water"])} usuarios con datos de agua)')
+
+        analyzer = HealthDataAnalyzer(path, cache=None)
+        sample = np.random.default_rng(1).choice(np.arange(1, args.users + 1), min(args.sample, args.users),
+                                                 replace=False)
+        per_user_stats(analyzer, int(sample[0]), args.days)  # calentamiento: importaciones y conexión
+        mismatches = 0
+        start = time.perf_counter()
+        expected = {int(user_id): per_user_stats(analyzer, int(user_id), args.days) for user_id in sample}
+        loop_seconds = (time.perf_counter() - start) / len(sample) * args.users
+        for user_id, stats in expected.items():
+            if not same(stats, user_stats(results, user_id)):
+                mismatches += 1
+
+        print(f'Bucle por usuario (extrapolado desde {len(sample)}): {loop_seconds:.1f}s')
+        print(f'Aceleración: {loop_seconds / cohort_seconds:.0f}x, diferencias en la muestra: {mismatches}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+"""
+Benchmark de latencia de los endpoints de la aplicación
+Crea (o reutiliza) una base SQLite sembrada con el generador vectorizado y recorre cada
+ruta con varios usuarios simulados en paralelo, a través del cliente de pruebas de Flask
+o de un servidor local. Informa el rendimiento y los percentiles p50/p95/p99 de cada
+endpoint y guarda los resultados en JSON para compararlos entre ejecuciones.
+
+Uso:
+  python benchmarks/bench_endpoints.py [--users 2000] [--days 365] [--clients 8] [--requests 200]
+                                       [--output resultados.json] [--compare anterior.json]
+  python benchmarks/bench_endpoints.py --database bench.db --url http://127.0.0.1:5000
+    (el servidor debe usar la misma base: DATABASE_URL=sqlite:///bench.db flask --app run run)
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'data'))
+
+import matplotlib
+matplotlib.use('Agg')
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.data_analysis import HealthDataAnalyzer
+from generate_sample_data import generate_dataset
+
+# Contraseña asignada a los usuarios simulados (los datos generados no tienen contraseña)
+BENCH_PASSWORD = 'bench'
+
+# (nombre, método, URL, cuerpo JSON); {task_id} y {notification_id} se resuelven por usuario
+ENDPOINTS = [
+    ('dashboard', 'GET', '/dashboard', None),
+    ('health.summary', 'GET', '/api/health/summary', None),
+    ('health.water', 'POST', '/api/health/water', {'amount': 250}),
+    ('health.blood_pressure', 'POST', '/api/health/blood-pressure', {'systolic': 125, 'diastolic': 82}),
+    ('health.weight', 'POST', '/api/health/weight', {'weight': 70.5}),
+    ('health.meal', 'POST', '/api/health/meal', {'meal_type': 'lunch'}),
+    ('health.exercise', 'POST', '/api/health/exercise', {'minutes': 30, 'type': 'cardio'}),
+    ('health.batch', 'POST', '/api/health/batch', {'readings': [
+        {'type': 'water', 'amount': 250, 'date': (date.today() - timedelta(days=1)).isoformat()},
+        {'type': 'sleep', 'hours': 7.5, 'quality': 'good'},
+    ]}),
+    ('tasks.list', 'GET', '/api/tasks', None),
+    ('tasks.create', 'POST', '/api/tasks', {'title': 'Tarea', 'category': 'work',
+                                            'due_date': date.today().isoformat()}),
+    ('tasks.update', 'PUT', '/api/tasks/{task_id}', {'completed': True}),
+    ('notifications.list', 'GET', '/api/notifications', None),
+    ('notifications.read', 'PUT', '/api/notifications/{notification_id}/read', None),
+    ('analytics.trends_30', 'GET', '/api/analytics/health-trends?days=30', None),
+    ('analytics.trends_365', 'GET', '/api/analytics/health-trends?days=365', None),
+    ('analytics.trends_365_columnar', 'GET', '/api/analytics/health-trends?days=365&format=columnar', None),
+    ('analytics.task_completion', 'GET', '/api/analytics/task-completion', None),
+]
+
+# Reportes medidos llamando directamente a HealthDataAnalyzer (sin caché de gráficos)
+REPORTS = [
+    ('report.png', 'png'),
+    ('report.svg', 'svg'),
+]
+
+
+# ==================== BASE DE DATOS ====================
+
+def build_database(path, users, days, seed):
+    """Generar la base sembrada con el generador vectorizado"""
+    start = time.perf_counter()
+    counts = generate_dataset(path, 'sqlite', num_users=users, num_days=days, seed=seed)
+    rows = sum(counts.values())
+    print(f'Base creada: {rows} filas ({", ".join(f"{table} {count}" for table, count in counts.items())}) '
+          f'en {time.perf_counter() - start:.1f}s')
+
+
+def prepare_users(path, clients, seed):
+    """Elegir un usuario por cliente simulado, con contraseña y una tarea/notificación propias"""
+    conn = sqlite3.connect(path)
+    try:
+        user_ids = [row[0] for row in conn.execute('SELECT id FROM users ORDER BY id')]
+        if not user_ids:
+            raise SystemExit(f'La base {path} no tiene usuarios')
+        rng = np.random.default_rng(seed)
+        chosen = rng.choice(user_ids, clients, replace=len(user_ids) < clients)
+
+        password_hash = generate_password_hash(BENCH_PASSWORD)
+        users = []
+        for user_id in map(int, chosen):
+            conn.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
+            email = conn.execute('SELECT email FROM users WHERE id = ?', (user_id,)).fetchone()[0]
+            task = conn.execute('SELECT id FROM tasks WHERE user_id = ? ORDER BY id LIMIT 1', (user_id,)).fetchone()
+            notification = conn.execute('SELECT id FROM notifications WHERE user_id = ? ORDER BY id LIMIT 1',
+                                        (user_id,)).fetchone()
+            users.append({
+                'user_id': user_id,
+                'email': email,
+                # Si el usuario no tiene filas se usa un id inexistente: la ruta responde 404
+                'task_id': task[0] if task else 0,
+                'notification_id': notification[0] if notification else 0,
+            })
+        conn.commit()
+        return users
+    finally:
+        conn.close()
+
+
+# ==================== CLIENTES ====================
+
+class FlaskClient:
+    """Usuario simulado sobre el cliente de pruebas de Flask (sesión ya iniciada)"""
+
+    def __init__(self, app, user):
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['user_id'] = user['user_id']
+
+    def request(self, method, url, payload):
+        response = self.client.open(url, method=method, json=payload)
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    """Usuario simulado contra un servidor local, con su propia cookie de sesión"""
+
+    def __init__(self, base_url, user):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        form = urllib.parse.urlencode({'email': user['email'], 'password': BENCH_PASSWORD}).encode()
+        response = self.opener.open(self.base_url + '/login', data=form)
+        if not response.geturl().endswith('/dashboard'):
+            raise SystemExit(f'No se pudo iniciar sesión como {user["email"]}: ¿el servidor usa la misma base?')
+
+    def request(self, method, url, payload):
+        data = None if payload is None else json.dumps(payload).encode()
+        request = urllib.request.Request(self.base_url + url, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+
+
+# ==================== MEDICIÓN ====================
+
+def summarize(latencies, errors, seconds):
+    """Rendimiento y percentiles (en ms) de una serie de latencias en segundos"""
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / seconds, 2) if seconds > 0 else None,
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def run_concurrently(clients, requests, operation):
+    """Repartir las peticiones entre los clientes en paralelo; devuelve (latencias, errores, segundos)"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(index):
+        nonlocal errors
+        local_latencies = []
+        local_errors = 0
+        for _ in range(index, requests, len(clients)):
+            start = time.perf_counter()
+            ok = operation(index)
+            local_latencies.append(time.perf_counter() - start)
+            local_errors += not ok
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+        list(executor.map(worker, range(len(clients))))
+    return latencies, errors, time.perf_counter() - start
+
+
+def bench_endpoints(clients, users, requests, warmup):
+    """Medir cada endpoint de ENDPOINTS"""
+    results = {}
+    for name, method, url, payload in ENDPOINTS:
+        def operation(index):
+            return clients[index].request(method, url.format(**users[index]), payload) < 400
+
+        for index in range(len(clients)):
+            for _ in range(warmup):
+                operation(index)
+        results[name] = summarize(*run_concurrently(clients, requests, operation))
+        print_row(name, results[name])
+    return results
+
+
+def bench_reports(db_path, users, requests, days, warmup):
+    """Medir generate_health_report sin caché, de a un reporte por vez
+
+    pyplot no admite hilos concurrentes (la aplicación genera los reportes en
+    procesos separados), así que los reportes se miden en secuencia.
+    """
+    analyzer = HealthDataAnalyzer(db_path, cache=None)
+    requests = max(len(users), requests // 10)  # cada reporte dibuja cinco gráficos
+    results = {}
+    for name, fmt in REPORTS:
+        for _ in range(warmup):
+            analyzer.generate_health_report(users[0]['user_id'], days, fmt)
+
+        latencies = []
+        errors = 0
+        start = time.perf_counter()
+        for index in range(requests):
+            request_start = time.perf_counter()
+            report = analyzer.generate_health_report(users[index % len(users)]['user_id'], days, fmt)
+            latencies.append(time.perf_counter() - request_start)
+            errors += report is None
+        results[name] = summarize(latencies, errors, time.perf_counter() - start)
+        print_row(name, results[name])
+    return results
+
+
+def print_row(name, stats):
+    """Imprimir una fila de la tabla de resultados"""
+    print(f'{name:<32} {stats["requests"]:>6} {stats["errors"]:>5} {stats["throughput_rps"]:>9.1f} '
+          f'{stats["p50_ms"]:>9.2f} {stats["p95_ms"]:>9.2f} {stats["p99_ms"]:>9.2f}')
+
+
+def compare(previous_path, results):
+    """Mostrar la variación de p50/p95 respecto de una ejecución anterior"""
+    with open(previous_path, encoding='utf-8') as handle:
+        previous = json.load(handle)['endpoints']
+
+    print(f'\nComparación con {previous_path}')
+    print(f'{"endpoint":<32} {"p50 antes":>10} {"p50 ahora":>10} {"Δ p50":>8} {"p95 antes":>10} '
+          f'{"p95 ahora":>10} {"Δ p95":>8}')
+    for name, stats in results.items():
+        if name not in previous:
+            continue
+        before = previous[name]
+        print(f'{name:<32} {before["p50_ms"]:>10.2f} {stats["p50_ms"]:>10.2f} '
+              f'{_change(before["p50_ms"], stats["p50_ms"]):>8} {before["p95_ms"]:>10.2f} '
+              f'{stats["p95_ms"]:>10.2f} {_change(before["p95_ms"], stats["p95_ms"]):>8}')
+
+
+def _change(before, after):
+    """Variación porcentual formateada"""
+    if not before:
+        return '-'
+    return f'{(after - before) / before * 100:+.0f}%'
+
+
+def _git_revision():
+    """Commit actual del repositorio, si está disponible"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Medir la latencia de los endpoints con usuarios concurrentes')
+    parser.add_argument('--database', help='Base SQLite existente (por defecto se crea una temporal)')
+    parser.add_argument('--users', type=int, default=2000, help='Usuarios de la base generada')
+    parser.add_argument('--days', type=int, default=365, help='Días de datos de salud de la base generada')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla de la base y de la elección de usuarios')
+    parser.add_argument('--clients', type=int, default=8, help='Usuarios simulados concurrentes')
+    parser.add_argument('--requests', type=int, default=200, help='Peticiones medidas por endpoint')
+    parser.add_argument('--warmup', type=int, default=1, help='Peticiones de calentamiento por cliente')
+    parser.add_argument('--report-days', type=int, default=30, help='Días del reporte de salud')
+    parser.add_argument('--url', help='Servidor local a medir (por defecto, el cliente de pruebas de Flask)')
+    parser.add_argument('--output', help='Archivo JSON donde guardar los resultados')
+    parser.add_argument('--compare', help='Archivo JSON de una ejecución anterior')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.abspath(args.database or os.path.join(directory, 'bench.db'))
+        if not os.path.exists(db_path):
+            if args.url:
+                parser.error('--url necesita una --database existente compartida con el servidor')
+            build_database(db_path, args.users, args.days, args.seed)
+
+        users = prepare_users(db_path, args.clients, args.seed)
+        app = None
+        if args.url:
+            clients = [HttpClient(args.url, user) for user in users]
+        else:
+            app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}', 'SECRET_KEY': 'bench',
+                              'DB_AUTO_UPGRADE': True})
+            clients = [FlaskClient(app, user) for user in users]
+
+        print(f'{len(clients)} clientes, {args.requests} peticiones por endpoint '
+              f'({"servidor " + args.url if args.url else "cliente de pruebas"})\n')
+        print(f'{"endpoint":<32} {"pet.":>6} {"err.":>5} {"pet./s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+        results = bench_endpoints(clients, users, args.requests, args.warmup)
+        results.update(bench_reports(db_path, users, args.requests, args.report_days, args.warmup))
+
+        if app is not None:
+            with app.app_context():
+                from app.models import db
+                db.session.remove()
+                db.engine.dispose()
+
+    document = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'transport': 'http' if args.url else 'test_client',
+            'options': vars(args),
+        },
+        'endpoints': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(document, handle, indent=2, ensure_ascii=False)
+        print(f'\nResultados guardados en {args.output}')
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
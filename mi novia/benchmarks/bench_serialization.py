@@ -0,0 +1,160 @@
+"""
+Micro-benchmark de serialización de listados
+Compara, para N tareas y N notificaciones de un usuario, el camino con objetos del ORM
+(Model.to_dict + json.dumps) con el de tuplas (RowSerializer) y con orjson (FastJSONProvider),
+y json.dumps con orjson para N días de tendencias de salud. Verifica que todas las
+variantes de cada listado producen exactamente los mismos bytes.
+
+Uso: python benchmarks/bench_serialization.py [--rows 5000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+from app.models import db, User, HealthData, Task, Notification
+from app.daily_stats import rebuild_daily_stats, get_daily_stats_trends
+from app.serialization import FastJSONProvider, task_serializer, notification_serializer, orjson
+
+CATEGORIES = ('personal', 'work', 'exercise', 'food', 'health')
+MESSAGES = ('🎉 ¡Meta de agua alcanzada!', '⚠️ Presión arterial elevada detectada', 'Recordatorio de tarea')
+
+
+def seed(user_id, rows):
+    """Insertar rows tareas y rows notificaciones con valores variados (fechas nulas, texto no ASCII)"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    tasks, notifications = [], []
+    for index in range(rows):
+        created = now - timedelta(minutes=rng.randint(0, 500000), microseconds=rng.choice((0, 123456)))
+        completed = rng.random() < 0.4
+        tasks.append({
+            'user_id': user_id,
+            'title': f'Tarea {index} — revisión',
+            'description': None if index % 3 else 'Descripción con acentos: áéíóú',
+            'category': rng.choice(CATEGORIES),
+            'priority': rng.choice(('low', 'medium', 'high')),
+            'completed': completed,
+            'due_date': None if index % 10 == 0 else date.today() - timedelta(days=rng.randint(0, 365)),
+            'due_time': rng.choice((None, '08:30', '19:00')),
+            'reminder_enabled': rng.random() < 0.8,
+            'created_at': created,
+            'completed_at': created + timedelta(hours=3) if completed else None,
+        })
+        notifications.append({
+            'user_id': user_id,
+            'type': 'achievement',
+            'message': rng.choice(MESSAGES),
+            'priority': rng.choice(('low', 'normal', 'urgent')),
+            'read': rng.random() < 0.5,
+            'created_at': created,
+            'read_at': None,
+        })
+    health = [{
+        'user_id': user_id,
+        'date': date.today() - timedelta(days=day),
+        'water_intake': rng.randint(800, 3000),
+        'systolic_pressure': rng.randint(105, 150),
+        'diastolic_pressure': rng.randint(65, 95),
+        'weight': round(rng.uniform(60, 80), 1),
+        'exercise_minutes': rng.choice((0, 20, 45)),
+    } for day in range(rows)]
+    db.session.execute(db.insert(Task), tasks)
+    db.session.execute(db.insert(Notification), notifications)
+    db.session.execute(db.insert(HealthData), health)
+    rebuild_daily_stats(user_id)
+    db.session.commit()
+
+
+def orm_dicts(model, user_id):
+    """Camino original: objetos del ORM y to_dict por fila"""
+    db.session.expunge_all()
+    return [obj.to_dict() for obj in model.query.filter_by(user_id=user_id).order_by(model.id).all()]
+
+
+def row_dicts(serializer, model, user_id):
+    """Camino nuevo: tuplas de las columnas de to_dict"""
+    return serializer.fetch(serializer.select().where(model.user_id == user_id).order_by(model.id))[1]
+
+
+def measure(function, repeat):
+    """Mediana en milisegundos de repeat ejecuciones"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comparar to_dict + json.dumps con tuplas + orjson')
+    parser.add_argument('--rows', type=int, default=5000, help='Tareas, notificaciones y días de salud del usuario')
+    parser.add_argument('--repeat', type=int, default=20, help='Repeticiones por variante')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(directory, "bench.db")}',
+            'METRICS_ENABLED': False,
+            'DB_AUTO_UPGRADE': True,
+        })
+        with app.app_context():
+            user = User(name='Bench', email='bench@example.com')
+            user.set_password('bench')
+            db.session.add(user)
+            db.session.commit()
+            seed(user.id, args.rows)
+
+            standard = DefaultJSONProvider(app)
+            fast = FastJSONProvider(app)
+
+            def encode(provider, payload):
+                return provider.dumps(payload, separators=(',', ':'))
+
+            print(f'{args.rows} filas por listado, mediana de {args.repeat} repeticiones'
+                  f'{"" if orjson else " (orjson no instalado: la variante rápida usa json.dumps)"}\n')
+            print(f'{"listado":<14} {"variante":<26} {"ms":>9} {"x":>6}')
+            listings = {}
+            for name, model, serializer in (('tasks', Task, task_serializer),
+                                            ('notifications', Notification, notification_serializer)):
+                listings[name] = {
+                    'ORM + to_dict + json': lambda model=model: encode(standard, orm_dicts(model, user.id)),
+                    'tuplas + json': lambda model=model, serializer=serializer:
+                        encode(standard, row_dicts(serializer, model, user.id)),
+                    'tuplas + orjson': lambda model=model, serializer=serializer:
+                        encode(fast, row_dicts(serializer, model, user.id)),
+                }
+            start_date = date.today() - timedelta(days=args.rows)
+            listings['health-trends'] = {
+                'tuplas + json': lambda: encode(standard, get_daily_stats_trends(user.id, start_date)),
+                'tuplas + orjson': lambda: encode(fast, get_daily_stats_trends(user.id, start_date)),
+            }
+
+            for name, variants in listings.items():
+                outputs = {label: variant() for label, variant in variants.items()}
+                if len(set(outputs.values())) != 1:
+                    raise SystemExit(f'{name}: las variantes no producen la misma salida')
+
+                baseline = None
+                for label, variant in variants.items():
+                    elapsed = measure(variant, args.repeat)
+                    baseline = baseline or elapsed
+                    print(f'{name:<14} {label:<26} {elapsed:>9.2f} {baseline / elapsed:>6.1f}')
+            print('\nSalida idéntica byte a byte en todas las variantes de cada listado')
+
+
+if __name__ == '__main__':
+    main()
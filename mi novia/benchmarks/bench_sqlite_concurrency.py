@@ -0,0 +1,177 @@
+"""
+Benchmark de concurrencia de SQLite: perfil 'default' frente a 'production' (WAL)
+Crea una base sembrada con el generador vectorizado y, para cada perfil, lanza procesos
+escritores (registros de salud y tareas) y lectores (tendencias, tareas, resumen) contra
+una copia de la base durante unos segundos. Informa operaciones por segundo, errores
+"database is locked", otros errores y percentiles de latencia de cada tipo de operación.
+
+Ambos perfiles usan la misma espera ante bloqueos (--busy-timeout-ms). Con la espera de
+5 s del driver la contención del modo rollback journal solo se ve como latencia; con una
+espera acotada, como la que tolera una petición web, aparece como "database is locked".
+Los lectores incluyen la exportación completa, que mantiene el bloqueo compartido durante
+toda la lectura y, sin WAL, impide escribir mientras dura.
+
+Uso: python benchmarks/bench_sqlite_concurrency.py [--writers 8] [--readers 8] [--seconds 10]
+     [--busy-timeout-ms 100]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'data'))
+
+from flask import got_request_exception
+
+from app import create_app
+from generate_sample_data import generate_dataset
+
+PROFILES = ('default', 'production')
+
+WRITES = [
+    ('POST', '/api/health/water', {'amount': 250}),
+    ('POST', '/api/health/blood-pressure', {'systolic': 125, 'diastolic': 82}),
+    ('POST', '/api/tasks', {'title': 'Tarea', 'category': 'work'}),
+]
+
+READS = [
+    ('GET', '/api/analytics/health-trends?days=90', None),
+    ('GET', '/api/tasks', None),
+    ('GET', '/api/health/summary', None),
+    ('GET', '/api/export', None),
+]
+
+
+def worker(path, profile, kind, user_id, seconds, pool_size, busy_timeout_ms, barrier, queue):
+    """Proceso de carga: un usuario que repite sus operaciones durante la ventana medida"""
+    logging.disable(logging.CRITICAL)  # los errores se cuentan, no se imprimen
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'SECRET_KEY': 'bench',
+        'DB_STORAGE_PROFILE': profile,
+        'DB_POOL_SIZE': pool_size,
+        'SQLITE_BUSY_TIMEOUT_MS': busy_timeout_ms,
+        # La misma espera del driver en el perfil 'default' (que no fija opciones del motor)
+        'SQLALCHEMY_ENGINE_OPTIONS': {} if profile == 'production' else
+            {'connect_args': {'timeout': busy_timeout_ms / 1000}},
+        'METRICS_ENABLED': False,
+        'JOBS_WORKERS': 0,
+    })
+    locked = []
+
+    def count_locked(sender, exception, **extra):
+        if 'database is locked' in str(exception):
+            locked.append(1)
+
+    got_request_exception.connect(count_locked, app)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    operations = WRITES if kind == 'write' else READS
+
+    latencies, errors = [], 0
+    barrier.wait()
+    deadline = time.perf_counter() + seconds
+    index = 0
+    while time.perf_counter() < deadline:
+        method, url, payload = operations[index % len(operations)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            response = client.open(url, method=method, json=payload)
+            response.get_data()  # consumir las respuestas en streaming (exportación)
+            ok = response.status_code < 400
+        except Exception as error:
+            # Errores al generar el cuerpo en streaming, fuera del manejo de Flask
+            count_locked(None, error)
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        errors += not ok
+    queue.put((kind, latencies, errors, len(locked)))
+
+
+def run_profile(path, profile, writers, readers, seconds, pool_size, busy_timeout_ms):
+    """Ejecutar la carga mixta contra la base con el perfil indicado, un proceso por usuario
+
+    Se usan procesos (como los workers de gunicorn) para que la contención medida sea
+    la de los bloqueos de SQLite y no la del GIL.
+    """
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(writers + readers)
+    queue = context.Queue()
+    jobs = [('write', user_id) for user_id in range(1, writers + 1)]
+    jobs += [('read', writers + user_id) for user_id in range(1, readers + 1)]
+    processes = [context.Process(target=worker, args=(path, profile, kind, user_id, seconds, pool_size,
+                                                      busy_timeout_ms, barrier, queue))
+                 for kind, user_id in jobs]
+    for process in processes:
+        process.start()
+
+    results = {'write': ([], 0, 0), 'read': ([], 0, 0)}
+    for _ in processes:
+        kind, latencies, errors, locked = queue.get()
+        previous = results[kind]
+        results[kind] = (previous[0] + latencies, previous[1] + errors, previous[2] + locked)
+    for process in processes:
+        process.join()
+
+    summary = {}
+    for kind, (latencies, errors, locked) in results.items():
+        values = np.array(latencies) * 1000
+        summary[kind] = {
+            'ops': len(values),
+            'ops_per_second': len(values) / seconds,
+            'locked': locked,
+            'errors': errors - locked,
+            'p50_ms': float(np.percentile(values, 50)) if len(values) else 0.0,
+            'p99_ms': float(np.percentile(values, 99)) if len(values) else 0.0,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comparar la concurrencia de SQLite con y sin el perfil WAL')
+    parser.add_argument('--users', type=int, default=500, help='Usuarios de la base generada')
+    parser.add_argument('--days', type=int, default=90, help='Días de datos de salud por usuario')
+    parser.add_argument('--writers', type=int, default=8, help='Procesos escritores')
+    parser.add_argument('--readers', type=int, default=8, help='Procesos lectores')
+    parser.add_argument('--seconds', type=float, default=10, help='Duración de cada perfil')
+    parser.add_argument('--pool-size', type=int, default=10, help='DB_POOL_SIZE del perfil production')
+    parser.add_argument('--busy-timeout-ms', type=int, default=100,
+                        help='Espera ante bloqueos de ambos perfiles antes de "database is locked"')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        seed_path = os.path.join(directory, 'seed.db')
+        start = time.perf_counter()
+        counts = generate_dataset(seed_path, 'sqlite', num_users=args.users, num_days=args.days)
+        print(f'Base creada: {sum(counts.values())} filas en {time.perf_counter() - start:.1f}s')
+        print(f'{args.writers} escritores y {args.readers} lectores durante {args.seconds:.0f}s por perfil, '
+              f'espera ante bloqueos de {args.busy_timeout_ms} ms\n')
+
+        print(f'{"perfil":<12} {"tipo":<6} {"ops":>7} {"ops/s":>9} {"locked":>7} {"otros":>6} '
+              f'{"p50 ms":>9} {"p99 ms":>9}')
+        for profile in PROFILES:
+            path = os.path.join(directory, f'{profile}.db')
+            shutil.copy(seed_path, path)
+            # El esquema se migra antes de lanzar los procesos (create_app ya no lo hace)
+            create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'DB_AUTO_UPGRADE': True,
+                        'DB_STORAGE_PROFILE': 'default'})
+            summary = run_profile(path, profile, args.writers, args.readers, args.seconds, args.pool_size,
+                                  args.busy_timeout_ms)
+            for kind, stats in summary.items():
+                print(f'{profile:<12} {kind:<6} {stats["ops"]:>7} {stats["ops_per_second"]:>9.1f} '
+                      f'{stats["locked"]:>7} {stats["errors"]:>6} {stats["p50_ms"]:>9.2f} {stats["p99_ms"]:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import os
 import random
 
 def generate_sample_data():
@@ -207,13 +208,375 @@ def generate_analytics_summary():
         type_count = (notifications_df['type'] == notif_type).sum()
         print(f"  * {notif_type}: {type_count} notificaciones")
 
+# ==================== GENERADOR VECTORIZADO ====================
+
+SAMPLE_TABLES = ('users', 'health_data', 'tasks', 'notifications')
+
+# Fracción de días sin registro de cada medida
+DEFAULT_MISSING_RATES = {
+    'blood_pressure': 0.7,
+    'weight': 0.8,
+    'exercise': 0.3,
+    'sleep': 0.0,
+}
+
+TASK_CATEGORIES = np.array(['personal', 'work', 'exercise', 'food', 'health'])
+TASK_PRIORITIES = np.array(['low', 'medium', 'high'])
+NOTIFICATION_TYPES = np.array(['water_reminder', 'health_alert', 'task_reminder', 'achievement'])
+NOTIFICATION_PRIORITIES = np.array(['low', 'normal', 'high', 'urgent'])
+EXERCISE_TYPES = np.array(['cardio', 'strength', 'yoga', 'walking'])
+SLEEP_QUALITIES = np.array(['poor', 'fair', 'good', 'excellent'])
+
+DAY = np.timedelta64(1, 'D')
+
+# Usuarios por bloque de semilla: cada bloque tiene su propio generador aleatorio y los
+# bloques de escritura agrupan bloques enteros, así que --chunk-users no cambia los datos
+SEED_BLOCK_USERS = 100
+
+
+def _block_rng(seed, table, block):
+    """Generador aleatorio de un bloque de semilla: depende solo de la semilla, la tabla y el bloque"""
+    return np.random.default_rng([seed, SAMPLE_TABLES.index(table), block])
+
+
+def _join(*parts):
+    """Concatenar elemento a elemento arreglos y textos fijos"""
+    result = np.asarray(parts[0], dtype=str)
+    for part in parts[1:]:
+        result = np.char.add(result, np.asarray(part, dtype=str))
+    return result
+
+
+def _optional_int(values, missing):
+    """Entero con nulos (NA donde missing es verdadero)"""
+    return pd.arrays.IntegerArray(values.astype('int32'), missing)
+
+
+def _users_chunk(rng, user_ids, base_date):
+    """Usuarios del bloque"""
+    count = len(user_ids)
+    return pd.DataFrame({
+        'id': user_ids,
+        'name': _join('Usuario ', user_ids),
+        'email': _join('user', user_ids, '@example.com'),
+        'age': rng.integers(25, 66, count),
+        'weight': rng.uniform(60, 100, count),
+        'height': rng.integers(150, 191, count),
+        'created_at': base_date.astype('datetime64[s]') - rng.integers(1, 11, count) * DAY
+    })
+
+
+def _health_chunk(rng, user_ids, base_weights, day_strings, missing):
+    """Un registro de salud por usuario y día"""
+    num_days = len(day_strings)
+    rows = len(user_ids) * num_days
+
+    # Consumo de agua: 30% de los días se alcanza la meta
+    water_intake = np.where(rng.random(rows) < 0.3, rng.integers(2000, 3001, rows), rng.integers(800, 3001, rows))
+
+    # Presión arterial: 10% de lecturas elevadas
+    high = rng.random(rows) < 0.1
+    systolic = np.where(high, rng.integers(140, 161, rows), rng.integers(110, 151, rows))
+    diastolic = np.where(high, rng.integers(90, 106, rows), rng.integers(70, 96, rows))
+    no_bp = rng.random(rows) < missing['blood_pressure']
+
+    weight = np.maximum(50, np.repeat(base_weights, num_days) + rng.uniform(-0.5, 0.5, rows))
+    weight[rng.random(rows) < missing['weight']] = np.nan
+
+    exercised = rng.random(rows) >= missing['exercise']
+    exercise_minutes = np.where(exercised, rng.integers(15, 91, rows), 0)
+
+    sleep_hours = rng.uniform(6, 9, rows)
+    no_sleep = rng.random(rows) < missing['sleep']
+    sleep_hours[no_sleep] = np.nan
+
+    return pd.DataFrame({
+        'user_id': np.repeat(user_ids, num_days),
+        'date': np.tile(day_strings, len(user_ids)),
+        'water_intake': water_intake,
+        'water_target': 2000,
+        'systolic_pressure': _optional_int(systolic, no_bp),
+        'diastolic_pressure': _optional_int(diastolic, no_bp),
+        'weight': weight,
+        'breakfast_completed': rng.random(rows) < 0.8,
+        'lunch_completed': rng.random(rows) < 0.9,
+        'dinner_completed': rng.random(rows) < 0.85,
+        'exercise_minutes': exercise_minutes,
+        'exercise_type': np.where(exercised, rng.choice(EXERCISE_TYPES, rows), None),
+        'sleep_hours': sleep_hours,
+        'sleep_quality': np.where(no_sleep, None, rng.choice(SLEEP_QUALITIES, rows))
+    })
+
+
+def _per_user_rows(rng, user_ids, mean_per_user):
+    """Repartir filas entre usuarios (Poisson) y numerarlas dentro de cada usuario"""
+    counts = rng.poisson(mean_per_user, len(user_ids))
+    owners = np.repeat(user_ids, counts)
+    starts = np.cumsum(counts) - counts
+    numbers = np.arange(counts.sum()) - np.repeat(starts, counts) + 1
+    return owners, numbers
+
+
+def _random_moments(rng, base_date, num_days, rows):
+    """Instantes aleatorios dentro del periodo generado"""
+    seconds = rng.integers(0, num_days * 86400, rows).astype('timedelta64[s]')
+    return base_date.astype('datetime64[s]') + seconds
+
+
+def _tasks_chunk(rng, user_ids, first_id, base_date, num_days, tasks_per_user):
+    """Tareas del bloque; los ids continúan desde first_id"""
+    owners, numbers = _per_user_rows(rng, user_ids, tasks_per_user)
+    rows = len(owners)
+    created_at = _random_moments(rng, base_date, num_days, rows)
+    completed = rng.random(rows) < 0.7
+    completed_at = created_at + rng.integers(1, 25, rows).astype('timedelta64[h]')
+    completed_at[~completed] = np.datetime64('NaT')
+
+    return pd.DataFrame({
+        'id': first_id + np.arange(rows),
+        'user_id': owners,
+        'title': _join('Tarea ', numbers, ' del Usuario ', owners),
+        'description': _join('Descripción de la tarea ', numbers),
+        'category': rng.choice(TASK_CATEGORIES, rows),
+        'priority': rng.choice(TASK_PRIORITIES, rows),
+        'completed': completed,
+        'due_date': np.datetime_as_string(created_at.astype('datetime64[D]') + rng.integers(0, 8, rows) * DAY),
+        'due_time': _join(np.char.zfill(rng.integers(8, 21, rows).astype(str), 2), ':',
+                          np.char.zfill(rng.integers(0, 60, rows).astype(str), 2)),
+        'reminder_enabled': rng.random(rows) < 0.8,
+        'created_at': created_at,
+        'completed_at': completed_at
+    })
+
+
+def _notifications_chunk(rng, user_ids, first_id, base_date, num_days, notifications_per_user):
+    """Notificaciones del bloque; los ids continúan desde first_id"""
+    owners, numbers = _per_user_rows(rng, user_ids, notifications_per_user)
+    rows = len(owners)
+    created_at = _random_moments(rng, base_date, num_days, rows)
+    read = rng.random(rows) < 0.6
+    read_at = created_at + rng.integers(1, 13, rows).astype('timedelta64[h]')
+    read_at[~read] = np.datetime64('NaT')
+
+    return pd.DataFrame({
+        'id': first_id + np.arange(rows),
+        'user_id': owners,
+        'type': rng.choice(NOTIFICATION_TYPES, rows),
+        'message': _join('Notificación ', numbers, ' para Usuario ', owners),
+        'priority': rng.choice(NOTIFICATION_PRIORITIES, rows),
+        'read': read,
+        'created_at': created_at,
+        'read_at': read_at
+    })
+
+
+def iter_sample_chunks(num_users, num_days, tasks_per_user=35, notifications_per_user=20,
+                       missing_rates=None, seed=42, users_per_chunk=1000, end_date=None):
+    """Generar los datos de muestra por bloques de usuarios con NumPy
+
+    Cada bloque es un diccionario {tabla: DataFrame}. Con la misma semilla y fecha
+    final (end_date, hoy si no se indica) el resultado es idéntico sea cual sea
+    users_per_chunk, que se redondea a un múltiplo de SEED_BLOCK_USERS y solo
+    determina la memoria usada.
+    """
+    missing = dict(DEFAULT_MISSING_RATES, **(missing_rates or {}))
+    end_date = np.datetime64(end_date or datetime.now().date(), 'D')
+    base_date = end_date - (num_days - 1) * DAY
+    day_strings = np.datetime_as_string(base_date + np.arange(num_days) * DAY)
+    blocks_per_chunk = max(1, users_per_chunk // SEED_BLOCK_USERS)
+
+    next_ids = {'tasks': 1, 'notifications': 1}
+    num_blocks = -(-num_users // SEED_BLOCK_USERS)
+    for first_block in range(0, num_blocks, blocks_per_chunk):
+        blocks = [
+            _sample_block(block, num_users, seed, base_date, day_strings, missing,
+                          tasks_per_user, notifications_per_user, next_ids)
+            for block in range(first_block, min(first_block + blocks_per_chunk, num_blocks))
+        ]
+        yield {table: pd.concat([block[table] for block in blocks], ignore_index=True) for table in SAMPLE_TABLES}
+
+
+def _sample_block(block, num_users, seed, base_date, day_strings, missing,
+                  tasks_per_user, notifications_per_user, next_ids):
+    """Datos de un bloque de semilla; next_ids lleva los próximos ids de tareas y notificaciones"""
+    first_user = block * SEED_BLOCK_USERS + 1
+    user_ids = np.arange(first_user, min(first_user + SEED_BLOCK_USERS, num_users + 1))
+    num_days = len(day_strings)
+
+    users = _users_chunk(_block_rng(seed, 'users', block), user_ids, base_date)
+    health = _health_chunk(_block_rng(seed, 'health_data', block), user_ids,
+                           users['weight'].to_numpy(), day_strings, missing)
+    tasks = _tasks_chunk(_block_rng(seed, 'tasks', block), user_ids, next_ids['tasks'],
+                         base_date, num_days, tasks_per_user)
+    notifications = _notifications_chunk(_block_rng(seed, 'notifications', block), user_ids,
+                                         next_ids['notifications'], base_date, num_days, notifications_per_user)
+    next_ids['tasks'] += len(tasks)
+    next_ids['notifications'] += len(notifications)
+
+    return {'users': users, 'health_data': health, 'tasks': tasks, 'notifications': notifications}
+
+
+# ==================== ESCRITURA POR BLOQUES ====================
+
+def write_chunks_csv(chunks, directory='data', prefix='sample_'):
+    """Escribir los bloques en CSV (mismo formato que save_sample_data_to_csv)"""
+    os.makedirs(directory, exist_ok=True)
+    counts = dict.fromkeys(SAMPLE_TABLES, 0)
+    for index, chunk in enumerate(chunks):
+        for table, df in chunk.items():
+            path = os.path.join(directory, f'{prefix}{table}.csv')
+            df.to_csv(path, mode='w' if index == 0 else 'a', header=index == 0, index=False)
+            counts[table] += len(df)
+    return counts
+
+
+def write_chunks_parquet(chunks, directory='data', prefix='sample_'):
+    """Escribir los bloques en Parquet, un grupo de filas por bloque (requiere pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('El formato parquet requiere pyarrow (pip install pyarrow)')
+
+    os.makedirs(directory, exist_ok=True)
+    counts = dict.fromkeys(SAMPLE_TABLES, 0)
+    writers = {}
+    try:
+        for chunk in chunks:
+            for table, df in chunk.items():
+                if table in writers:
+                    # El esquema del primer bloque evita tipos nulos en bloques sin valores
+                    batch = pa.Table.from_pandas(df, schema=writers[table].schema, preserve_index=False)
+                else:
+                    batch = pa.Table.from_pandas(df, preserve_index=False)
+                    path = os.path.join(directory, f'{prefix}{table}.parquet')
+                    writers[table] = pq.ParquetWriter(path, batch.schema)
+                writers[table].write_table(batch)
+                counts[table] += len(df)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return counts
+
+
+def write_chunks_sqlite(chunks, db_path):
+    """Crear una base nueva con el esquema de app/models.py y cargar los bloques en ella
+
+    Al terminar se reconstruyen task_counters y daily_stats con las funciones de la app.
+    """
+    import sqlite3
+    import sys
+
+    if os.path.exists(db_path):
+        raise FileExistsError(f'La base {db_path} ya existe')
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import create_app
+    from app.models import db
+    from app.bulk_load import LOAD_ORDER, LOAD_PRAGMAS, prepare_insert, frame_rows
+    from app.task_stats import rebuild_task_counters
+    from app.notification_state import rebuild_notification_counters
+    from app.daily_stats import rebuild_daily_stats
+
+    db_path = os.path.abspath(db_path)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}', 'DB_AUTO_UPGRADE': True})
+    with app.app_context():
+        db.engine.dispose()
+
+    models = {table: model for table, model, _ in LOAD_ORDER}
+    counts = dict.fromkeys(SAMPLE_TABLES, 0)
+    statements = {}
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+        for chunk in chunks:
+            conn.execute('BEGIN')
+            for table in SAMPLE_TABLES:
+                df = chunk[table]
+                if table not in statements:
+                    statements[table] = prepare_insert(table, models[table], list(df.columns))
+                sql, extra = statements[table]
+                conn.executemany(sql, frame_rows(df, extra))
+                counts[table] += len(df)
+            conn.execute('COMMIT')
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+
+    with app.app_context():
+        rebuild_task_counters()
+        rebuild_notification_counters()
+        rebuild_daily_stats()
+        db.session.commit()
+    return counts
+
+
+def generate_dataset(output, fmt='csv', **options):
+    """Generar y escribir un conjunto de datos sintético; devuelve las filas por tabla"""
+    chunks = iter_sample_chunks(**options)
+    if fmt == 'csv':
+        return write_chunks_csv(chunks, output)
+    if fmt == 'parquet':
+        return write_chunks_parquet(chunks, output)
+    if fmt == 'sqlite':
+        return write_chunks_sqlite(chunks, output)
+    raise ValueError(f'Formato desconocido: {fmt}')
+
+
+def _parse_args():
+    """Argumentos del generador vectorizado"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generar datos de muestra para Life Organizer')
+    parser.add_argument('--users', type=int, help='Usuarios a generar (activa el generador vectorizado)')
+    parser.add_argument('--days', type=int, default=30, help='Días de datos de salud por usuario')
+    parser.add_argument('--tasks-per-user', type=float, default=35, help='Promedio de tareas por usuario')
+    parser.add_argument('--notifications-per-user', type=float, default=20,
+                        help='Promedio de notificaciones por usuario')
+    for name, rate in DEFAULT_MISSING_RATES.items():
+        parser.add_argument(f'--missing-{name.replace("_", "-")}', type=float, default=rate,
+                            help=f'Fracción de días sin registro de {name}')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla para resultados reproducibles')
+    parser.add_argument('--chunk-users', type=int, default=1000,
+                        help=f'Usuarios por bloque de escritura (múltiplo de {SEED_BLOCK_USERS}; no cambia los datos)')
+    parser.add_argument('--end-date', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+                        help='Último día de los datos (AAAA-MM-DD, hoy por defecto); fijarlo hace la salida reproducible')
+    parser.add_argument('--format', choices=['csv', 'parquet', 'sqlite'], default='csv', help='Formato de salida')
+    parser.add_argument('--output', default='data', help='Directorio (csv/parquet) o archivo .db (sqlite)')
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    # Generar y guardar datos de muestra
-    save_sample_data_to_csv()
-    
-    # Generar resumen de análisis
-    generate_analytics_summary()
+    args = _parse_args()
     
-    print("\n✅ Datos de muestra generados exitosamente!")
-    print("📁 Archivos guardados en el directorio 'data/'")
-    print("🚀 Listo para usar en la aplicación Life Organizer")
+    if args.users:
+        # Generador vectorizado por bloques
+        start = datetime.now()
+        counts = generate_dataset(
+            args.output, args.format,
+            num_users=args.users,
+            num_days=args.days,
+            tasks_per_user=args.tasks_per_user,
+            notifications_per_user=args.notifications_per_user,
+            missing_rates={name: getattr(args, f'missing_{name}') for name in DEFAULT_MISSING_RATES},
+            seed=args.seed,
+            users_per_chunk=args.chunk_users,
+            end_date=args.end_date
+        )
+        seconds = (datetime.now() - start).total_seconds()
+        total = sum(counts.values())
+        print(f"✅ {total} filas generadas en {seconds:.1f}s ({total / max(seconds, 1e-9):,.0f} filas/s)")
+        for table, rows in counts.items():
+            print(f"- {table}: {rows} registros")
+        print(f"📁 Salida ({args.format}): {args.output}")
+    else:
+        # Generar y guardar datos de muestra
+        save_sample_data_to_csv()
+        
+        # Generar resumen de análisis
+        generate_analytics_summary()
+        
+        print("\n✅ Datos de muestra generados exitosamente!")
+        print("📁 Archivos guardados en el directorio 'data/'")
+        print("🚀 Listo para usar en la aplicación Life Organizer")
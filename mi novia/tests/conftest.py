@@ -0,0 +1,47 @@
+"""
+Fixtures compartidas de las pruebas: una app sobre una base SQLite temporal y un cliente
+con sesión iniciada. Las alertas se evalúan al final de cada petición y los trabajos no
+tienen hilos en segundo plano, así que las pruebas controlan cuándo se ejecutan.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.models import db, User
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'DB_AUTO_UPGRADE': True,
+        'ALERTS_ASYNC': False,
+        'JOBS_WORKERS': 0,
+    })
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def user_id(app):
+    user = User(name='Prueba', email='prueba@example.com')
+    user.set_password('prueba')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+@pytest.fixture
+def client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+    return client
@@ -0,0 +1,83 @@
+"""
+Reglas de alertas: sin duplicados dentro de la ventana y resolución automática
+"""
+
+from datetime import date, datetime, timedelta
+
+from app.alerts import evaluate_users
+from app.models import db, HealthAlert, HealthData, Notification
+
+
+def record_pressure(user_id, systolic, diastolic, day=None):
+    day = day or date.today()
+    health = HealthData.query.filter_by(user_id=user_id, date=day).first()
+    if health is None:
+        health = HealthData(user_id=user_id, date=day)
+        db.session.add(health)
+    health.systolic_pressure, health.diastolic_pressure = systolic, diastolic
+    db.session.commit()
+
+
+def evaluate(user_id, now):
+    result = evaluate_users([user_id], now=now)
+    db.session.commit()
+    return result
+
+
+def test_alert_is_created_once_per_window(app, user_id):
+    now = datetime.utcnow()
+    record_pressure(user_id, 160, 100)
+
+    assert evaluate(user_id, now)['created'] == 1
+    assert evaluate(user_id, now + timedelta(minutes=5))['created'] == 0
+
+    alert = HealthAlert.query.one()
+    assert (alert.alert_type, alert.resolved) == ('high_blood_pressure', False)
+    assert Notification.query.filter_by(user_id=user_id, type='health_alert').count() == 1
+
+
+def test_resolved_alert_is_not_recreated_in_the_same_window(app, user_id):
+    now = datetime.utcnow()
+    record_pressure(user_id, 160, 100)
+    evaluate(user_id, now)
+    alert = HealthAlert.query.one()
+    alert.resolved = True
+    db.session.commit()
+
+    assert evaluate(user_id, now)['created'] == 0
+    assert evaluate(user_id, now + timedelta(days=1))['created'] == 1
+    assert HealthAlert.query.count() == 2
+
+
+def test_alert_resolves_when_readings_normalize(app, user_id):
+    now = datetime.utcnow()
+    record_pressure(user_id, 160, 100)
+    evaluate(user_id, now)
+
+    record_pressure(user_id, 118, 76)
+    result = evaluate(user_id, now + timedelta(minutes=5))
+
+    alert = HealthAlert.query.one()
+    assert result['resolved'] == 1
+    assert alert.resolved and alert.resolved_at is not None
+
+
+def test_missing_readings_do_not_resolve(app, user_id):
+    now = datetime.utcnow()
+    record_pressure(user_id, 160, 100, day=date.today() - timedelta(days=1))
+    evaluate(user_id, now)
+
+    # Sin lecturas recientes la regla no es evaluable: la alerta sigue abierta
+    result = evaluate_users([user_id], today=date.today() + timedelta(days=10), now=now + timedelta(days=10))
+
+    assert result['resolved'] == 0
+    assert HealthAlert.query.one().resolved is False
+
+
+def test_blood_pressure_route_opens_and_resolves_alert(client, user_id):
+    client.post('/api/health/blood-pressure', json={'systolic': 165, 'diastolic': 102})
+    assert HealthAlert.query.filter_by(user_id=user_id, resolved=False).count() == 1
+
+    client.post('/api/health/blood-pressure', json={'systolic': 120, 'diastolic': 80})
+    db.session.expire_all()
+    assert HealthAlert.query.filter_by(user_id=user_id, resolved=False).count() == 0
@@ -0,0 +1,61 @@
+"""
+Carga masiva de CSV (flask load-data)
+"""
+
+import sqlite3
+
+import pytest
+
+from app.bulk_load import LoadError, load_sample_csvs
+from app.models import db, HealthData, User
+
+
+def write_csvs(directory):
+    (directory / 'sample_users.csv').write_text(
+        'id,name,email\n1,Ana,ana@example.com\n2,Luis,\n3,Eva,eva@example.com\n'
+    )
+    (directory / 'sample_health_data.csv').write_text(
+        'user_id,date,water_intake\n1,2024-03-01,500\n1,2024-03-01,700\n3,2024-03-01,900\n99,2024-03-01,100\n'
+    )
+
+
+@pytest.fixture
+def db_path(app):
+    path = db.engine.url.database
+    db.session.remove()
+    db.engine.dispose()
+    return path
+
+
+def test_rejected_rows_are_counted(db_path, tmp_path):
+    write_csvs(tmp_path)
+
+    results = load_sample_csvs(db_path, str(tmp_path), report=lambda message: None)
+
+    users, health = results['users'], results['health_data']
+    assert (users.read, users.inserted) == (3, 2)
+    assert sum(users.rejected.values()) == 1
+    assert any('NOT NULL' in reason for reason in users.rejected)
+    assert (health.read, health.inserted) == (4, 2)
+    assert any('UNIQUE' in reason for reason in health.rejected)
+    assert any('FOREIGN KEY' in reason for reason in health.rejected)
+    assert User.query.count() == 2
+    assert HealthData.query.count() == 2
+
+
+def test_refuses_database_with_data(db_path, tmp_path):
+    write_csvs(tmp_path)
+    load_sample_csvs(db_path, str(tmp_path), report=lambda message: None)
+
+    with pytest.raises(LoadError):
+        load_sample_csvs(db_path, str(tmp_path), report=lambda message: None)
+
+
+def test_refuses_wal_database(db_path, tmp_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.close()
+    write_csvs(tmp_path)
+
+    with pytest.raises(LoadError):
+        load_sample_csvs(db_path, str(tmp_path), report=lambda message: None)
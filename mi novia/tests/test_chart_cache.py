@@ -0,0 +1,94 @@
+"""
+ChartCache: desalojo LRU por bytes, nivel en disco y métricas de los trabajadores
+"""
+
+import os
+from concurrent.futures import Future
+
+from app.chart_cache import ChartCache
+from app.report_jobs import ReportJob, ReportJobRunner
+
+
+def key(name, user_id=1):
+    return (name, user_id, 30, 'huella')
+
+
+def chart_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.chart'))
+
+
+def test_memory_evicts_least_recently_used_by_bytes():
+    cache = ChartCache(max_bytes=10)
+    cache.put(key('a'), 'aaaa')
+    cache.put(key('b'), 'bbbb')
+    assert cache.get(key('a')) == 'aaaa'
+
+    cache.put(key('c'), 'cccc')
+
+    assert cache.get(key('b')) is None
+    assert cache.get(key('a')) == 'aaaa'
+    assert cache.get(key('c')) == 'cccc'
+    stats = cache.stats()
+    assert stats['bytes'] == 8
+    assert stats['evictions'] == 1
+    assert (stats['hits'], stats['misses']) == (3, 1)
+
+
+def test_entry_larger_than_memory_limit_is_not_kept():
+    cache = ChartCache(max_bytes=4)
+    cache.put(key('a'), 'aaaaaa')
+
+    assert cache.get(key('a')) is None
+    assert cache.stats()['bytes'] == 0
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    writer = ChartCache(disk_dir=str(tmp_path))
+    writer.put(key('a'), '<svg>ñ</svg>')
+
+    reader = ChartCache(disk_dir=str(tmp_path))
+    assert reader.get(key('a')) == '<svg>ñ</svg>'
+    assert reader.get(key('a')) == '<svg>ñ</svg>'
+
+    stats = reader.stats()
+    assert (stats['hits'], stats['disk_hits'], stats['misses']) == (2, 1, 0)
+    assert stats['disk_bytes'] == len('<svg>ñ</svg>'.encode('utf-8'))
+
+
+def test_disk_tier_scans_only_over_the_limit(tmp_path, monkeypatch):
+    cache = ChartCache(disk_dir=str(tmp_path), max_disk_bytes=10)
+    scans = []
+    original = ChartCache._disk_files
+    monkeypatch.setattr(ChartCache, '_disk_files', lambda self: scans.append(1) or original(self))
+
+    cache.put(key('a'), 'aaaa')
+    os.utime(os.path.join(tmp_path, chart_files(tmp_path)[0]), (1, 1))
+    cache.put(key('b'), 'bbbb')
+    assert scans == []
+
+    cache.put(key('c'), 'cccc')
+
+    assert len(scans) == 1
+    assert len(chart_files(tmp_path)) == 2
+    assert cache.stats()['disk_bytes'] == 8
+    cache.clear()
+    assert cache.get(key('a')) is None
+    assert cache.get(key('c')) == 'cccc'
+
+
+def test_runner_aggregates_worker_cache_usage():
+    runner = ReportJobRunner(max_workers=1)
+    for pid, hits, memory in ((100, 2, 50), (101, 1, 30)):
+        job = ReportJob(1, 30)
+        job.future = Future()
+        job.future.set_result(({}, {'hits': hits, 'disk_hits': 1, 'misses': 3, 'evictions': 0,
+                                    'pid': pid, 'bytes': memory, 'disk_bytes': 70}))
+        runner._finish(job)
+
+    metrics = runner.render_metrics()
+
+    assert 'life_organizer_chart_cache_lookups_total{result="memory_hit"} 1' in metrics
+    assert 'life_organizer_chart_cache_lookups_total{result="disk_hit"} 2' in metrics
+    assert 'life_organizer_chart_cache_lookups_total{result="miss"} 6' in metrics
+    assert 'life_organizer_chart_cache_bytes{tier="memory"} 30' in metrics
+    assert 'life_organizer_chart_cache_bytes{tier="disk"} 70' in metrics
@@ -0,0 +1,102 @@
+"""
+CohortAnalyzer: mismas estadísticas por usuario que los cuatro análisis de HealthDataAnalyzer
+"""
+
+import math
+from datetime import date, timedelta
+
+from app import cohort_analysis
+from app.cohort_analysis import CohortAnalyzer, user_stats
+from app.daily_stats import rebuild_daily_stats
+from app.data_analysis import HealthDataAnalyzer
+from app.models import db, User, HealthData, Task
+
+
+def same(expected, actual):
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return expected.keys() == actual.keys() and all(same(expected[key], actual[key]) for key in expected)
+    if expected is None or actual is None:
+        return expected is None and actual is None
+    expected, actual = float(expected), float(actual)
+    if math.isnan(expected) or math.isnan(actual):
+        return math.isnan(expected) and math.isnan(actual)
+    return math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def seed_users(count, days=30):
+    today = date.today()
+    user_ids = []
+    for index in range(count):
+        user = User(name=f'Cohorte {index}', email=f'cohorte{index}@example.com')
+        user.set_password('cohorte')
+        db.session.add(user)
+        db.session.flush()
+        user_ids.append(user.id)
+        # El día del corte (hoy - days) entra; el anterior no
+        for offset in range(days + 2):
+            if (offset + index) % 3 == 0:
+                continue
+            db.session.add(HealthData(
+                user_id=user.id, date=today - timedelta(days=offset),
+                water_intake=1200 + 97 * ((offset * (index + 1)) % 13), water_target=2000,
+                systolic_pressure=115 + (offset * 7 + index) % 35 if offset % 2 else None,
+                diastolic_pressure=75 + (offset * 5 + index) % 20 if offset % 2 else None,
+                weight=70.0 + index - offset * 0.1 if offset % 4 else None))
+        for task_index in range(index + 2):
+            db.session.add(Task(user_id=user.id, title=f'Tarea {task_index}',
+                                category=('work', 'health', 'personal')[task_index % 3],
+                                priority=('low', 'high')[(task_index + index) % 2],
+                                completed=task_index % 2 == 0))
+    # Un usuario sin datos en medio de los rangos de ids
+    empty = User(name='Sin datos', email='vacio@example.com')
+    empty.set_password('vacio')
+    db.session.add(empty)
+    db.session.flush()
+    user_ids.append(empty.id)
+    rebuild_daily_stats()
+    db.session.commit()
+    return user_ids
+
+
+def per_user_stats(analyzer, user_id, days):
+    water = analyzer.analyze_water_intake_trends(user_id, days)
+    bp = analyzer.analyze_blood_pressure_trends(user_id, days)
+    weight = analyzer.analyze_weight_trends(user_id, days)
+    return {
+        'water_analysis': water['stats'] if water else None,
+        'blood_pressure_analysis': bp['stats'] if bp else None,
+        'weight_analysis': weight['stats'] if weight else None,
+        'task_analysis': analyzer.analyze_task_completion_patterns(user_id, days)
+    }
+
+
+def test_cohort_matches_per_user_analyses(app, monkeypatch):
+    # Rangos de dos ids: la cohorte completa se lee y calcula en varios grupos
+    monkeypatch.setattr(cohort_analysis, 'USER_ID_BATCH', 2)
+    user_ids = seed_users(4)
+    analyzer = HealthDataAnalyzer(engine=db.engine, cache=None)
+    cohort = CohortAnalyzer(engine=db.engine)
+
+    everyone = cohort.analyze(days=30)
+    selected = cohort.analyze(user_ids[1:], days=30)
+
+    for user_id in user_ids:
+        expected = per_user_stats(analyzer, user_id, 30)
+        assert same(expected, user_stats(everyone, user_id)), user_id
+        if user_id != user_ids[0]:
+            assert same(expected, user_stats(selected, user_id)), user_id
+    assert user_stats(everyone, user_ids[-1])['water_analysis'] is None
+
+
+def test_cohort_rows_of_a_user_share_one_batch(app, monkeypatch):
+    monkeypatch.setattr(cohort_analysis, 'USER_ID_BATCH', 2)
+    user_ids = seed_users(3)
+    cohort = CohortAnalyzer(engine=db.engine)
+
+    batches = cohort._user_batches(None)
+    frames = list(cohort._health_frames(batches, 30))
+
+    assert len(frames) == 2
+    seen = [set(frame['user_id']) for frame in frames]
+    assert seen[0].isdisjoint(seen[1])
+    assert set().union(*seen) == set(user_ids[:3])
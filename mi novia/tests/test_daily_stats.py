@@ -0,0 +1,64 @@
+"""
+Resumen diario: periodos por semana ISO, granularidad por defecto y lectura desde el analizador
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+from app.daily_stats import (
+    get_daily_stats_trends, period_start, rebuild_daily_stats, stats_table, upsert_statement
+)
+from app.data_analysis import HealthDataAnalyzer
+from app.models import db, HealthData
+
+
+def add_water(user_id, *readings):
+    for day, amount in readings:
+        db.session.add(HealthData(user_id=user_id, date=day, water_intake=amount, water_target=2000))
+    rebuild_daily_stats(user_id)
+    db.session.commit()
+
+
+def test_week_crossing_new_year_is_one_period(app, user_id):
+    # Lunes 30/12/2024 y jueves 2/1/2025 son la semana ISO 2025-W01; el lunes 6/1 empieza otra
+    add_water(user_id, (date(2024, 12, 30), 1000), (date(2025, 1, 2), 2000), (date(2025, 1, 6), 1500))
+
+    trends = get_daily_stats_trends(user_id, date(2024, 12, 1), 'week')
+
+    assert trends['water_intake'] == [
+        {'date': '2024-12-30', 'value': 1500},
+        {'date': '2025-01-06', 'value': 1500},
+    ]
+
+
+def test_health_trends_default_to_daily_points(client, user_id):
+    today = date.today()
+    add_water(user_id, (today - timedelta(days=200), 1000), (today - timedelta(days=199), 1200))
+
+    response = client.get('/api/analytics/health-trends?days=365')
+
+    assert response.status_code == 200
+    assert [point['value'] for point in response.get_json()['water_intake']] == [1000, 1200]
+
+
+def test_analyzer_reads_daily_stats(app, user_id):
+    today = date.today()
+    add_water(user_id, (today - timedelta(days=2), 1000), (today - timedelta(days=1), 3000))
+    # Una fila de health_data sin recalcular el resumen no aparece en el análisis
+    db.session.add(HealthData(user_id=user_id, date=today, water_intake=500, water_target=2000))
+    db.session.commit()
+
+    analysis = HealthDataAnalyzer(engine=db.engine, cache=None).analyze_water_intake_trends(user_id, 7)
+
+    assert analysis['stats']['average_daily'] == 2000
+    assert analysis['stats']['target_achievement_rate'] == 50
+
+
+def test_postgresql_statements():
+    upsert = str(upsert_statement('postgresql', keys='SELECT 1 AS user_id, CURRENT_DATE AS day', task_filter='true'))
+    assert 'LEAST(' in upsert and 'GREATEST(' in upsert
+    assert 'completed = 1' not in upsert
+
+    week = period_start(stats_table.c.stat_date, 'week', 'postgresql')
+    assert 'date_trunc' in str(week.compile(dialect=postgresql.dialect()))
@@ -0,0 +1,32 @@
+"""
+HealthDataAnalyzer: matplotlib solo se carga al renderizar PNG
+"""
+
+import subprocess
+import sys
+
+import pandas as pd
+
+from app.data_analysis import HealthDataAnalyzer, create_sample_data
+
+PROJECT_DIR = __file__.rsplit('tests', 1)[0]
+
+
+def test_import_does_not_load_pyplot():
+    code = ("import sys, app.data_analysis; "
+            "print('matplotlib.pyplot' in sys.modules or 'seaborn' in sys.modules)")
+    output = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+
+    assert output.stdout.strip() == 'False'
+
+
+def test_png_and_svg_charts_render():
+    analyzer = HealthDataAnalyzer(engine=object(), cache=None)
+    health_df = create_sample_data()
+    health_df['date'] = pd.to_datetime(health_df['date'])
+
+    png = analyzer.create_water_intake_chart(1, 30, health_df, 'png')
+    svg = analyzer.create_water_intake_chart(1, 30, health_df, 'svg')
+
+    assert png.startswith('data:image/png;base64,')
+    assert svg.startswith('<svg')
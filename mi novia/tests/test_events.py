@@ -0,0 +1,21 @@
+"""
+Límites de streams del EventBroker
+"""
+
+import pytest
+
+from app.events import EventBroker, StreamLimitError
+
+
+def test_rejected_subscription_does_not_register_user():
+    broker = EventBroker(max_streams=1)
+    subscription, _, _ = broker.subscribe(1)
+
+    with pytest.raises(StreamLimitError):
+        broker.subscribe(2)
+
+    assert not broker.has_subscribers(2)
+    assert broker.stats()['users'] == 1
+
+    subscription.close()
+    assert broker.stats()['streams'] == 0
@@ -0,0 +1,115 @@
+"""
+Exportación en streaming: NDJSON, CSV de una tabla, gzip, aislamiento entre usuarios e instantánea
+"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+
+from app import export
+from app.export import generate_export
+from app.models import db, User, HealthData, Task, Notification
+from app.notification_state import add_notification
+
+
+def seed(user_id):
+    db.session.add_all([
+        HealthData(user_id=user_id, date=date(2025, 3, 1), water_intake=1500, weight=70.5),
+        HealthData(user_id=user_id, date=date(2025, 3, 2), water_intake=2100),
+        Task(user_id=user_id, title='Café, "comillas"\ny salto', category='personal',
+             due_date=date(2025, 3, 5), created_at=datetime(2025, 3, 1, 8, 0)),
+        Task(user_id=user_id, title='Correr', category='exercise', created_at=datetime(2025, 3, 2, 8, 0)),
+    ])
+    add_notification(user_id, type='info', message='Recordatorio ñ')
+
+
+@pytest.fixture
+def other_user_id(app):
+    user = User(name='Otra', email='otra@example.com')
+    user.set_password('otra')
+    db.session.add(user)
+    db.session.flush()
+    seed(user.id)
+    db.session.commit()
+    return user.id
+
+
+def ndjson(body):
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+def test_ndjson_round_trip_only_contains_own_rows(client, user_id, other_user_id):
+    seed(user_id)
+    db.session.commit()
+
+    response = client.get('/api/export')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = ndjson(response.data)
+    assert {line['data']['user_id'] for line in lines} == {user_id}
+    tables = [line['table'] for line in lines]
+    assert (tables.count('health_data'), tables.count('tasks'), tables.count('notifications')) == (2, 2, 1)
+    task = next(line['data'] for line in lines if line['table'] == 'tasks')
+    assert task['title'] == 'Café, "comillas"\ny salto'
+    assert task['due_date'] == '2025-03-05' and task['created_at'] == '2025-03-01T08:00:00'
+    water = [line['data']['water_intake'] for line in lines if line['table'] == 'health_data']
+    assert water == [1500, 2100]
+
+
+def test_csv_export_of_one_table(client, user_id, other_user_id):
+    seed(user_id)
+    db.session.commit()
+
+    response = client.get('/api/export?format=csv&tables=tasks')
+
+    assert response.status_code == 200
+    assert 'export-tasks.csv' in response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.data.decode('utf-8'))))
+    assert list(rows[0]) == [column.name for column in Task.__table__.columns]
+    assert [row['title'] for row in rows] == ['Café, "comillas"\ny salto', 'Correr']
+    assert {row['user_id'] for row in rows} == {str(user_id)}
+
+
+@pytest.mark.parametrize('query', ['format=csv', 'format=csv&tables=tasks,notifications',
+                                   'tables=tasks,desconocida', 'format=xml'])
+def test_invalid_export_requests_return_400(client, query):
+    assert client.get(f'/api/export?{query}').status_code == 400
+
+
+def test_gzip_body_decompresses_to_the_plain_export(client, user_id, monkeypatch):
+    seed(user_id)
+    db.session.commit()
+    # Fragmentos pequeños: el cuerpo gzip se envía en varias partes
+    monkeypatch.setattr(export, 'EXPORT_FLUSH_BYTES', 64)
+
+    plain = client.get('/api/export').data
+    compressed = client.get('/api/export?gzip=true')
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.data[:2] == b'\x1f\x8b'
+    assert gzip.decompress(compressed.data) == plain
+
+
+def test_export_reads_one_snapshot(app, user_id, monkeypatch):
+    db.session.execute(text('PRAGMA journal_mode=WAL'))
+    seed(user_id)
+    db.session.commit()
+    monkeypatch.setattr(export, 'EXPORT_FLUSH_BYTES', 1)
+    body = generate_export(user_id, ['tasks', 'notifications'])
+
+    first = next(body)
+    # Escrituras confirmadas durante la exportación: no aparecen en la instantánea
+    db.session.add(Task(user_id=user_id, title='Nueva', category='work'))
+    add_notification(user_id, type='info', message='Nueva')
+    db.session.commit()
+    lines = ndjson(first + b''.join(body))
+
+    assert [line['table'] for line in lines] == ['tasks', 'tasks', 'notifications']
+    assert 'Nueva' not in {line['data'].get('title') or line['data'].get('message') for line in lines}
+    assert Notification.query.filter_by(user_id=user_id).count() == 2
@@ -0,0 +1,102 @@
+"""
+Validación de los endpoints de salud, lotes y upsert del registro diario
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.health_writes import upsert_health_data
+from app.models import HealthData
+
+
+@pytest.mark.parametrize('url, payload', [
+    ('/api/health/exercise', {'minutes': 'abc'}),
+    ('/api/health/exercise', {'minutes': -5}),
+    ('/api/health/exercise', {}),
+    ('/api/health/water', {'amount': 'mucho'}),
+    ('/api/health/blood-pressure', {'systolic': '120', 'diastolic': 80}),
+    ('/api/health/weight', {'weight': 0}),
+])
+def test_invalid_single_readings_return_400(client, url, payload):
+    response = client.post(url, json=payload)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert HealthData.query.count() == 0
+
+
+def test_exercise_accumulates_minutes(client):
+    client.post('/api/health/exercise', json={'minutes': 20, 'type': 'cardio'})
+    response = client.post('/api/health/exercise', json={'minutes': 15})
+
+    assert response.status_code == 200
+    assert response.get_json()['exercise_minutes'] == 35
+    assert HealthData.query.one().exercise_type == 'cardio'
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'data': 'no es json', 'content_type': 'application/json'},
+                                    {'json': {'meal_type': 'merienda'}}])
+def test_invalid_meal_returns_400(client, kwargs):
+    response = client.post('/api/health/meal', **kwargs)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert HealthData.query.count() == 0
+
+
+def test_meal_toggles_completion(client):
+    first = client.post('/api/health/meal', json={'meal_type': 'lunch'})
+    second = client.post('/api/health/meal', json={'meal_type': 'lunch'})
+
+    assert first.get_json()['completed'] is True
+    assert second.get_json()['completed'] is False
+    assert HealthData.query.one().lunch_completed is False
+
+
+def test_batch_applies_valid_readings_and_reports_invalid_ones(client):
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+
+    response = client.post('/api/health/batch', json={'readings': [
+        {'type': 'water', 'amount': 500},
+        {'type': 'water', 'amount': 250, 'date': yesterday},
+        {'type': 'weight', 'weight': 71.5, 'date': yesterday},
+        {'type': 'meal', 'meal_type': 'dinner'},
+        {'type': 'water', 'amount': 0},
+        {'type': 'sleep', 'hours': 7, 'date': '2999-01-01'},
+    ]})
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert (body['accepted'], body['rejected']) == (4, 2)
+    assert [result['status'] for result in body['results']] == ['ok'] * 4 + ['error'] * 2
+    rows = {row.date.isoformat(): row for row in HealthData.query.all()}
+    assert sorted(rows) == sorted([yesterday, date.today().isoformat()])
+    assert (rows[yesterday].water_intake, rows[yesterday].weight) == (250, 71.5)
+    assert rows[date.today().isoformat()].dinner_completed is True
+
+
+@pytest.mark.parametrize('payload, status', [({}, 400), ({'readings': []}, 400),
+                                             ({'readings': [{'type': 'water', 'amount': 1}] * 1001}, 413)])
+def test_batch_rejects_invalid_payloads(client, payload, status):
+    assert client.post('/api/health/batch', json=payload).status_code == status
+
+
+def test_writes_to_the_same_day_merge_into_one_row(client, user_id):
+    client.post('/api/health/water', json={'amount': 300})
+    client.post('/api/health/blood-pressure', json={'systolic': 120, 'diastolic': 80})
+    client.post('/api/health/water', json={'amount': 200})
+    client.post('/api/health/batch', json=[{'type': 'weight', 'weight': 70}, {'type': 'water', 'amount': 100}])
+
+    row = HealthData.query.filter_by(user_id=user_id).one()
+    assert (row.water_intake, row.systolic_pressure, row.diastolic_pressure, row.weight) == (600, 120, 80, 70)
+
+
+def test_upsert_returns_the_merged_row(app, user_id):
+    today = date.today()
+
+    upsert_health_data(user_id, today, increments={'water_intake': 400})
+    merged = upsert_health_data(user_id, today, values={'weight': 68.0}, increments={'water_intake': 250})
+
+    assert (merged.water_intake, merged.weight) == (650, 68.0)
+    assert HealthData.query.count() == 1
@@ -0,0 +1,120 @@
+"""
+Cola persistente de trabajos: toma por lotes, reintentos con espera, vencimiento de
+la visibilidad y aviso a los hilos trabajadores
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.jobs import job_queue
+from app.models import db, Job
+
+
+@pytest.fixture
+def register(app):
+    """Registrar manejadores de prueba y quitarlos al terminar"""
+    names = []
+
+    def register(name, function, **options):
+        job_queue.handler(name, **options)(function)
+        names.append(name)
+
+    yield register
+    for name in names:
+        job_queue.handlers.pop(name, None)
+
+
+def enqueue(name, count=1, **options):
+    jobs = [job_queue.enqueue(name, {'n': index}, **options) for index in range(count)]
+    db.session.commit()
+    return [job.id for job in jobs]
+
+
+def test_claim_takes_priority_first_and_never_the_same_job_twice(app, register):
+    register('test.batch', lambda payloads: None, batch_size=2)
+    batch_ids = enqueue('test.batch', 3)
+    urgent_ids = enqueue('test.urgent', priority=10)
+
+    claims = [job_queue.claim(worker) for worker in ('w1', 'w2', 'w3', 'w4')]
+
+    assert claims[0][1] == 'test.urgent' and [row.id for row in claims[0][2]] == urgent_ids
+    assert [row.id for row in claims[1][2]] == batch_ids[:2]
+    assert [row.id for row in claims[2][2]] == batch_ids[2:]
+    assert claims[3] == (None, None, [])
+    job = db.session.get(Job, batch_ids[0])
+    assert (job.status, job.attempts, job.locked_by) == ('running', 1, 'w2')
+
+
+def test_failed_batch_is_retried_with_backoff_then_fails(app, register):
+    def boom(payloads):
+        raise ValueError('sin conexión')
+
+    register('test.boom', boom)
+    job_id, = enqueue('test.boom', max_attempts=2)
+
+    job_queue.run_once('w1')
+    job = db.session.get(Job, job_id)
+    assert (job.status, job.attempts, job.locked_by) == ('queued', 1, None)
+    assert job.run_at > datetime.utcnow()
+    assert job.last_error == 'ValueError: sin conexión'
+
+    # Al vencer la espera se toma de nuevo y agota sus intentos
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    job_queue.run_once('w1')
+    db.session.refresh(job)
+    assert (job.status, job.attempts) == ('failed', 2)
+    assert job.finished_at is not None
+
+
+def test_successful_batch_is_done(app, register):
+    received = []
+    register('test.ok', received.extend, batch_size=10)
+    enqueue('test.ok', 3)
+
+    assert job_queue.drain('w1') == 3
+    assert received == [{'n': 0}, {'n': 1}, {'n': 2}]
+    assert Job.query.filter_by(status='done').count() == 3
+
+
+def test_backoff_is_exponential_and_bounded(app):
+    job_queue.backoff_seconds, job_queue.backoff_max_seconds = 2, 10
+
+    assert 1 <= job_queue.backoff(1) <= 2
+    assert 4 <= job_queue.backoff(3) <= 8
+    assert 5 <= job_queue.backoff(10) <= 10
+
+
+def test_expired_visibility_requeues_or_fails(app, register):
+    register('test.slow', lambda payloads: None, timeout=60)
+    retry_id, = enqueue('test.slow')
+    exhausted_id, = enqueue('test.slow', max_attempts=1)
+    start = datetime.utcnow()
+    job_queue.claim('caido', now=start)
+    job_queue.claim('caido', now=start)
+
+    # Antes de vencer nadie puede recuperarlos
+    assert job_queue.requeue_expired(now=start + timedelta(seconds=59)) == 0
+    assert job_queue.requeue_expired(now=start + timedelta(seconds=61)) == 2
+    db.session.commit()
+
+    retry, exhausted = db.session.get(Job, retry_id), db.session.get(Job, exhausted_id)
+    assert (retry.status, retry.locked_by) == ('queued', None)
+    assert exhausted.status == 'failed'
+    assert job_queue.claim('w2')[2][0].id == retry_id
+
+
+def test_commit_wakes_idle_worker(app, register):
+    done = threading.Event()
+    register('test.wake', lambda payloads: done.set())
+    job_queue.poll_interval = 30
+    job_queue.start(workers=1)
+    try:
+        # El hilo queda esperando el aviso; sin él tardaría poll_interval segundos
+        threading.Event().wait(0.3)
+        enqueue('test.wake')
+        assert done.wait(5)
+    finally:
+        job_queue.stop(timeout=5)
@@ -0,0 +1,45 @@
+"""
+Acceso a /metrics: desactivado por defecto, solo localhost o token Bearer
+"""
+
+import pytest
+
+from app import create_app
+
+
+def metrics_client(tmp_path, **config):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "metrics.db"}',
+        'DB_AUTO_UPGRADE': True,
+        'JOBS_WORKERS': 0,
+        **config,
+    })
+    return app.test_client()
+
+
+def test_metrics_disabled_by_default(app):
+    assert app.config['METRICS_ENABLED'] is False
+    assert app.test_client().get('/metrics').status_code == 404
+
+
+@pytest.mark.parametrize('remote_addr, status', [('127.0.0.1', 200), ('10.0.0.5', 403)])
+def test_metrics_without_token_only_from_localhost(tmp_path, remote_addr, status):
+    client = metrics_client(tmp_path, METRICS_ENABLED=True)
+
+    response = client.get('/metrics', environ_base={'REMOTE_ADDR': remote_addr})
+
+    assert response.status_code == status
+
+
+@pytest.mark.parametrize('headers, status', [
+    ({}, 403),
+    ({'Authorization': 'Bearer otro'}, 403),
+    ({'Authorization': 'Bearer secreto'}, 200),
+])
+def test_metrics_with_token_require_bearer(tmp_path, headers, status):
+    client = metrics_client(tmp_path, METRICS_ENABLED=True, METRICS_TOKEN='secreto')
+
+    response = client.get('/metrics', headers=headers, environ_base={'REMOTE_ADDR': '127.0.0.1'})
+
+    assert response.status_code == status
@@ -0,0 +1,71 @@
+"""
+Migraciones de esquema y verificación de versión al iniciar
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import create_app
+from app.migrations import (
+    LATEST_VERSION, SchemaVersionError, _migration_001_indices_compuestos, get_schema_version,
+)
+
+HEALTH_DATA_V0 = """
+    CREATE TABLE health_data (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, date DATE NOT NULL,
+        water_intake INTEGER, water_target INTEGER, systolic_pressure INTEGER,
+        diastolic_pressure INTEGER, weight FLOAT, breakfast_completed BOOLEAN,
+        lunch_completed BOOLEAN, dinner_completed BOOLEAN, snacks_count INTEGER,
+        exercise_minutes INTEGER, exercise_type VARCHAR(100), calories_burned INTEGER,
+        sleep_hours FLOAT, sleep_quality VARCHAR(20), bedtime VARCHAR(10),
+        wakeup_time VARCHAR(10), medications_taken TEXT, created_at DATETIME, updated_at DATETIME
+    )
+"""
+
+
+def test_duplicate_health_days_are_merged(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "v0.db"}')
+    with engine.begin() as conn:
+        conn.execute(text(HEALTH_DATA_V0))
+        for name in ('tasks', 'notifications', 'health_alerts', 'medications'):
+            conn.execute(text(f'CREATE TABLE {name} (id INTEGER PRIMARY KEY, user_id INTEGER, due_date DATE, '
+                              f'category TEXT, completed BOOLEAN, created_at DATETIME, "read" BOOLEAN, '
+                              f'resolved BOOLEAN, active BOOLEAN)'))
+        conn.execute(text("""
+            INSERT INTO health_data (id, user_id, date, water_intake, water_target, systolic_pressure,
+                                     weight, breakfast_completed, lunch_completed, exercise_minutes, updated_at)
+            VALUES (1, 1, '2024-03-01', 500, 2000, NULL, 70.0, 1, 0, 10, '2024-03-01 08:00:00'),
+                   (2, 1, '2024-03-01', 700, NULL, 130, NULL, 0, 1, 20, '2024-03-01 09:00:00'),
+                   (3, 1, '2024-03-01', 0, 2500, NULL, 71.5, 0, 0, 0, '2024-03-01 10:00:00'),
+                   (4, 1, '2024-03-02', 300, 2000, 120, 69.0, 0, 0, 5, '2024-03-02 08:00:00')
+        """))
+        _migration_001_indices_compuestos(conn)
+
+        rows = conn.execute(text(
+            'SELECT id, water_intake, water_target, systolic_pressure, weight, breakfast_completed, '
+            'lunch_completed, exercise_minutes FROM health_data ORDER BY id'
+        )).all()
+
+    assert [tuple(row) for row in rows] == [
+        (1, 1200, 2500, 130, 71.5, 1, 1, 30),
+        (4, 300, 2000, 120, 69.0, 0, 0, 5),
+    ]
+
+
+def test_startup_refuses_outdated_schema_without_writing(tmp_path):
+    path = tmp_path / 'old.db'
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE users (id INTEGER PRIMARY KEY)'))
+    before = path.read_bytes()
+
+    with pytest.raises(SchemaVersionError):
+        create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+
+    assert path.read_bytes() == before
+
+
+def test_auto_upgrade_creates_current_schema(app):
+    from app.models import db
+    with db.engine.connect() as conn:
+        assert get_schema_version(conn) == LATEST_VERSION
@@ -0,0 +1,35 @@
+"""
+Listado incremental de notificaciones con ?since=
+"""
+
+from app.models import db
+from app.notification_state import add_notification
+
+
+def test_since_pages_forward_from_oldest(client, user_id):
+    notifications = [add_notification(user_id, 'info', f'Aviso {index}') for index in range(5)]
+    db.session.commit()
+    ids = [notification.id for notification in notifications]
+
+    first = client.get(f'/api/notifications?since={ids[0]}&limit=2').get_json()
+    second = client.get(f'/api/notifications?since={first[-1]["id"]}&limit=2').get_json()
+    last = client.get(f'/api/notifications?since={second[-1]["id"]}&limit=2').get_json()
+
+    assert [item['id'] for item in first + second + last] == ids[1:]
+
+
+def test_etag_is_not_shared_across_pages_or_endpoints(client, user_id):
+    notifications = [add_notification(user_id, 'info', f'Aviso {index}') for index in range(3)]
+    db.session.commit()
+    first = client.get(f'/api/notifications?since={notifications[0].id}&limit=1')
+    etag = first.headers['ETag']
+
+    assert client.get(f'/api/notifications?since={notifications[0].id}&limit=1',
+                      headers={'If-None-Match': etag}).status_code == 304
+    for url in (f'/api/notifications?since={notifications[1].id}&limit=1',
+                f'/api/notifications?since={notifications[0].id}&limit=2',
+                '/api/notifications',
+                '/api/notifications/unread-count'):
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 200, url
+        assert response.headers['ETag'] != etag
@@ -0,0 +1,34 @@
+"""
+Planes de consulta de las rutas (EXPLAIN QUERY PLAN)
+"""
+
+import sqlite3
+
+from app.cli import _uses_index, check_route_query_plans
+
+
+def test_route_queries_use_indexes():
+    failures, route_errors, total = check_route_query_plans()
+
+    assert route_errors == []
+    assert total > 0
+    assert [' '.join(statement.split()) for statement, _ in failures] == []
+
+
+def plan(sql):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, a INTEGER, b TEXT)')
+    conn.execute('CREATE INDEX ix_t_a ON t (a)')
+    return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+
+
+def test_full_index_scans_are_rejected():
+    index_scan = plan('SELECT * FROM t ORDER BY a')
+    covering_scan = plan('SELECT a FROM t ORDER BY a')
+
+    assert index_scan == ['SCAN t USING INDEX ix_t_a']
+    assert covering_scan == ['SCAN t USING COVERING INDEX ix_t_a']
+    assert not _uses_index(index_scan[0])
+    assert not _uses_index(covering_scan[0])
+    assert not _uses_index(plan("SELECT * FROM t WHERE b = 'x'")[0])
+    assert all(_uses_index(detail) for detail in plan('SELECT * FROM t WHERE a = 1'))
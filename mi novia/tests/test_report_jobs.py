@@ -0,0 +1,114 @@
+"""
+ReportJobRunner: deduplicación, cola llena, expiración de resultados y pool roto
+"""
+
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app import report_jobs
+from app.report_jobs import QueueFullError, ReportJobRunner, report_runner
+
+
+class FakeExecutor:
+    """Ejecutor sin procesos: los futures se resuelven a mano desde el test"""
+
+    def __init__(self, **options):
+        self.broken = False
+        self.futures = []
+
+    def break_pool(self):
+        """Como el pool real: los trabajos pendientes terminan con BrokenProcessPool"""
+        self.broken = True
+        for future in self.futures:
+            if not future.done():
+                future.set_exception(BrokenProcessPool('Un trabajador terminó de forma abrupta'))
+
+    def submit(self, fn, *args):
+        if self.broken:
+            raise BrokenProcessPool('Un trabajador terminó de forma abrupta')
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        for future in self.futures:
+            if cancel_futures:
+                future.cancel()
+
+
+@pytest.fixture
+def executors(monkeypatch):
+    created = []
+
+    def factory(**options):
+        created.append(FakeExecutor(**options))
+        return created[-1]
+
+    monkeypatch.setattr(report_jobs, 'ProcessPoolExecutor', factory)
+    return created
+
+
+def complete(job, report=None):
+    job.future.set_result((report or {'user_id': job.user_id}, {
+        'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'pid': 1, 'bytes': 0, 'disk_bytes': 0}))
+
+
+def test_identical_in_flight_jobs_are_deduplicated(executors):
+    runner = ReportJobRunner()
+
+    first, created = runner.submit('db', 1, 30, 'svg')
+    again, created_again = runner.submit('db', 1, 30, 'svg')
+    other, _ = runner.submit('db', 1, 7, 'svg')
+
+    assert created and not created_again
+    assert again is first
+    assert other is not first
+    assert len(executors[0].futures) == 2
+
+    complete(first)
+    after, created_after = runner.submit('db', 1, 30, 'svg')
+    assert created_after and after is not first
+
+
+def test_full_queue_returns_503(client, executors, monkeypatch):
+    monkeypatch.setattr(report_runner, '_executor', None)
+    monkeypatch.setattr(report_runner, '_in_flight', {})
+    monkeypatch.setattr(report_runner, 'max_pending', 1)
+
+    accepted = client.post('/api/analytics/report', json={'days': 30, 'format': 'svg'})
+    rejected = client.post('/api/analytics/report', json={'days': 7, 'format': 'svg'})
+
+    assert accepted.status_code == 202
+    assert rejected.status_code == 503
+    with pytest.raises(QueueFullError):
+        report_runner.submit('db', 2, 7, 'svg')
+
+
+def test_finished_results_expire_after_ttl(executors):
+    runner = ReportJobRunner(result_ttl=60)
+    job, _ = runner.submit('db', 1, 30, 'svg')
+    complete(job, {'total': 1})
+
+    assert runner.get(job.id).to_dict()['report'] == {'total': 1}
+
+    job.finished_at = time.time() - 61
+    assert runner.get(job.id) is None
+
+
+def test_broken_pool_is_replaced_and_its_jobs_fail(executors):
+    runner = ReportJobRunner()
+    stuck, _ = runner.submit('db', 1, 30, 'svg')
+    executors[0].break_pool()
+    runner._in_flight[stuck.key] = stuck.id  # el callback ya corrió; se simula que aún no
+
+    job, created = runner.submit('db', 1, 7, 'svg')
+
+    assert created
+    assert len(executors) == 2 and job.future in executors[1].futures
+    assert runner.get(stuck.id).to_dict()['status'] == 'failed'
+    retry, created_retry = runner.submit('db', 1, 30, 'svg')
+    assert created_retry and retry is not stuck
+    assert runner.stats()['pending'] == 2
@@ -0,0 +1,29 @@
+"""
+Generador vectorizado de datos de muestra: reproducible con cualquier tamaño de bloque
+"""
+
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'))
+
+from generate_sample_data import SAMPLE_TABLES, iter_sample_chunks
+
+
+def generate(users_per_chunk):
+    frames = {table: [] for table in SAMPLE_TABLES}
+    for chunk in iter_sample_chunks(250, 7, seed=5, users_per_chunk=users_per_chunk, end_date=date(2025, 1, 3)):
+        for table, df in chunk.items():
+            frames[table].append(df)
+    return {table: pd.concat(parts, ignore_index=True) for table, parts in frames.items()}
+
+
+def test_output_does_not_depend_on_chunk_size():
+    small, large = generate(100), generate(1000)
+
+    for table in SAMPLE_TABLES:
+        pd.testing.assert_frame_equal(small[table], large[table])
+    assert small['health_data']['date'].max() == '2025-01-03'
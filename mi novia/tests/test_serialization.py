@@ -0,0 +1,82 @@
+"""
+Serialización rápida: mismos bytes que to_dict() + json.dumps, con orjson y sin él
+"""
+
+from datetime import date, datetime
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+from app import serialization
+from app.models import db, Task, Notification
+from app.serialization import FastJSONProvider, task_serializer, notification_serializer
+
+FLOATS = {'cero': 0.0, 'decimal': 0.1, 'pequeno': 1e-05, 'borde': 0.0001, 'grande': 1e16,
+          'negativo': -2.5e-07, 'entero': 3.0, 'largo': 123456789.123}
+
+
+def seed(user_id):
+    db.session.add_all([
+        Task(user_id=user_id, title='Café con ñandú ☕', description=None, category='personal',
+             priority='high', completed=True, due_date=date(2025, 1, 2), due_time='08:30',
+             created_at=datetime(2025, 1, 1, 7, 5, 3, 120000), completed_at=datetime(2025, 1, 2, 9, 0)),
+        Task(user_id=user_id, title='Plain', description='línea\nnueva "citada" \\ \x7f',
+             category='work', due_date=None, created_at=datetime(2025, 1, 3), completed_at=None),
+        Task(user_id=user_id, title='Walk', description=None, category='exercise', due_date=date(2025, 2, 1),
+             due_time=None, created_at=datetime(2025, 1, 3, 6, 0, 0, 999999), completed_at=None),
+        Notification(user_id=user_id, type='achievement', message='¡Meta de agua cumplida! 💧',
+                     created_at=datetime(2025, 1, 4, 12, 0, 0, 1), read_at=None),
+        Notification(user_id=user_id, type='info', message='ascii', read=True,
+                     created_at=datetime(2025, 1, 5), read_at=datetime(2025, 1, 5, 1, 2, 3)),
+    ])
+    db.session.commit()
+
+
+@pytest.fixture(params=['orjson', 'fallback'])
+def provider(request, app, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(serialization, 'orjson', None)
+    return FastJSONProvider(app)
+
+
+def plain(value):
+    return not isinstance(value, str) or (value.isascii() and '\x7f' not in value)
+
+
+@pytest.mark.parametrize('model, serializer', [(Task, task_serializer), (Notification, notification_serializer)])
+@pytest.mark.parametrize('subset', ['all', 'ascii'])
+def test_serializer_output_matches_to_dict_bytes(app, user_id, provider, monkeypatch, model, serializer, subset):
+    seed(user_id)
+    objects = model.query.filter_by(user_id=user_id).order_by(model.id).all()
+    _, rows = serializer.fetch(serializer.select().where(model.user_id == user_id).order_by(model.id))
+    floats = FLOATS
+    if subset == 'ascii':
+        # Lo que orjson escribe igual que json.dumps: esta salida no pasa por el respaldo
+        keep = [all(map(plain, row.values())) for row in rows]
+        objects = [obj for obj, kept in zip(objects, keep) if kept]
+        rows = [row for row, kept in zip(rows, keep) if kept]
+        floats = {key: value for key, value in FLOATS.items() if 'e' not in repr(value)}
+    expected = DefaultJSONProvider(app).dumps({'items': [obj.to_dict() for obj in objects], **floats},
+                                              separators=(',', ':'))
+    fallbacks = []
+    original = DefaultJSONProvider.dumps
+    monkeypatch.setattr(DefaultJSONProvider, 'dumps',
+                        lambda self, obj, **kwargs: fallbacks.append(1) or original(self, obj, **kwargs))
+
+    actual = provider.dumps({'items': rows, **floats}, separators=(',', ':'))
+
+    assert rows == [obj.to_dict() for obj in objects] and rows
+    assert actual.encode() == expected.encode()
+    assert bool(fallbacks) == (serialization.orjson is None or subset == 'all')
+
+
+def test_notifications_response_matches_to_dict_bytes(app, client, user_id):
+    seed(user_id)
+    objects = Notification.query.filter_by(user_id=user_id).order_by(Notification.created_at.desc()).all()
+
+    response = client.get('/api/notifications')
+
+    assert response.data == (DefaultJSONProvider(app).dumps([obj.to_dict() for obj in objects],
+                                                            separators=(',', ':')) + '\n').encode()
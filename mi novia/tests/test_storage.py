@@ -0,0 +1,85 @@
+"""
+Perfil de almacenamiento: PRAGMAs por conexión, pool de solo lectura y motor de análisis
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.models import db
+from app.storage import analytics_engine, read_only_engine
+
+
+@pytest.fixture
+def production_app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "production.db"}',
+        'DB_AUTO_UPGRADE': True,
+        'JOBS_WORKERS': 0,
+        'DB_STORAGE_PROFILE': 'production',
+        'SQLITE_BUSY_TIMEOUT_MS': 1234,
+    })
+    with app.app_context():
+        yield app
+        db.session.remove()
+        analytics_engine().dispose()
+        db.engine.dispose()
+
+
+def pragma(conn, name):
+    return conn.execute(text(f'PRAGMA {name}')).scalar()
+
+
+def test_production_profile_sets_pragmas_on_new_connections(production_app):
+    # Una conexión nueva del pool (no la que usó la migración)
+    db.engine.dispose()
+    with db.engine.connect() as conn:
+        assert pragma(conn, 'journal_mode') == 'wal'
+        assert pragma(conn, 'busy_timeout') == 1234
+        assert pragma(conn, 'synchronous') == 1  # NORMAL
+        assert pragma(conn, 'temp_store') == 2  # MEMORY
+
+
+def test_default_profile_keeps_sqlite_defaults(app):
+    with db.engine.connect() as conn:
+        assert pragma(conn, 'journal_mode') != 'wal'
+
+
+def test_read_only_engine_rejects_writes(production_app):
+    engine = read_only_engine(db.engine.url.database)
+
+    with engine.connect() as conn:
+        assert pragma(conn, 'query_only') == 1
+        assert conn.execute(text('SELECT COUNT(*) FROM users')).scalar() == 0
+        with pytest.raises(OperationalError):
+            conn.execute(text("INSERT INTO users (name, email, password_hash) VALUES ('a', 'a@a', 'x')"))
+
+    # Aun sin query_only, el archivo está abierto con mode=ro
+    with engine.connect() as conn:
+        conn.execute(text('PRAGMA query_only = OFF'))
+        with pytest.raises(OperationalError, match='readonly'):
+            conn.execute(text("INSERT INTO users (name, email, password_hash) VALUES ('a', 'a@a', 'x')"))
+        conn.rollback()
+    engine.dispose()
+
+
+def test_analytics_engine_uses_read_only_pool_in_production(production_app):
+    engine = analytics_engine()
+
+    assert engine is not db.engine
+    assert engine is analytics_engine()
+    with engine.connect() as conn:
+        assert pragma(conn, 'query_only') == 1
+        assert pragma(conn, 'busy_timeout') == 1234
+
+
+def test_analytics_engine_falls_back_to_app_engine(app):
+    assert analytics_engine() is db.engine
+
+
+def test_analytics_engine_falls_back_without_read_only_pool(production_app, monkeypatch):
+    monkeypatch.setitem(production_app.config, 'ANALYTICS_READ_ONLY_POOL', False)
+
+    assert analytics_engine() is db.engine
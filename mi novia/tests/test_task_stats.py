@@ -0,0 +1,54 @@
+"""
+Contadores de tareas: coinciden con un GROUP BY sobre tasks tras crear, completar y borrar
+"""
+
+from app.models import db, Task, TaskCounter
+from app.task_stats import get_task_completion_stats
+
+
+def counters(user_id):
+    rows = TaskCounter.query.filter_by(user_id=user_id).all()
+    return {row.category: (row.total, row.completed) for row in rows if row.total}
+
+
+def assert_counters_match_tasks(user_id):
+    assert get_task_completion_stats(user_id, use_counters=True) == \
+        get_task_completion_stats(user_id, use_counters=False)
+
+
+def test_counters_follow_task_writes(client, user_id):
+    ids = [client.post('/api/tasks', json={'title': f'Tarea {index}', 'category': category}).get_json()['task']['id']
+           for index, category in enumerate(['work', 'work', 'health', 'exercise', 'food'])]
+    assert_counters_match_tasks(user_id)
+
+    client.put(f'/api/tasks/{ids[0]}', json={'completed': True})
+    client.put(f'/api/tasks/{ids[0]}', json={'completed': True})  # sin cambio: no suma dos veces
+    client.put(f'/api/tasks/{ids[2]}', json={'completed': True})
+    client.put(f'/api/tasks/{ids[2]}', json={'completed': False})
+    client.put(f'/api/tasks/{ids[3]}', json={'completed': True})
+    assert_counters_match_tasks(user_id)
+    assert counters(user_id) == {'work': (2, 1), 'health': (1, 0), 'exercise': (1, 1), 'food': (1, 0)}
+
+    client.delete(f'/api/tasks/{ids[3]}')  # completada
+    client.delete(f'/api/tasks/{ids[4]}')  # pendiente
+    assert_counters_match_tasks(user_id)
+    assert counters(user_id) == {'work': (2, 1), 'health': (1, 0)}
+
+    stats = client.get('/api/analytics/task-completion').get_json()
+    assert (stats['total_tasks'], stats['completed_tasks']) == (3, 1)
+    assert stats['category_stats']['exercise'] == {'total': 0, 'completed': 0, 'completion_rate': 0}
+
+
+def test_rebuild_command_repairs_drifted_counters(app, client, user_id):
+    for category, completed in (('work', True), ('work', False), ('personal', True)):
+        db.session.add(Task(user_id=user_id, title=category, category=category, completed=completed))
+    db.session.commit()
+    # Tareas escritas sin pasar por las rutas: los contadores no las conocen
+    assert counters(user_id) == {}
+
+    result = app.test_cli_runner().invoke(args=['rebuild-task-counters', '--user-id', str(user_id)])
+
+    assert result.exit_code == 0, result.output
+    db.session.expire_all()
+    assert counters(user_id) == {'work': (2, 1), 'personal': (1, 1)}
+    assert_counters_match_tasks(user_id)
@@ -0,0 +1,86 @@
+"""
+Listado de tareas por cursor: recorrido completo, cursores inválidos y tamaño de página
+"""
+
+import base64
+from datetime import date, timedelta
+
+import pytest
+
+from app.models import db, Task
+from app.task_queries import MAX_PAGE_SIZE
+
+
+def add_tasks(user_id, due_dates):
+    tasks = [Task(user_id=user_id, title=f'Tarea {index}', category='work', due_date=due)
+             for index, due in enumerate(due_dates)]
+    db.session.add_all(tasks)
+    db.session.commit()
+    return tasks
+
+
+def expected_order(tasks):
+    dated = sorted((task for task in tasks if task.due_date), key=lambda task: (task.due_date, task.id), reverse=True)
+    undated = sorted((task.id for task in tasks if task.due_date is None), reverse=True)
+    return [task.id for task in dated] + undated
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 4, 50])
+def test_pages_cover_all_tasks_once(client, user_id, limit):
+    today = date.today()
+    # Empates de fecha, tareas sin fecha intercaladas por id y otra fecha creada después
+    tasks = add_tasks(user_id, [today, None, today, today - timedelta(days=3), None, today,
+                                today + timedelta(days=10), None, today - timedelta(days=3)])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        url = f'/api/tasks?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()
+        assert len(body['tasks']) <= limit
+        seen += [task['id'] for task in body['tasks']]
+        cursor = body['next_cursor']
+        pages += 1
+        if cursor is None:
+            break
+        assert pages < 20
+
+    assert seen == expected_order(tasks)
+    assert len(seen) == len(set(seen)) == len(tasks)
+
+
+def test_undated_tasks_come_last(client, user_id):
+    add_tasks(user_id, [None, date.today() - timedelta(days=30), None])
+
+    dates = [task['due_date'] for task in client.get('/api/tasks').get_json()['tasks']]
+
+    assert dates[0] is not None
+    assert dates[1:] == [None, None]
+
+
+def encoded(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', ['%%%', 'abc', encoded('sin-separador'), encoded('2025-13-01|5'),
+                                    encoded('2025-01-01|x'), encoded('a|b|c')])
+def test_malformed_cursor_returns_400(client, user_id, cursor):
+    response = client.get(f'/api/tasks?cursor={cursor}')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Cursor inválido'
+
+
+@pytest.mark.parametrize('limit', ['0', '-1'])
+def test_invalid_limit_returns_400(client, limit):
+    assert client.get(f'/api/tasks?limit={limit}').status_code == 400
+
+
+def test_limit_is_capped_at_max_page_size(client, user_id):
+    add_tasks(user_id, [date.today()] * (MAX_PAGE_SIZE + 5))
+
+    body = client.get(f'/api/tasks?limit={MAX_PAGE_SIZE * 10}').get_json()
+
+    assert len(body['tasks']) == MAX_PAGE_SIZE
+    assert body['next_cursor'] is not None
+    rest = client.get(f'/api/tasks?limit={MAX_PAGE_SIZE * 10}&cursor={body["next_cursor"]}').get_json()
+    assert len(rest['tasks']) == 5 and rest['next_cursor'] is None